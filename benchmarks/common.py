@@ -0,0 +1,127 @@
+"""
+Общие функции бенчмарков: настройка Django, тестовая база,
+статистика замеров и запись результатов в JSON.
+
+Результаты разных прогонов сравнивает benchmarks/compare.py.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Подключает проект (запуск скриптов из любого каталога)"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Тестовая база (как у manage.py test), удаляется после прогона"""
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль с линейной интерполяцией по отсортированному списку"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(timings_ms):
+    """Сводка по замерам в миллисекундах: среднее, p50/p95/p99, min/max"""
+    values = sorted(timings_ms)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values), 4),
+        'p50_ms': round(percentile(values, 0.50), 4),
+        'p95_ms': round(percentile(values, 0.95), 4),
+        'p99_ms': round(percentile(values, 0.99), 4),
+        'min_ms': round(values[0], 4),
+        'max_ms': round(values[-1], 4),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Окружение прогона: ревизия, версии, СУБД"""
+    import django
+    from django.db import connection
+
+    return {
+        'git_revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def default_output(suite):
+    """Файл результатов по умолчанию: benchmarks/results/<suite>-<время>.json"""
+    directory = os.path.join(ROOT, 'benchmarks', 'results')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{suite}-{datetime.now():%Y%m%d-%H%M%S}.json')
+
+
+def write_results(path, suite, params, results, env=None):
+    """
+    Записывает результаты в JSON: {"suite", "environment", "params", "results"}.
+    results - словарь {имя замера: сводка summarize() и доп. поля}.
+    """
+    data = {
+        'suite': suite,
+        'environment': env if env is not None else environment(),
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+    return data
+
+
+def print_table(results):
+    """Таблица сводок в консоль"""
+    width = max((len(name) for name in results), default=10)
+    print(f'  {"":<{width}}  {"p50, мс":>10}  {"p95, мс":>10}  {"p99, мс":>10}  {"n":>6}')
+    for name, summary in results.items():
+        if not summary.get('count'):
+            print(f'  {name:<{width}}  нет замеров')
+            continue
+        print(
+            f'  {name:<{width}}  {summary["p50_ms"]:10.4f}  {summary["p95_ms"]:10.4f}  '
+            f'{summary["p99_ms"]:10.4f}  {summary["count"]:>6}'
+        )
@@ -0,0 +1,68 @@
+"""
+Сравнение двух прогонов бенчмарков (JSON от micro.py или loadtest.py).
+
+    python benchmarks/compare.py before.json after.json
+    python benchmarks/compare.py before.json after.json --metric p95_ms --threshold 5
+
+Для каждого замера печатает значение до, после и изменение в процентах.
+Код выхода 1, если какой-то замер стал медленнее больше чем на --threshold %.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(before, after, metric, threshold):
+    """Строки отчёта и список замеров, ухудшившихся сильнее порога"""
+    rows = []
+    regressions = []
+    for name in sorted(set(before['results']) | set(after['results'])):
+        old = before['results'].get(name, {}).get(metric)
+        new = after['results'].get(name, {}).get(metric)
+        if old is None or new is None:
+            rows.append((name, old, new, None))
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        rows.append((name, old, new, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--metric', default='p50_ms', help='Поле сводки: p50_ms, p95_ms, p99_ms, mean_ms')
+    parser.add_argument('--threshold', type=float, default=10, help='Допустимое ухудшение, %%')
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    if before.get('suite') != after.get('suite'):
+        print(f'Внимание: разные наборы бенчмарков ({before.get("suite")} и {after.get("suite")})')
+    for label, data in (('до', before), ('после', after)):
+        env = data.get('environment', {})
+        print(f'{label}: ревизия {env.get("git_revision")}, {env.get("timestamp")}')
+
+    rows, regressions = compare(before, after, args.metric, args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f'\n  {"":<{width}}  {"до":>10}  {"после":>10}  {"изменение":>10}   ({args.metric})')
+    for name, old, new, change in rows:
+        if change is None:
+            print(f'  {name:<{width}}  {old if old is not None else "-":>10}  {new if new is not None else "-":>10}')
+            continue
+        mark = '  !' if name in regressions else ''
+        print(f'  {name:<{width}}  {old:10.4f}  {new:10.4f}  {change:+9.1f}%{mark}')
+
+    if regressions:
+        print(f'\nМедленнее больше чем на {args.threshold:g}%: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Генератор данных для бенчмарков и нагрузочного теста.
+
+Создаёт пользователей, маршруты, отзывы, избранное и точки интереса
+пакетными вставками, затем пересчитывает денормализованные счётчики
+(bulk_create не отправляет сигналы) и, по желанию, проверки условий.
+Данные детерминированы: одинаковые параметры и --seed дают одну и ту же базу.
+
+Наполнение базы из настроек проекта (например, для benchmarks/loadtest.py):
+    python benchmarks/datagen.py --routes 2000 --reviews 10000 --favorites 5000
+Данные добавляются к существующим. Все пользователи генератора имеют
+пароль PASSWORD.
+"""
+import argparse
+import random
+import time
+
+if __name__ == '__main__':
+    from common import setup_django
+    setup_django()
+
+USERNAME_PREFIX = 'bench'
+PASSWORD = 'benchmark-password'
+
+# Маршруты разбросаны по европейской части России
+AREA = {'lat': (43.0, 68.0), 'lon': (28.0, 60.0)}
+
+PLACES = ['Озеро', 'Перевал', 'Хребет', 'Водопад', 'Ущелье', 'Долина', 'Плато', 'Каньон', 'Берег', 'Вершина']
+NAMES = ['Горное', 'Лесное', 'Северное', 'Светлое', 'Каменное', 'Тихое', 'Синее', 'Дальнее', 'Верхнее', 'Старое']
+WORDS = [
+    'тропа', 'подъём', 'спуск', 'лес', 'река', 'камни', 'вид', 'родник', 'стоянка',
+    'мост', 'болото', 'скалы', 'луг', 'брод', 'маркировка', 'серпантин',
+]
+REVIEW_TEXTS = ['Отличный маршрут', 'Красиво, но грязно', 'Много людей', 'Хорошая маркировка', '']
+
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def unique_pairs(rng, count, left, right):
+    """count случайных неповторяющихся пар (элемент left, элемент right)"""
+    count = min(count, len(left) * len(right))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.randrange(len(left)), rng.randrange(len(right))))
+    return [(left[i], right[j]) for i, j in sorted(pairs)]
+
+
+def generate(routes=1000, users=100, reviews=5000, favorites=2000, points=1000,
+             checks=True, seed=1, batch_size=2000):
+    """
+    Наполняет базу и возвращает словарь с числом созданных объектов
+    и списками id пользователей и маршрутов.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.db import transaction
+
+    from hikes import caching, conditions
+    from hikes.models import HikeRoute, PointOfInterest, Review
+    from hikes.stats import rebuild_route_stats
+
+    rng = random.Random(seed)
+    started = time.monotonic()
+
+    # Пароль хэшируется один раз: make_password для каждого пользователя занял бы минуты
+    password = make_password(PASSWORD)
+    usernames = [f'{USERNAME_PREFIX}{i}' for i in range(users)]
+    existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    User.objects.bulk_create(
+        [User(username=name, password=password) for name in usernames if name not in existing],
+        batch_size=batch_size
+    )
+    user_ids = list(User.objects.filter(username__in=usernames).order_by('pk').values_list('pk', flat=True))
+
+    with transaction.atomic():
+        first_route = HikeRoute.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        batch = []
+        for i in range(routes):
+            lat = rng.uniform(*AREA['lat'])
+            lon = rng.uniform(*AREA['lon'])
+            batch.append(HikeRoute(
+                title=f'{rng.choice(PLACES)} {rng.choice(NAMES)} {first_route + i + 1}',
+                description=sentence(rng, rng.randint(8, 40)),
+                length_km=round(rng.uniform(3, 40), 1),
+                estimated_time_h=rng.randint(1, 12),
+                difficulty=rng.choice(['easy', 'medium', 'hard']),
+                start_point_lat=lat,
+                start_point_lon=lon,
+                finish_point_lat=lat + rng.uniform(-0.1, 0.1),
+                finish_point_lon=lon + rng.uniform(-0.1, 0.1),
+                author_id=rng.choice(user_ids),
+            ))
+        HikeRoute.objects.bulk_create(batch, batch_size=batch_size)
+        route_ids = list(HikeRoute.objects.filter(pk__gt=first_route).order_by('pk').values_list('pk', flat=True))
+
+        Review.objects.bulk_create([
+            Review(route_id=route_id, user_id=user_id, rating=rng.randint(1, 5), text=rng.choice(REVIEW_TEXTS))
+            for route_id, user_id in unique_pairs(rng, reviews, route_ids, user_ids)
+        ], batch_size=batch_size, ignore_conflicts=True)
+
+        Favorite = HikeRoute.favorited_by.through
+        Favorite.objects.bulk_create([
+            Favorite(hikeroute_id=route_id, user_id=user_id)
+            for route_id, user_id in unique_pairs(rng, favorites, route_ids, user_ids)
+        ], batch_size=batch_size, ignore_conflicts=True)
+
+        types = [value for value, label in PointOfInterest.TYPE_CHOICES]
+        poi_batch = []
+        for i in range(points):
+            poi_batch.append(PointOfInterest(
+                name=f'{rng.choice(PLACES)} {i + 1}',
+                description=sentence(rng, 6),
+                coordinates_lat=rng.uniform(*AREA['lat']),
+                coordinates_lon=rng.uniform(*AREA['lon']),
+                type=rng.choice(types),
+            ))
+        poi_ids = [poi.pk for poi in PointOfInterest.objects.bulk_create(poi_batch, batch_size=batch_size)]
+        if poi_ids and None in poi_ids:
+            # СУБД без RETURNING: перечитываем id
+            poi_ids = list(PointOfInterest.objects.order_by('-pk').values_list('pk', flat=True)[:points])
+        PoiRoute = PointOfInterest.routes.through
+        PoiRoute.objects.bulk_create([
+            PoiRoute(pointofinterest_id=poi_id, hikeroute_id=route_id)
+            for poi_id in poi_ids
+            for route_id in rng.sample(route_ids, min(len(route_ids), rng.randint(1, 3)))
+        ], batch_size=batch_size, ignore_conflicts=True)
+
+    rebuild_route_stats(batch_size=batch_size)
+    if checks:
+        conditions.refresh_all_routes()
+    caching.invalidate_catalog()
+    return {
+        'users': len(user_ids),
+        'routes': len(route_ids),
+        'reviews': Review.objects.filter(route_id__in=route_ids).count(),
+        'favorites': HikeRoute.favorited_by.through.objects.filter(hikeroute_id__in=route_ids).count(),
+        'points': len(poi_ids),
+        'seconds': round(time.monotonic() - started, 2),
+        'user_ids': user_ids,
+        'route_ids': route_ids,
+    }
+
+
+def add_arguments(parser):
+    """Параметры объёма данных - общие для всех скриптов, которые наполняют базу"""
+    parser.add_argument('--routes', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--favorites', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=1000)
+    parser.add_argument('--no-checks', dest='checks', action='store_false',
+                        help='Не рассчитывать проверки условий (страница маршрута пойдёт к провайдерам)')
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def generate_from_args(args):
+    return generate(
+        routes=args.routes, users=args.users, reviews=args.reviews, favorites=args.favorites,
+        points=args.points, checks=args.checks, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+    created = generate_from_args(args)
+    print(
+        f'Создано: маршрутов {created["routes"]}, отзывов {created["reviews"]}, '
+        f'в избранном {created["favorites"]}, точек интереса {created["points"]}, '
+        f'пользователей {created["users"]} (пароль {PASSWORD!r}) за {created["seconds"]} с'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Нагрузочный тест запущенного сервера (runserver, gunicorn, uvicorn).
+
+Несколько потоков-"пользователей" в течение --duration секунд выполняют
+сценарии со своими весами:
+- home: каталог;
+- hike_detail: страница случайного маршрута;
+- search: поиск по каталогу;
+- toggle_favorite: добавление/удаление из избранного (AJAX, под логином).
+Отчёт - p50/p95/p99, пропускная способность и ошибки по сценариям,
+результаты пишутся в JSON (сравнение прогонов - benchmarks/compare.py).
+
+Подготовка: база с данными генератора и запущенный сервер, например:
+    python benchmarks/datagen.py --routes 2000 --reviews 10000
+    python manage.py runserver --noreload
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --concurrency 8 --duration 30
+
+Клиент - потоки Python: на больших нагрузках сам клиент упирается в GIL,
+тогда стоит запустить несколько процессов loadtest с меньшим --concurrency.
+"""
+import argparse
+import platform
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+import requests
+
+import datagen
+from common import default_output, git_revision, print_table, summarize, write_results
+
+# Сценарии и их веса по умолчанию
+SCENARIOS = {
+    'home': 4,
+    'hike_detail': 4,
+    'search': 2,
+    'toggle_favorite': 1,
+}
+
+
+class Target:
+    """Сервер под нагрузкой: адреса и маршруты, найденные через /api/hikes/"""
+
+    def __init__(self, base_url, timeout, discover_pages):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.route_ids = []
+        self.search_terms = set()
+        params = {'sort': 'new'}
+        for _ in range(discover_pages):
+            data = requests.get(self.url('api/hikes/'), params=params, timeout=timeout).json()
+            for route in data['results']:
+                self.route_ids.append(route['id'])
+                self.search_terms.add(route['title'].split()[0])
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        if not self.route_ids:
+            raise SystemExit('На сервере нет маршрутов: наполните базу benchmarks/datagen.py')
+        self.search_terms = sorted(self.search_terms)
+
+    def url(self, path):
+        return urljoin(self.base_url, path)
+
+
+class Worker(threading.Thread):
+    """Один виртуальный пользователь: анонимная сессия и сессия под логином"""
+
+    def __init__(self, number, target, scenarios, username, password, warmup_until, deadline):
+        super().__init__(daemon=True)
+        self.target = target
+        self.rng = random.Random(number)
+        self.names = list(scenarios)
+        self.weights = [scenarios[name] for name in self.names]
+        self.username = username
+        self.password = password
+        self.warmup_until = warmup_until
+        self.deadline = deadline
+        self.anonymous = requests.Session()
+        self.user = None
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def login(self):
+        session = requests.Session()
+        login_url = self.target.url('login/')
+        session.get(login_url, timeout=self.target.timeout)
+        response = session.post(login_url, data={
+            'username': self.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+        }, headers={'Referer': login_url}, timeout=self.target.timeout)
+        if 'sessionid' not in session.cookies:
+            raise RuntimeError(f'Не удалось войти как {self.username} (ответ {response.status_code})')
+        return session
+
+    def home(self):
+        return self.anonymous.get(self.target.url(''), timeout=self.target.timeout)
+
+    def hike_detail(self):
+        route_id = self.rng.choice(self.target.route_ids)
+        return self.anonymous.get(self.target.url(f'hike/{route_id}/'), timeout=self.target.timeout)
+
+    def search(self):
+        return self.anonymous.get(
+            self.target.url(''), params={'search': self.rng.choice(self.target.search_terms)},
+            timeout=self.target.timeout
+        )
+
+    def toggle_favorite(self):
+        if self.user is None:
+            self.user = self.login()
+        route_id = self.rng.choice(self.target.route_ids)
+        url = self.target.url(f'hike/{route_id}/toggle-favorite/')
+        token = self.user.cookies.get('csrftoken', '')
+        return self.user.post(url, data={
+            'action': self.rng.choice(['add', 'remove']),
+            'csrfmiddlewaretoken': token,
+        }, headers={
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': token,
+            'Referer': url,
+        }, timeout=self.target.timeout)
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            start = time.monotonic()
+            try:
+                ok = getattr(self, name)().status_code < 400
+            except (requests.RequestException, RuntimeError):
+                ok = False
+            elapsed = (time.monotonic() - start) * 1000
+            if start < self.warmup_until:
+                continue
+            if ok:
+                self.timings[name].append(elapsed)
+            else:
+                self.errors[name] += 1
+
+
+def run(target, scenarios, concurrency, duration, warmup, users, password):
+    """Запускает потоки и собирает результаты по сценариям"""
+    started = time.monotonic()
+    warmup_until = started + warmup
+    deadline = warmup_until + duration
+    workers = [
+        Worker(i, target, scenarios, f'{datagen.USERNAME_PREFIX}{i % users}', password,
+               warmup_until, deadline)
+        for i in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    results = {}
+    all_timings = []
+    total_errors = 0
+    for name in scenarios:
+        timings = [value for worker in workers for value in worker.timings[name]]
+        errors = sum(worker.errors[name] for worker in workers)
+        all_timings.extend(timings)
+        total_errors += errors
+        results[name] = dict(summarize(timings), errors=errors, throughput_rps=round(len(timings) / duration, 2))
+    results['total'] = dict(
+        summarize(all_timings), errors=total_errors, throughput_rps=round(len(all_timings) / duration, 2)
+    )
+    return results
+
+
+def parse_scenarios(value):
+    """'home,search' или 'home=3,search=1' -> {сценарий: вес}"""
+    scenarios = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Неизвестный сценарий {name}, есть: {", ".join(SCENARIOS)}')
+        scenarios[name] = float(weight) if weight else SCENARIOS[name]
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=8, help='Одновременных пользователей')
+    parser.add_argument('--duration', type=float, default=30, help='Длительность замера (секунды)')
+    parser.add_argument('--warmup', type=float, default=3, help='Прогрев перед замером (секунды)')
+    parser.add_argument('--scenarios', type=parse_scenarios, default=dict(SCENARIOS),
+                        help='Сценарии и веса: home=4,hike_detail=4,search=2,toggle_favorite=1')
+    parser.add_argument('--users', type=int, default=100, help='Сколько пользователей создал datagen')
+    parser.add_argument('--password', default=datagen.PASSWORD)
+    parser.add_argument('--timeout', type=float, default=10, help='Таймаут одного запроса (секунды)')
+    parser.add_argument('--discover-pages', type=int, default=10, help='Страниц /api/hikes/ для списка маршрутов')
+    parser.add_argument('--output', help='Файл JSON с результатами (по умолчанию benchmarks/results/)')
+    args = parser.parse_args()
+
+    target = Target(args.url, args.timeout, args.discover_pages)
+    print(
+        f'{args.url}: {len(target.route_ids)} маршрутов, {args.concurrency} пользователей, '
+        f'{args.duration:g} с (+{args.warmup:g} с прогрев)'
+    )
+    results = run(target, args.scenarios, args.concurrency, args.duration, args.warmup,
+                  args.users, args.password)
+
+    env = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'url': args.url,
+    }
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'password')}
+    output = args.output or default_output('loadtest')
+    write_results(output, 'loadtest', params, results, env=env)
+
+    print_table(results)
+    for name, summary in results.items():
+        print(f'  {name}: {summary["throughput_rps"]} запр/с, ошибок {summary["errors"]}')
+    print(f'\nРезультаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Микробенчмарки расчёта баллов и страниц приложения.
+
+- RouteAnalyzer.calculate_overall_score и WeatherService.get_weather_quality_score:
+  время одного вызова (среднее по пачке из --number вызовов, --repeat пачек);
+- векторный расчёт баллов (get_weather_quality_scores, calculate_overall_scores)
+  для --bulk-size маршрутов сразу;
+- страницы и API через тестовый клиент Django (без сети и сервера):
+  каталог, поиск, сортировка по баллу, страница маршрута, избранное, API.
+  По умолчанию кэш очищается перед каждым запросом (холодный кэш),
+  с --warm-cache - нет.
+
+Данные генерирует benchmarks/datagen.py в тестовой базе, которая
+удаляется после прогона. Запуск из корня проекта:
+    python benchmarks/micro.py
+    python benchmarks/micro.py --routes 10000 --reviews 50000 --output before.json
+Сравнение прогонов: python benchmarks/compare.py before.json after.json
+"""
+import argparse
+import random
+import time
+
+from common import default_output, print_table, setup_django, summarize, test_database, write_results
+
+setup_django()
+
+import datagen  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from hikes.models import HikeRoute  # noqa: E402
+from hikes.services import RouteAnalyzer, WeatherService  # noqa: E402
+
+
+def bench_function(func, args_list, number, repeat):
+    """Время одного вызова func: по пачкам из number вызовов на разных аргументах"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(number):
+            func(*args_list[i % len(args_list)])
+        timings.append((time.perf_counter() - start) * 1000 / number)
+    return summarize(timings)
+
+
+def function_benchmarks(number, repeat):
+    rng = random.Random(1)
+    routes = [HikeRoute(difficulty=rng.choice(['easy', 'medium', 'hard'])) for _ in range(100)]
+    weather = [WeatherService.get_demo_weather_data(55.75, 37.61) for _ in range(100)]
+    return {
+        'calculate_overall_score': bench_function(
+            lambda route, weather_score, parking_score: RouteAnalyzer.calculate_overall_score(
+                route, weather_score, parking_score),
+            [(route, rng.randint(0, 100), rng.randint(0, 100)) for route in routes],
+            number, repeat,
+        ),
+        'get_weather_quality_score': bench_function(
+            WeatherService.get_weather_quality_score, [(data,) for data in weather], number, repeat
+        ),
+    }
+
+
+def bulk_benchmarks(size, repeat):
+    """Векторный расчёт баллов: время на весь массив из size маршрутов"""
+    rng = random.Random(3)
+    precipitation = [rng.randint(0, 100) for _ in range(size)]
+    wind = [rng.randint(0, 15) for _ in range(size)]
+    temperature = [rng.randint(-10, 40) for _ in range(size)]
+    parking = [rng.randint(0, 100) for _ in range(size)]
+    difficulties = [rng.choice(['easy', 'medium', 'hard']) for _ in range(size)]
+
+    def scores():
+        weather = WeatherService.get_weather_quality_scores(precipitation, wind, temperature)
+        return RouteAnalyzer.calculate_overall_scores(weather, parking, difficulties)
+
+    return {
+        f'get_weather_quality_scores_{size}': bench_function(
+            WeatherService.get_weather_quality_scores, [(precipitation, wind, temperature)], 1, repeat
+        ),
+        f'calculate_overall_scores_{size}': bench_function(
+            RouteAnalyzer.calculate_overall_scores, [(precipitation, parking, difficulties)], 1, repeat
+        ),
+        f'bulk_scoring_{size}': bench_function(scores, [()], 1, repeat),
+    }
+
+
+def bench_view(client, urls, requests_count, warm_cache):
+    """Время ответа на GET по списку адресов (по кругу)"""
+    timings = []
+    for i in range(requests_count):
+        if not warm_cache:
+            cache.clear()
+        url = urls[i % len(urls)]
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: ответ {response.status_code}')
+    return summarize(timings)
+
+
+def view_benchmarks(route_ids, requests_count, warm_cache):
+    rng = random.Random(2)
+    sample = rng.sample(route_ids, min(len(route_ids), 50))
+    detail_urls = [reverse('hike_detail', args=[route_id]) for route_id in sample]
+    search_urls = [f'{reverse("home")}?search={word}' for word in datagen.PLACES]
+
+    # Пользователь с избранным и отзывами, как у активного туриста
+    user = User.objects.filter(username__startswith=datagen.USERNAME_PREFIX).order_by('pk').first()
+    anonymous = Client(SERVER_NAME='localhost')
+    authenticated = Client(SERVER_NAME='localhost')
+    authenticated.force_login(user)
+
+    views = {
+        'view_home_anonymous': (anonymous, [reverse('home')]),
+        'view_home_authenticated': (authenticated, [reverse('home')]),
+        'view_home_search': (anonymous, search_urls),
+        'view_home_sort_score': (anonymous, [f'{reverse("home")}?sort=score']),
+        'view_hike_detail_anonymous': (anonymous, detail_urls),
+        'view_hike_detail_authenticated': (authenticated, detail_urls),
+        'view_favorites': (authenticated, [reverse('favorites')]),
+        'view_api_hikes': (anonymous, [reverse('api_hikes')]),
+        'view_api_nearby': (anonymous, [f'{reverse("api_nearby")}?lat=55.75&lon=37.61&radius_km=200']),
+    }
+    results = {}
+    for name, (client, urls) in views.items():
+        # Первый запрос прогревает импорты, шаблоны и соединение - не учитываем
+        bench_view(client, urls[:1], 1, warm_cache=True)
+        results[name] = bench_view(client, urls, requests_count, warm_cache)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--number', type=int, default=10000, help='Вызовов функции в одной пачке')
+    parser.add_argument('--repeat', type=int, default=20, help='Пачек вызовов функции')
+    parser.add_argument('--bulk-size', type=int, default=100000, help='Маршрутов в векторном расчёте баллов')
+    parser.add_argument('--requests', type=int, default=50, help='Запросов к каждой странице')
+    parser.add_argument('--warm-cache', action='store_true', help='Не очищать кэш перед запросами')
+    parser.add_argument('--debug', action='store_true', help='Оставить DEBUG из настроек (журнал SQL замедляет запросы)')
+    parser.add_argument('--output', help='Файл JSON с результатами (по умолчанию benchmarks/results/)')
+    args = parser.parse_args()
+    if not args.debug:
+        settings.DEBUG = False
+
+    with test_database():
+        created = datagen.generate_from_args(args)
+        print(
+            f'Данные: {created["routes"]} маршрутов, {created["reviews"]} отзывов, '
+            f'{created["favorites"]} в избранном ({created["seconds"]} с)'
+        )
+        results = function_benchmarks(args.number, args.repeat)
+        results.update(bulk_benchmarks(args.bulk_size, args.repeat))
+        results.update(view_benchmarks(created['route_ids'], args.requests, args.warm_cache))
+        params = {key: value for key, value in vars(args).items() if key != 'output'}
+        output = args.output or default_output('micro')
+        write_results(output, 'micro', params, results)
+
+    print_table(results)
+    print(f'\nРезультаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
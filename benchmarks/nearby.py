@@ -0,0 +1,131 @@
+"""
+Бенчмарк поиска маршрутов рядом с точкой (hikes/nearby.py).
+
+Сравнивает на 10k и 100k маршрутов:
+- nearby_routes: прямоугольник по индексу + точное расстояние в СУБД;
+- тот же расчёт расстояния в СУБД без прямоугольника (полный проход);
+- загрузку всех координат в Python и расчёт haversine_km в цикле.
+
+Запуск из корня проекта:
+    python benchmarks/nearby.py
+    python benchmarks/nearby.py --routes 10000 100000 --radius 25 --repeat 20
+
+База создаётся тестовая (как у manage.py test) и удаляется после прогона.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from hikes import geo, nearby  # noqa: E402
+from hikes.models import HikeRoute  # noqa: E402
+
+# Маршруты разбросаны по европейской части России
+AREA = {'lat': (43.0, 68.0), 'lon': (28.0, 60.0)}
+
+
+def fill_routes(count, seed=1):
+    """Пересоздаёт count маршрутов со случайными стартовыми точками"""
+    HikeRoute.objects.all().delete()
+    author, _ = User.objects.get_or_create(username='benchmark')
+    rng = random.Random(seed)
+    batch = []
+    for i in range(count):
+        lat = rng.uniform(*AREA['lat'])
+        lon = rng.uniform(*AREA['lon'])
+        batch.append(HikeRoute(
+            title=f'Маршрут {i}',
+            description='',
+            length_km=10,
+            estimated_time_h=4,
+            start_point_lat=lat,
+            start_point_lon=lon,
+            finish_point_lat=lat,
+            finish_point_lon=lon,
+            author=author,
+        ))
+    HikeRoute.objects.bulk_create(batch, batch_size=2000)
+
+
+def first_page(queryset):
+    """Первая страница по 9 маршрутов и общее число - как во view"""
+    page = Paginator(queryset, 9).get_page(1)
+    return [route.id for route in page], page.paginator.count
+
+
+def indexed(lat, lon, radius_km):
+    return first_page(nearby.nearby_routes(HikeRoute.objects.all(), lat, lon, radius_km))
+
+
+def full_scan(lat, lon, radius_km):
+    queryset = HikeRoute.objects.annotate(
+        distance_km=nearby.distance_expression(lat, lon)
+    ).filter(distance_km__lte=radius_km).order_by('distance_km', 'id')
+    return first_page(queryset)
+
+
+def in_python(lat, lon, radius_km):
+    found = []
+    for route_id, route_lat, route_lon in HikeRoute.objects.values_list(
+            'id', 'start_point_lat', 'start_point_lon'):
+        distance = geo.haversine_km(lat, lon, route_lat, route_lon)
+        if distance <= radius_km:
+            found.append((distance, route_id))
+    found.sort()
+    return [route_id for distance, route_id in found[:9]], len(found)
+
+
+def measure(func, points, radius_km):
+    timings = []
+    results = []
+    for lat, lon in points:
+        start = time.perf_counter()
+        results.append(func(lat, lon, radius_km))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--routes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--radius', type=float, default=25)
+    parser.add_argument('--repeat', type=int, default=20, help='Число случайных точек поиска')
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for count in args.routes:
+            fill_routes(count)
+            rng = random.Random(count)
+            points = [(rng.uniform(*AREA['lat']), rng.uniform(*AREA['lon'])) for _ in range(args.repeat)]
+            print(f'\n{count} маршрутов, радиус {args.radius:g} км, {args.repeat} точек')
+            reference = None
+            for name, func in [('nearby_routes', indexed), ('без индекса', full_scan), ('в Python', in_python)]:
+                timings, results = measure(func, points, args.radius)
+                if reference is None:
+                    reference = results
+                elif results != reference:
+                    print(f'  ! {name}: результаты расходятся с nearby_routes')
+                print(
+                    f'  {name:<14} медиана {statistics.median(timings):8.2f} мс   '
+                    f'макс {max(timings):8.2f} мс'
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
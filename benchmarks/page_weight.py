@@ -0,0 +1,123 @@
+"""
+Вес страниц и то, что мешает первой отрисовке при холодной загрузке.
+
+Страницы (главная, маршрут, о проекте) рендерятся через тестовый клиент
+Django на небольшой тестовой базе; из HTML берутся таблицы стилей и скрипты:
+- render_blocking - стили и скрипты без defer/async: браузер ждёт их,
+  прежде чем показать страницу;
+- third_party_origins - сторонние хосты: на холодной загрузке каждый
+  стоит отдельного DNS-запроса, TCP- и TLS-соединения;
+- local_bytes, local_gzip_bytes, local_brotli_bytes - размер своих
+  файлов (из static/) без сжатия и в сжатом виде, как их отдаёт WhiteNoise.
+  Размер файлов с CDN без сети не узнать - они только считаются.
+
+Запуск из корня проекта (до и после manage.py vendor_static):
+    python benchmarks/page_weight.py --output before.json
+    python benchmarks/compare.py before.json after.json --metric local_gzip_bytes
+"""
+import argparse
+import gzip
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from common import default_output, setup_django, test_database, write_results
+
+setup_django()
+
+import datagen  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles import finders  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class AssetParser(HTMLParser):
+    """Таблицы стилей и скрипты страницы: (адрес, блокирует ли отрисовку)"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and attrs.get('rel') == 'stylesheet':
+            self.assets.append((attrs['href'], True))
+        elif tag == 'script' and attrs.get('src'):
+            self.assets.append((attrs['src'], 'defer' not in attrs and 'async' not in attrs))
+
+
+def local_file(url):
+    """Содержимое своего статического файла по адресу из страницы (None - не найден)"""
+    path = finders.find(url[len(settings.STATIC_URL):])
+    if path is None:
+        return None
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def page_weight(html):
+    """Сводка по ресурсам одной страницы"""
+    parser = AssetParser()
+    parser.feed(html)
+    summary = {
+        'requests': len(parser.assets),
+        'render_blocking': sum(blocking for _, blocking in parser.assets),
+        'external_requests': 0,
+        'local_bytes': 0,
+        'local_gzip_bytes': 0,
+    }
+    if brotli is not None:
+        summary['local_brotli_bytes'] = 0
+    origins = set()
+    for url, _ in parser.assets:
+        parts = urlsplit(url)
+        if parts.netloc:
+            summary['external_requests'] += 1
+            origins.add(parts.netloc)
+            continue
+        content = local_file(parts.path)
+        if content is None:
+            raise RuntimeError(f'{url}: файл не найден в static/')
+        summary['local_bytes'] += len(content)
+        summary['local_gzip_bytes'] += len(gzip.compress(content, compresslevel=9))
+        if brotli is not None:
+            summary['local_brotli_bytes'] += len(brotli.compress(content))
+    summary['third_party_origins'] = len(origins)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='Файл JSON с результатами (по умолчанию benchmarks/results/)')
+    args = parser.parse_args()
+    settings.DEBUG = False
+
+    with test_database():
+        created = datagen.generate(routes=20, users=5, reviews=20, favorites=5, points=20)
+        client = Client(SERVER_NAME='localhost')
+        pages = {
+            'page_home': reverse('home'),
+            'page_hike_detail': reverse('hike_detail', args=[created['route_ids'][0]]),
+            'page_about': reverse('about'),
+        }
+        results = {}
+        for name, url in pages.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url}: ответ {response.status_code}')
+            results[name] = page_weight(response.content.decode('utf-8'))
+        output = args.output or default_output('page_weight')
+        write_results(output, 'page_weight', {}, results)
+
+    for name, summary in results.items():
+        print(f'  {name}: ' + ', '.join(f'{key} {value}' for key, value in summary.items()))
+    print(f'\nРезультаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Чтение каталога при одновременной записи в SQLite: стандартный бэкенд
+против профиля DB_SQLITE_TUNING=1 (WAL, synchronous=NORMAL, BEGIN IMMEDIATE).
+
+Для каждого профиля создаётся своя временная база-файл (migrate + datagen),
+затем --readers потоков запрашивают главную страницу через тестовый клиент
+Django (кэш отключён), а --writers потоков в это же время переключают
+избранное и меняют отзывы. Отчёт - p50/p95/p99, пропускная способность
+и число ошибок ("database is locked") для чтения и записи.
+
+Настройки базы читаются при запуске Django, поэтому каждый профиль
+работает в отдельном процессе. Запуск из корня проекта:
+    python benchmarks/sqlite_concurrency.py
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 4 --duration 20 --routes 2000
+Потоки делят один GIL, так что абсолютные числа ниже, чем у нескольких
+процессов gunicorn, но ожидание блокировок и ошибки видны так же.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from common import default_output, print_table, setup_django, summarize, write_results
+
+PROFILES = {
+    'default': '',
+    'tuned': '1',
+}
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Load:
+    """Потоки чтения и записи с общим сроком и собранными замерами"""
+
+    def __init__(self, route_ids, user_ids, deadline):
+        self.route_ids = route_ids
+        self.user_ids = user_ids
+        self.deadline = deadline
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, kind, elapsed, ok):
+        with self.lock:
+            if ok:
+                self.timings[kind].append(elapsed)
+            else:
+                self.errors[kind] += 1
+
+    def measure(self, kind, func):
+        from django.db import OperationalError
+
+        start = time.perf_counter()
+        try:
+            func()
+            ok = True
+        except OperationalError:
+            ok = False
+        self.record(kind, (time.perf_counter() - start) * 1000, ok)
+
+    def reader(self, number, start_barrier):
+        from django.db import connections
+        from django.test import Client
+        from django.urls import reverse
+
+        rng = random.Random(number)
+        client = Client(SERVER_NAME='localhost')
+        home = reverse('home')
+        urls = [home, f'{home}?sort=score', f'{home}?difficulty=easy', f'{home}?difficulty=hard']
+
+        def read():
+            response = client.get(rng.choice(urls))
+            if response.status_code != 200:
+                raise RuntimeError(f'Главная страница: ответ {response.status_code}')
+
+        start_barrier.wait()
+        try:
+            while time.monotonic() < self.deadline:
+                self.measure('home', read)
+        finally:
+            connections.close_all()
+
+    def writer(self, number, start_barrier):
+        from django.contrib.auth.models import User
+        from django.db import connections
+
+        from hikes.favorites import set_favorite
+        from hikes.models import Review
+
+        rng = random.Random(1000 + number)
+        users = list(User.objects.filter(pk__in=self.user_ids))
+
+        def write():
+            user = rng.choice(users)
+            route_id = rng.choice(self.route_ids)
+            if rng.random() < 0.5:
+                set_favorite(route_id, user)
+            else:
+                Review.objects.update_or_create(
+                    route_id=route_id, user=user, defaults={'rating': rng.randint(1, 5)}
+                )
+
+        start_barrier.wait()
+        try:
+            while time.monotonic() < self.deadline:
+                self.measure('write', write)
+        finally:
+            connections.close_all()
+
+
+def run_profile(args):
+    """Прогон одного профиля (в дочернем процессе): результаты в args.child_output"""
+    directory = tempfile.mkdtemp(prefix='hikeweather-sqlite-')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "bench.sqlite3")}'
+    os.environ['DB_SQLITE_TUNING'] = PROFILES[args.profile]
+    setup_django()
+
+    import datagen
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test.utils import override_settings
+
+    settings.DEBUG = False
+    try:
+        call_command('migrate', verbosity=0)
+        created = datagen.generate(
+            routes=args.routes, users=args.users, reviews=args.reviews,
+            favorites=args.favorites, points=args.points, seed=args.seed,
+        )
+        journal_mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+        connections.close_all()
+
+        with override_settings(CACHES=DUMMY_CACHES):
+            threads_count = args.readers + args.writers
+            start_barrier = threading.Barrier(threads_count + 1)
+            load = Load(created['route_ids'], created['user_ids'], deadline=0)
+            threads = [
+                threading.Thread(target=load.reader, args=(i, start_barrier)) for i in range(args.readers)
+            ] + [
+                threading.Thread(target=load.writer, args=(i, start_barrier)) for i in range(args.writers)
+            ]
+            for thread in threads:
+                thread.start()
+            load.deadline = time.monotonic() + args.duration
+            start_barrier.wait()
+            for thread in threads:
+                thread.join()
+
+        results = {}
+        for kind in ('home', 'write'):
+            results[f'{args.profile}_{kind}'] = dict(
+                summarize(load.timings[kind]),
+                errors=load.errors[kind],
+                throughput_rps=round(len(load.timings[kind]) / args.duration, 2),
+            )
+        results[f'{args.profile}_home']['journal_mode'] = journal_mode
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    with open(args.child_output, 'w', encoding='utf-8') as file:
+        json.dump(results, file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4, help='Потоков, читающих главную страницу')
+    parser.add_argument('--writers', type=int, default=2, help='Потоков, пишущих избранное и отзывы')
+    parser.add_argument('--duration', type=float, default=10, help='Длительность замера (секунды)')
+    parser.add_argument('--routes', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--favorites', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Профили через запятую: default,tuned')
+    parser.add_argument('--output', help='Файл JSON с результатами (по умолчанию benchmarks/results/)')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    results = {}
+    for profile in args.profiles.split(','):
+        if profile not in PROFILES:
+            parser.error(f'Неизвестный профиль {profile}, есть: {", ".join(PROFILES)}')
+        print(f'Профиль {profile}: {args.readers} читающих и {args.writers} пишущих потоков, {args.duration:g} с')
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as file:
+            child_output = file.name
+        try:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:],
+                 '--profile', profile, '--child-output', child_output],
+                check=True,
+            )
+            with open(child_output, encoding='utf-8') as file:
+                results.update(json.load(file))
+        finally:
+            os.remove(child_output)
+
+    setup_django()
+    params = {key: value for key, value in vars(args).items()
+              if key not in ('output', 'profile', 'child_output')}
+    output = args.output or default_output('sqlite')
+    write_results(output, 'sqlite', params, results)
+
+    print_table(results)
+    for name, summary in results.items():
+        print(f'  {name}: {summary["throughput_rps"]} оп/с, ошибок {summary["errors"]}')
+    print(f'\nРезультаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
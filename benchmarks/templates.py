@@ -0,0 +1,97 @@
+"""
+Отрисовка шаблонов: загрузка с кэширующим загрузчиком и без него,
+список из 9 карточек маршрутов (страница каталога) и из 100.
+
+- template_load_*: get_template('hikes/home.html') - разбор файла заново
+  (без кэширующего загрузчика) и из кэша загрузчика;
+- cards_N_cold: карточки {% route_card %} при пустой запомненной разметке
+  (каждая карточка и звёзды рендерятся по шаблону);
+- cards_N_memo: те же карточки повторно - готовые строки из памяти.
+
+Данные генерирует benchmarks/datagen.py в тестовой базе, которая
+удаляется после прогона. Запуск из корня проекта:
+    python benchmarks/templates.py
+    python benchmarks/templates.py --repeat 500 --output after.json
+"""
+import argparse
+import time
+
+from common import default_output, print_table, setup_django, summarize, test_database, write_results
+
+setup_django()
+
+import datagen  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.template import Engine, engines  # noqa: E402
+
+from hikes.models import HikeRoute  # noqa: E402
+from hikes.templatetags import hike_tags  # noqa: E402
+
+CARD_SIZES = (9, 100)
+CARDS_TEMPLATE = (
+    '{% load hike_tags %}<div class="row">{% for hike in hikes %}{% route_card hike %}{% endfor %}</div>'
+)
+
+
+def measure(func, repeat, before=None):
+    """Время одного вызова func в миллисекундах; before - перед каждым вызовом, вне замера"""
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def load_benchmarks(repeat):
+    engine = engines.all()[0].engine
+    uncached = Engine(
+        dirs=engine.dirs, loaders=settings.TEMPLATE_LOADERS, libraries=engine.libraries, builtins=engine.builtins,
+    )
+    engine.get_template('hikes/home.html')
+    return {
+        'template_load_home_uncached': measure(lambda: uncached.get_template('hikes/home.html'), repeat),
+        'template_load_home_cached': measure(lambda: engine.get_template('hikes/home.html'), repeat),
+    }
+
+
+def card_benchmarks(routes, repeat):
+    template = engines.all()[0].from_string(CARDS_TEMPLATE)
+    results = {}
+    for size in CARD_SIZES:
+        context = {'hikes': routes[:size]}
+
+        def render():
+            return template.render(context)
+
+        results[f'cards_{size}_cold'] = measure(render, repeat, before=hike_tags.clear_rendered)
+        render()
+        results[f'cards_{size}_memo'] = measure(render, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='Повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Файл JSON с результатами (по умолчанию benchmarks/results/)')
+    args = parser.parse_args()
+    settings.DEBUG = False
+
+    with test_database():
+        datagen.generate(routes=max(CARD_SIZES), users=20, reviews=500, favorites=50, points=50, seed=args.seed)
+        routes = list(HikeRoute.objects.order_by('-created_at', '-id')[:max(CARD_SIZES)])
+        results = load_benchmarks(args.repeat)
+        results.update(card_benchmarks(routes, args.repeat))
+        params = {key: value for key, value in vars(args).items() if key != 'output'}
+        output = args.output or default_output('templates')
+        write_results(output, 'templates', params, results)
+
+    print_table(results)
+    print(f'\nРезультаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Шаблоны главной и страницы маршрута - до первого запроса
+from hikes.template_backend import preload_templates  # noqa: E402
+
+preload_templates()
@@ -0,0 +1,24 @@
+"""
+Настройки проекта: base.py - общие, dev.py - для разработки (по умолчанию),
+prod.py - для сервера. Окружение выбирает переменная DJANGO_ENV (dev или prod);
+переменные окружения можно держать в файле .env в корне проекта
+(образец - .env.example), заданные в самом окружении важнее.
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent.parent / '.env')
+
+ENVIRONMENTS = ('dev', 'prod')
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+if DJANGO_ENV not in ENVIRONMENTS:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(f'DJANGO_ENV={DJANGO_ENV!r}, ожидается одно из: {", ".join(ENVIRONMENTS)}')
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: E402,F401,F403
+else:
+    from .dev import *  # noqa: E402,F401,F403
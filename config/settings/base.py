@@ -0,0 +1,240 @@
+"""
+Общие настройки для всех окружений (dev.py и prod.py дополняют их).
+Значения по умолчанию - безопасные для сервера; почти всё можно
+переопределить переменными окружения или файлом .env.
+"""
+
+import os
+from pathlib import Path
+
+from ..databases import get_databases
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env_flag(name, default):
+    """Флаг из переменной окружения: '1' - включено, любое другое значение - выключено"""
+    return os.environ.get(name, '1' if default else '') == '1'
+
+
+def env_list(name, default):
+    """Список из переменной окружения через запятую"""
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+
+# Базы данных из DATABASE_URL и DATABASE_REPLICA_URL, постоянные соединения
+# (DB_CONN_MAX_AGE) - см. config/databases.py
+DATABASES = get_databases(os.environ, BASE_DIR)
+# Чтения каталога - с реплики, если она настроена
+DATABASE_ROUTERS = ['hikes.db_routers.ReplicaRouter']
+
+# SECRET_KEY задают dev.py и prod.py: на сервере он обязателен
+
+DEBUG = False
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', 'project-zzo7.onrender.com,localhost,127.0.0.1')
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'hikes',
+]
+
+MIDDLEWARE = [
+    # Первым - чтобы время ответа включало остальные middleware
+    'hikes.middleware.PerformanceMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    # Статика без отдельного веб-сервера: сжатые копии и долгий Cache-Control для файлов с хэшем
+    'hikes.middleware.StaticFilesMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls'
+
+# Шаблоны разбираются один раз на процесс (кэширующий загрузчик; runserver сам
+# сбрасывает кэш при изменении файлов шаблонов). TEMPLATE_CACHE=0 - читать шаблоны
+# заново при каждой отрисовке, например под gunicorn --reload
+TEMPLATE_CACHE = env_flag('TEMPLATE_CACHE', True)
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES = [
+    {
+        'BACKEND': 'hikes.template_backend.TimedDjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)] if TEMPLATE_CACHE
+                else TEMPLATE_LOADERS
+            ),
+        },
+    },
+]
+# Самые нагруженные шаблоны компилируются при запуске процесса (config/wsgi.py и asgi.py),
+# а не на первом запросе
+TEMPLATE_PRELOAD = [
+    'hikes/home.html',
+    'hikes/hike_detail.html',
+    'hikes/includes/route_card.html',
+    'hikes/includes/star_rating.html',
+]
+
+WSGI_APPLICATION = 'config.wsgi.application'
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
+]
+
+LANGUAGE_CODE = 'ru-ru'
+TIME_ZONE = 'Europe/Moscow'
+USE_I18N = True
+USE_TZ = True
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic с хэшами содержимого в именах и копиями .gz/.br (brotli - если установлен).
+# Нужен собранный STATIC_ROOT (в dev.py по умолчанию выключено)
+STATIC_MANIFEST = env_flag('STATIC_MANIFEST', True)
+
+
+def storages(static_manifest):
+    """STORAGES: хранилище статики с хэшами и сжатием или без"""
+    return {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {
+            'BACKEND': (
+                'whitenoise.storage.CompressedManifestStaticFilesStorage' if static_manifest
+                else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+            ),
+        },
+    }
+
+
+STORAGES = storages(STATIC_MANIFEST)
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGIN_REDIRECT_URL = 'home'
+LOGOUT_REDIRECT_URL = 'home'
+LOGIN_URL = 'login'  
+
+# Кэш условий на маршрутах (RouteCheck), в секундах
+CONDITIONS_CACHE_TTL = int(os.environ.get('CONDITIONS_CACHE_TTL', 15 * 60))
+# Сколько ещё отдавать устаревшую проверку, обновляя её в фоне
+CONDITIONS_STALE_TTL = int(os.environ.get('CONDITIONS_STALE_TTL', 60 * 60))
+CONDITIONS_REVALIDATE_IN_BACKGROUND = True
+CONDITIONS_REVALIDATE_WORKERS = 2
+# Общий срок (секунды) на погоду и парковку при открытии страницы маршрута;
+# не уложились - показываем последнюю сохранённую проверку
+CONDITIONS_FETCH_TIMEOUT = float(os.environ.get('CONDITIONS_FETCH_TIMEOUT', 5))
+CONDITIONS_FETCH_WORKERS = 16
+# Веб-приложение читает только проверки, подготовленные refresh_conditions
+CONDITIONS_READ_ONLY = env_flag('CONDITIONS_READ_ONLY', False)
+
+# Лимиты запросов к провайдерам для refresh_conditions (запросов в секунду, 0 - без лимита)
+WEATHER_RATE_LIMIT = float(os.environ.get('WEATHER_RATE_LIMIT', 0))
+PARKING_RATE_LIMIT = float(os.environ.get('PARKING_RATE_LIMIT', 0))
+
+# Размер ячейки сетки (градусы): одна погодная выборка на все маршруты ячейки
+WEATHER_GRID_RESOLUTION = float(os.environ.get('WEATHER_GRID_RESOLUTION', 0.05))
+
+# Хранилище почасовых прогнозов по ячейкам сетки: сколько последних выпусков
+# держать для ячейки и срок хранения выпуска (часы)
+FORECAST_RUNS_KEPT = int(os.environ.get('FORECAST_RUNS_KEPT', 3))
+FORECAST_RETENTION_HOURS = int(os.environ.get('FORECAST_RETENTION_HOURS', 48))
+
+# Хранение истории проверок (compact_route_checks): сами проверки и сводки
+# по часам (дни); сводки по дням хранятся бессрочно
+ROUTE_CHECK_RAW_DAYS = int(os.environ.get('ROUTE_CHECK_RAW_DAYS', 7))
+ROUTE_CHECK_HOURLY_DAYS = int(os.environ.get('ROUTE_CHECK_HOURLY_DAYS', 90))
+
+# Провайдер погоды: 'demo' (случайные данные) или 'openweathermap' (One Call API 3.0)
+WEATHER_PROVIDER = os.environ.get('WEATHER_PROVIDER', 'demo')
+OPENWEATHERMAP_API_KEY = os.environ.get('OPENWEATHERMAP_API_KEY', '')
+OPENWEATHERMAP_URL = os.environ.get('OPENWEATHERMAP_URL', 'https://api.openweathermap.org')
+OPENWEATHERMAP_CONNECT_TIMEOUT = float(os.environ.get('OPENWEATHERMAP_CONNECT_TIMEOUT', 3.05))
+OPENWEATHERMAP_READ_TIMEOUT = float(os.environ.get('OPENWEATHERMAP_READ_TIMEOUT', 10))
+# Размер пула keep-alive соединений; стоит держать не меньше числа потоков refresh_conditions
+OPENWEATHERMAP_POOL_SIZE = int(os.environ.get('OPENWEATHERMAP_POOL_SIZE', 10))
+OPENWEATHERMAP_RETRIES = int(os.environ.get('OPENWEATHERMAP_RETRIES', 2))
+
+# Веса общего балла маршрута (погода, парковка, сложность)
+ROUTE_SCORE_WEIGHTS = {
+    'weather': 0.5,
+    'parking': 0.3,
+    'difficulty': 0.2,
+}
+
+# Рекомендации: веса слагаемых итогового балла и время жизни кэшей (секунды)
+RECOMMENDATIONS_WEIGHTS = {
+    'conditions': 0.45,
+    'rating': 0.3,
+    'preference': 0.15,
+    'distance': 0.1,
+}
+RECOMMENDATIONS_RATING_PRIOR = 5
+RECOMMENDATIONS_DISTANCE_SCALE_KM = 50
+RECOMMENDATIONS_VECTORS_TTL = 300
+RECOMMENDATIONS_CACHE_TTL = 300
+
+# Кэш: locmem (на процесс, по умолчанию), file (общий для процессов одной машины,
+# по умолчанию в prod.py)
+# или redis (общий для всех серверов, нужен пакет redis)
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'hikeweather'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+
+def caches(backend):
+    """CACHES для бэкенда из CACHE_BACKENDS; адрес можно переопределить CACHE_LOCATION"""
+    return {
+        'default': {
+            'BACKEND': CACHE_BACKENDS[backend][0],
+            'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[backend][1]),
+            'KEY_PREFIX': 'hikeweather',
+            'TIMEOUT': 300,
+        }
+    }
+
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = caches(CACHE_BACKEND)
+
+# Кэш страниц каталога для анонимных пользователей и фрагментов шаблонов (секунды)
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 60))
+# Счётчики страницы "О проекте"; между пересчётами меняются сигналами
+STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 60 * 60))
+
+# Метрики производительности (/metrics в формате Prometheus)
+METRICS_ENABLED = env_flag('METRICS_ENABLED', True)
+# С каких адресов доступен /metrics (через запятую; пусто - с любых)
+METRICS_ALLOWED_IPS = env_list('METRICS_ALLOWED_IPS', '127.0.0.1,::1')
+# Заголовок Server-Timing с временем в БД, шаблонах и у провайдеров
+PERF_SERVER_TIMING = env_flag('PERF_SERVER_TIMING', False)
+# Выборочный cProfile: доля профилируемых запросов (0 - выключено) и порог "медленного" запроса
+PERF_PROFILE_SAMPLE_RATE = float(os.environ.get('PERF_PROFILE_SAMPLE_RATE', 0))
+PERF_PROFILE_SLOW_MS = float(os.environ.get('PERF_PROFILE_SLOW_MS', 500))
+PERF_PROFILE_DIR = os.environ.get('PERF_PROFILE_DIR', str(BASE_DIR / 'profiles'))
@@ -0,0 +1,15 @@
+"""Разработка: DEBUG, статика без collectstatic, Server-Timing в ответах"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import env_flag, storages
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-development-key-change-in-production')
+
+DEBUG = env_flag('DJANGO_DEBUG', True)
+INTERNAL_IPS = ['127.0.0.1', '::1']
+
+STATIC_MANIFEST = env_flag('STATIC_MANIFEST', False)
+STORAGES = storages(STATIC_MANIFEST)
+
+PERF_SERVER_TIMING = env_flag('PERF_SERVER_TIMING', True)
@@ -0,0 +1,34 @@
+"""
+Сервер: без DEBUG (Django не копит SQL-запросы каждого запроса в памяти),
+постоянные соединения с базой, общий для процессов кэш, сессии в кэше,
+сжатие ответов и условные GET. Проверка - manage.py check --deploy
+(предупреждения hikes.W0xx - hikes/checks.py).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import MIDDLEWARE, caches, env_flag
+
+# Ключ по умолчанию из dev.py опубликован в репозитории - на сервере он не подходит
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('DJANGO_SECRET_KEY не задан: без него сервер не запускается.')
+
+DEBUG = env_flag('DJANGO_DEBUG', False)
+
+# Кэш страниц и счётчиков должен быть общим для всех процессов gunicorn
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHES = caches(CACHE_BACKEND)
+
+# Сессия читается из кэша, в базу - только при записи и промахе кэша
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# GZip - после WhiteNoise (статику он сжимает заранее), ConditionalGet - после GZip,
+# чтобы ETag считался по несжатому ответу
+_static = MIDDLEWARE.index('hikes.middleware.StaticFilesMiddleware')
+MIDDLEWARE = MIDDLEWARE[:_static + 1] + [
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+] + MIDDLEWARE[_static + 1:]
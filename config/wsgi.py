@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны главной и страницы маршрута - до первого запроса
+from hikes.template_backend import preload_templates  # noqa: E402
+
+preload_templates()
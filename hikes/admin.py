@@ -1,13 +1,15 @@
 from django.contrib import admin
-from .models import HikeRoute, PointOfInterest, Review, RouteCheck
+from .models import CellForecast, HikeRoute, PointOfInterest, Review, RouteCheck, RouteCheckAggregate
 
 
 @admin.register(HikeRoute)
 class HikeRouteAdmin(admin.ModelAdmin):
-    list_display = ('title', 'difficulty', 'length_km', 'author', 'created_at')
+    list_display = ('title', 'difficulty', 'length_km', 'author', 'current_score',
+                    'rating_count', 'favorites_count', 'created_at')
     list_filter = ('difficulty', 'created_at')
     search_fields = ('title', 'description')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'current_score',
+                       'rating_sum', 'rating_count', 'favorites_count')
     fieldsets = (
         ('Основная информация', {
             'fields': ('title', 'description', 'author')
@@ -19,6 +21,9 @@ class HikeRouteAdmin(admin.ModelAdmin):
             'fields': ('start_point_lat', 'start_point_lon', 
                       'finish_point_lat', 'finish_point_lon')
         }),
+        ('Статистика', {
+            'fields': ('current_score', 'rating_sum', 'rating_count', 'favorites_count')
+        }),
         ('Даты', {
             'fields': ('created_at', 'updated_at')
         }),
@@ -46,3 +51,18 @@ class RouteCheckAdmin(admin.ModelAdmin):
                    'weather_temp', 'parking_status', 'overall_score')
     list_filter = ('parking_status', 'check_date')
     readonly_fields = ('check_date',)
+
+
+@admin.register(RouteCheckAggregate)
+class RouteCheckAggregateAdmin(admin.ModelAdmin):
+    list_display = ('route', 'period', 'period_start', 'checks_count',
+                    'score_avg', 'temperature_avg', 'precipitation_avg')
+    list_filter = ('period',)
+    raw_id_fields = ('route',)
+
+
+@admin.register(CellForecast)
+class CellForecastAdmin(admin.ModelAdmin):
+    list_display = ('cell_key', 'run_at', 'start', 'utc_offset')
+    search_fields = ('cell_key',)
+    date_hierarchy = 'run_at'
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class HikesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hikes'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks, metrics, signals  # noqa: F401
+        connection_created.connect(metrics.connection_opened, dispatch_uid='hikeweather_db_connections')
@@ -0,0 +1,48 @@
+"""
+Бэкенд SQLite с настройками для однонодовой установки (DB_SQLITE_TUNING=1).
+
+Отличия от django.db.backends.sqlite3:
+- при открытии соединения выполняются PRAGMA из OPTIONS['pragmas']
+  (по умолчанию DEFAULT_PRAGMAS): журнал WAL - чтения не ждут записи,
+  synchronous=NORMAL - без fsync на каждую транзакцию (в WAL это безопасно
+  для целостности базы), mmap, кэш страниц и ожидание блокировки;
+- transaction.atomic() начинается с BEGIN IMMEDIATE (OPTIONS
+  ['transaction_mode']): блокировка записи берётся сразу, а не при первой
+  записи внутри транзакции. Иначе две транзакции "прочитать, потом
+  записать" (toggle_favorite, отзыв) сталкиваются при повышении блокировки
+  и одна из них сразу падает с "database is locked", не дожидаясь
+  busy_timeout.
+"""
+from django.db.backends.sqlite3 import base
+
+# Значения по умолчанию; переопределяются через OPTIONS['pragmas']
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - в КиБ: 64 МиБ кэша страниц на соединение
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE')
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
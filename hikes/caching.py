@@ -0,0 +1,201 @@
+"""
+Кэширование страниц каталога и счётчиков сайта.
+
+Сброс кэша адресный: у каждой области данных (scope) есть версия в кэше,
+а закэшированная страница или фрагмент помнит версии областей, от которых
+зависит. Изменение поднимает версии только затронутых областей:
+- ROUTES - состав каталога и поля маршрутов (создание, правка, удаление);
+- SCORES - порядок по баллу пригодности (сортировка score, рекомендации);
+- RATINGS - порядок по рейтингу (рекомендации);
+- STATS - счётчики страницы "О проекте";
+- route_scope(id) - карточка одного маршрута (балл, рейтинг, число отзывов);
+- favorites_scope(user_id) - избранное одного пользователя.
+Например, отзыв сбрасывает страницы, где показана карточка его маршрута,
+и рекомендации, а избранное - только число маршрутов в избранном
+пользователя. Перебирать ключи не нужно: устаревшие записи перестают
+читаться и истекают по таймауту.
+
+Полные страницы кэшируются только для анонимных GET-запросов: страница
+авторизованного пользователя содержит его меню и кнопки. Для них
+кэшируется фрагмент со списком маршрутов (тег {% cache %} в шаблоне).
+
+Счётчики страницы "О проекте" хранятся в кэше и меняются инкрементами
+из сигналов, а COUNT(*) выполняется только при промахе.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .metrics import record_cache
+from .models import HikeRoute, PointOfInterest, Review
+
+VERSION_KEY_PREFIX = 'catalog:version:'
+STATS_KEY_PREFIX = 'stats:'
+
+# Счётчики страницы "О проекте"
+SITE_STATS = {
+    'total_hikes': HikeRoute,
+    'total_points': PointOfInterest,
+    'total_reviews': Review,
+}
+
+# Области данных каталога (см. описание модуля)
+ROUTES = 'routes'
+SCORES = 'scores'
+RATINGS = 'ratings'
+STATS = 'stats'
+GLOBAL_SCOPES = (ROUTES, SCORES, RATINGS, STATS)
+
+
+def get_page_cache_ttl():
+    """Время жизни закэшированной страницы (секунды)"""
+    return getattr(settings, 'PAGE_CACHE_TTL', 60)
+
+
+def get_stats_cache_ttl():
+    """Время жизни счётчиков сайта (секунды)"""
+    return getattr(settings, 'STATS_CACHE_TTL', 60 * 60)
+
+
+def route_scope(route_id):
+    """Область карточки маршрута"""
+    return f'route:{route_id}'
+
+
+def favorites_scope(user_id):
+    """Область избранного пользователя"""
+    return f'favorites:{user_id}'
+
+
+def get_versions(scopes):
+    """Текущие версии областей (кортеж в порядке scopes); недостающие создаются"""
+    keys = [VERSION_KEY_PREFIX + scope for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        # Ключа нет (кэш очищен или вытеснен) - начинаем с новой версии
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def get_version_digest(scopes):
+    """Короткий отпечаток версий областей - часть ключей счётчиков и фрагментов"""
+    return hashlib.md5(':'.join(get_versions(scopes)).encode()).hexdigest()
+
+
+def invalidate(*scopes):
+    """Делает недействительными закэшированные страницы и фрагменты, зависящие от scopes"""
+    if scopes:
+        cache.set_many({VERSION_KEY_PREFIX + scope: uuid.uuid4().hex for scope in scopes}, None)
+
+
+def invalidate_catalog():
+    """Сбрасывает весь каталог (массовые изменения: генерация данных, пересчёт счётчиков)"""
+    invalidate(*GLOBAL_SCOPES)
+
+
+def invalidate_scores(route_ids):
+    """Баллы маршрутов изменились: их карточки и порядок по баллу"""
+    route_ids = list(route_ids)
+    if route_ids:
+        invalidate(SCORES, *(route_scope(route_id) for route_id in route_ids))
+
+
+def depends_on(response, scopes):
+    """Области, от которых зависит ответ view (для cache_anonymous_page)"""
+    response.cache_scopes = tuple(scopes)
+    return response
+
+
+def page_cache_key(request, view_name):
+    """Ключ страницы: view и отсортированные GET-параметры"""
+    params = '&'.join(
+        f'{key}={value}' for key, values in sorted(request.GET.lists()) for value in values
+    )
+    digest = hashlib.md5(params.encode()).hexdigest()
+    return f'page:{view_name}:{digest}'
+
+
+def cached_count(queryset, scopes=(ROUTES,)):
+    """COUNT(*) запроса, закэшированный до изменения областей scopes"""
+    digest = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    key = f'count:{get_version_digest(scopes)}:{digest}'
+    return cache.get_or_set(key, queryset.count, get_page_cache_ttl())
+
+
+def is_cacheable_request(request):
+    """Кэшируем только GET/HEAD анонимных пользователей без ожидающих сообщений"""
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # len() не помечает сообщения прочитанными
+        and not len(get_messages(request))
+    )
+
+
+def cache_anonymous_page(view):
+    """
+    Декоратор: отдаёт анонимным пользователям страницу из кэша.
+    Кэшируются только ответы 200. Области, от которых зависит страница,
+    view указывает через depends_on (по умолчанию - ROUTES); страница
+    читается из кэша, пока их версии не изменились.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key = page_cache_key(request, view.__name__)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type, scopes, versions = cached
+            if get_versions(scopes) != versions:
+                cached = None
+        record_cache('page', cached is not None)
+        if cached is not None:
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                scopes = getattr(response, 'cache_scopes', (ROUTES,))
+                # Изменение во время работы view может попасть в кэш не дольше чем на PAGE_CACHE_TTL
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type'], scopes, get_versions(scopes)),
+                    get_page_cache_ttl()
+                )
+        # Для авторизованных та же страница выглядит иначе
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
+
+
+def get_site_stats():
+    """Счётчики объектов для страницы "О проекте" (SITE_STATS)"""
+    keys = {name: STATS_KEY_PREFIX + name for name in SITE_STATS}
+    cached = cache.get_many(keys.values())
+    stats = {}
+    for name, model in SITE_STATS.items():
+        value = cached.get(keys[name])
+        record_cache('site_stats', value is not None)
+        if value is None:
+            value = model.objects.count()
+            cache.set(keys[name], value, get_stats_cache_ttl())
+        stats[name] = value
+    return stats
+
+
+def adjust_stat(name, delta):
+    """Атомарно меняет закэшированный счётчик; если его нет - пересчитается при чтении"""
+    try:
+        cache.incr(STATS_KEY_PREFIX + name, delta)
+    except ValueError:
+        pass
@@ -0,0 +1,143 @@
+"""
+Проверки настроек, от которых зависит производительность на сервере.
+Запускаются вместе с проверками безопасности:
+    DJANGO_ENV=prod python manage.py check --deploy
+    DJANGO_ENV=prod python manage.py check --deploy --tag performance
+"""
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.checks import Warning, register
+from django.utils.module_loading import import_string
+
+from .static_assets import ASSETS
+from .templatetags.assets import is_vendored
+
+TAG = 'performance'
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+DB_SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+RESPONSE_MIDDLEWARE = (
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+)
+# Доля запросов под cProfile, выше которой профилирование заметно замедляет сервер
+MAX_PROFILE_SAMPLE_RATE = 0.05
+
+
+@register(TAG, deploy=True)
+def check_debug(app_configs, **kwargs):
+    if not settings.DEBUG:
+        return []
+    return [Warning(
+        'DEBUG включён: Django хранит в памяти каждый SQL-запрос обработанного запроса.',
+        hint='DJANGO_ENV=prod (или DJANGO_DEBUG=0).',
+        id='hikes.W001',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    aliases = [alias for alias, config in settings.DATABASES.items() if not config.get('CONN_MAX_AGE')]
+    if not aliases:
+        return []
+    return [Warning(
+        f'Соединение с базой ({", ".join(aliases)}) открывается заново на каждый запрос.',
+        hint='DB_CONN_MAX_AGE=600 (см. config/databases.py).',
+        id='hikes.W002',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'Кэш {backend} у каждого процесса свой: кэш страниц и сброс его после изменений '
+        'не работают между процессами gunicorn.',
+        hint='CACHE_BACKEND=file (один сервер) или CACHE_BACKEND=redis.',
+        id='hikes.W003',
+    )]
+
+
+def _loader_names(loaders):
+    for loader in loaders:
+        yield loader[0] if isinstance(loader, (list, tuple)) else loader
+
+
+@register(TAG, deploy=True)
+def check_template_cache(app_configs, **kwargs):
+    for config in settings.TEMPLATES:
+        loaders = config.get('OPTIONS', {}).get('loaders')
+        # Без явных загрузчиков Django сам оборачивает их в кэширующий
+        if loaders is not None and CACHED_LOADER not in _loader_names(loaders):
+            return [Warning(
+                'Шаблоны разбираются заново при каждой отрисовке.',
+                hint='Уберите TEMPLATE_CACHE=0.',
+                id='hikes.W004',
+            )]
+    return []
+
+
+@register(TAG, deploy=True)
+def check_session_engine(app_configs, **kwargs):
+    if settings.SESSION_ENGINE != DB_SESSION_ENGINE:
+        return []
+    return [Warning(
+        'Сессии читаются из базы на каждый запрос авторизованного пользователя.',
+        hint="SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'.",
+        id='hikes.W005',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_response_middleware(app_configs, **kwargs):
+    missing = [name for name in RESPONSE_MIDDLEWARE if name not in settings.MIDDLEWARE]
+    if not missing:
+        return []
+    return [Warning(
+        f'Нет {", ".join(missing)}: ответы не сжимаются или не отвечают 304 на условные GET.',
+        hint='Добавьте их после StaticFilesMiddleware (как в config/settings/prod.py).',
+        id='hikes.W006',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_static_storage(app_configs, **kwargs):
+    storage = import_string(settings.STORAGES['staticfiles']['BACKEND'])
+    if issubclass(storage, ManifestFilesMixin):
+        return []
+    return [Warning(
+        'Статика без хэшей в именах: браузеры не могут кэшировать её надолго.',
+        hint='STATIC_MANIFEST=1 и collectstatic при сборке.',
+        id='hikes.W007',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_profiling(app_configs, **kwargs):
+    rate = getattr(settings, 'PERF_PROFILE_SAMPLE_RATE', 0)
+    if rate <= MAX_PROFILE_SAMPLE_RATE:
+        return []
+    return [Warning(
+        f'Под cProfile выполняется {rate:.0%} запросов - они обрабатываются в разы медленнее.',
+        hint=f'PERF_PROFILE_SAMPLE_RATE не больше {MAX_PROFILE_SAMPLE_RATE}.',
+        id='hikes.W008',
+    )]
+
+
+@register(TAG, deploy=True)
+def check_vendored_assets(app_configs, **kwargs):
+    missing = sorted(name for name, asset in ASSETS.items() if not is_vendored(asset.path))
+    if not missing:
+        return []
+    return [Warning(
+        f'Нет локальных копий ({", ".join(missing)}): страницы ссылаются на CDN - '
+        'лишние DNS-запросы и соединения на холодной загрузке.',
+        hint='python manage.py vendor_static и закоммитить static/vendor/ вместе с vendor.lock.json.',
+        id='hikes.W009',
+    )]
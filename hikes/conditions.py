@@ -0,0 +1,594 @@
+"""
+Кэш условий на маршруте поверх модели RouteCheck.
+
+Последняя проверка маршрута считается свежей в течение CONDITIONS_CACHE_TTL
+секунд. Устаревшая проверка (не старше CONDITIONS_CACHE_TTL +
+CONDITIONS_STALE_TTL) отдаётся сразу, а пересчёт запускается в фоне
+(stale-while-revalidate). Если проверки нет или она слишком старая,
+условия пересчитываются синхронно.
+
+Страница маршрута использует асинхронный вариант (aget_route_conditions):
+погода и парковка запрашиваются одновременно с общим сроком
+CONDITIONS_FETCH_TIMEOUT, по истечении которого отдаётся последняя проверка.
+
+При CONDITIONS_READ_ONLY = True веб-приложение не обращается к провайдерам
+вовсе и читает только проверки, подготовленные командой refresh_conditions.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import caching, forecasts, geo
+from .metrics import record_cache
+from .models import HikeRoute, RouteCheck
+from .services import WeatherService, ParkingService, RouteAnalyzer
+from .weather_client import WeatherProviderError
+
+logger = logging.getLogger(__name__)
+
+# Статусы ParkingService -> значения RouteCheck.PARKING_STATUS_CHOICES
+PARKING_STATUS_MAP = {
+    'available': 'available',
+    'limited': 'limited',
+    'busy': 'full',
+}
+
+# Условия для маршрута, по которому ещё нет ни одной проверки
+EMPTY_CONDITIONS = {
+    'weather': {},
+    'forecast_run_at': None,
+    'parking': {},
+    'weather_score': None,
+    'overall_score': None,
+    'checked_at': None,
+    'is_stale': False,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_fetch_executor = None
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+# Блокировки ячеек "полосами": ограниченное число замков на любое число ячеек
+_cell_locks = [threading.Lock() for _ in range(64)]
+
+
+def get_cache_ttl():
+    """Время, в течение которого проверка считается свежей"""
+    return timedelta(seconds=getattr(settings, 'CONDITIONS_CACHE_TTL', 15 * 60))
+
+
+def get_stale_ttl():
+    """Сколько ещё можно отдавать устаревшую проверку, пересчитывая её в фоне"""
+    return timedelta(seconds=getattr(settings, 'CONDITIONS_STALE_TTL', 60 * 60))
+
+
+def get_fetch_timeout():
+    """Общий срок (секунды) на запросы к провайдерам при открытии страницы маршрута"""
+    return getattr(settings, 'CONDITIONS_FETCH_TIMEOUT', 5)
+
+
+def is_read_only():
+    """Читает ли веб-приложение только заранее рассчитанные проверки"""
+    return getattr(settings, 'CONDITIONS_READ_ONLY', False)
+
+
+def fetch_cell_weather(cell, limiters=None):
+    """Запрашивает у провайдера погоду для центра ячейки сетки"""
+    limiters = limiters or {}
+    if 'weather' in limiters:
+        limiters['weather'].acquire()
+    return WeatherService.get_weather_data(cell.lat, cell.lon)
+
+
+def get_cell_weather(lat, lon, limiters=None, refresh=False):
+    """
+    Погода для точки, общая для всей её ячейки сетки.
+
+    Ответ провайдера кладётся в кэш Django на CONDITIONS_CACHE_TTL, поэтому
+    все маршруты ячейки обходятся одним запросом. Параллельные запросы одной
+    ячейки внутри процесса ждут первый из них, а не идут к провайдеру сами.
+    refresh=True игнорирует закэшированное значение (пакетное обновление).
+    """
+    cell = geo.grid_cell(lat, lon)
+    key = f'weather:cell:{cell.key}'
+    if not refresh:
+        data = cache.get(key)
+        record_cache('weather_cell', data is not None)
+        if data is not None:
+            return data
+    with _cell_lock(cell.key):
+        data = None if refresh else cache.get(key)
+        if data is None:
+            data = fetch_cell_weather(cell, limiters)
+            cache.set(key, data, int(get_cache_ttl().total_seconds()))
+    return data
+
+
+def compute_conditions(route, limiters=None, weather_data=None):
+    """
+    Запрашивает погоду и парковку и считает общий балл маршрута.
+    limiters - необязательный словарь {'weather': RateLimiter, 'parking': RateLimiter},
+    weather_data - уже полученная погода ячейки маршрута.
+    """
+    limiters = limiters or {}
+    if weather_data is None:
+        weather_data = get_cell_weather(
+            route.start_point_lat,
+            route.start_point_lon,
+            limiters
+        )
+    if 'parking' in limiters:
+        limiters['parking'].acquire()
+    parking_data = ParkingService.get_parking_status(
+        route.start_point_lat,
+        route.start_point_lon
+    )
+    return combine_conditions(route, weather_data, parking_data)
+
+
+def combine_conditions(route, weather_data, parking_data):
+    """Общий балл маршрута по уже полученным погоде и парковке"""
+    return combine_many_conditions([(route, weather_data, parking_data)])[0]
+
+
+def combine_many_conditions(items):
+    """
+    combine_conditions для списка (маршрут, погода, парковка): баллы всех
+    маршрутов считаются одним векторным вызовом (NumPy), а не по одному.
+    """
+    if not items:
+        return []
+    currents = [weather_data['current'] for route, weather_data, parking_data in items]
+    weather_scores = WeatherService.get_weather_quality_scores(
+        [current['precipitation_chance'] for current in currents],
+        [current['wind_speed'] for current in currents],
+        [current['temperature'] for current in currents],
+    )
+    parking_scores = [parking_data['score'] for route, weather_data, parking_data in items]
+    difficulties = [route.difficulty for route, weather_data, parking_data in items]
+    overall_scores = RouteAnalyzer.calculate_overall_scores(weather_scores, parking_scores, difficulties)
+    difficulty_scores = RouteAnalyzer.get_difficulty_scores(difficulties)
+
+    results = []
+    # tolist() - обычные int/float Python: результат сохраняется в JSON проверки
+    for (route, weather_data, parking_data), weather_score, overall, difficulty_score in zip(
+            items, weather_scores.tolist(), overall_scores.tolist(), difficulty_scores.tolist()):
+        results.append({
+            'weather': weather_data['current'],
+            'weather_forecast': weather_data['forecast'],
+            'parking': parking_data,
+            'weather_score': weather_score,
+            'overall_score': {
+                'overall_score': overall,
+                'weather_score': weather_score,
+                'parking_score': parking_data['score'],
+                'difficulty_score': difficulty_score,
+            },
+        })
+    return results
+
+
+async def acompute_conditions(route, timeout=None):
+    """
+    Асинхронный вариант compute_conditions для страницы маршрута.
+
+    Погода и парковка запрашиваются одновременно, поэтому ответ занимает
+    max(погода, парковка), а не их сумму. Клиенты провайдеров синхронные,
+    так что сами запросы идут в пуле потоков, не блокируя цикл событий.
+    Оба запроса укладываются в общий срок timeout (по умолчанию
+    CONDITIONS_FETCH_TIMEOUT), иначе - asyncio.TimeoutError.
+    """
+    if timeout is None:
+        timeout = get_fetch_timeout()
+    loop = asyncio.get_running_loop()
+    executor = _get_fetch_executor()
+    lat, lon = route.start_point_lat, route.start_point_lon
+    # Копия контекста - чтобы обращения к провайдерам попали в метрики запроса
+    weather_data, parking_data = await asyncio.wait_for(
+        asyncio.gather(
+            loop.run_in_executor(executor, contextvars.copy_context().run, get_cell_weather, lat, lon),
+            loop.run_in_executor(
+                executor, contextvars.copy_context().run, ParkingService.get_parking_status, lat, lon
+            ),
+        ),
+        timeout
+    )
+    return combine_conditions(route, weather_data, parking_data)
+
+
+def build_route_check(route, data):
+    """Создаёт (не сохраняя) RouteCheck из результата compute_conditions"""
+    weather = data['weather']
+    return RouteCheck(
+        route=route,
+        weather_summary=weather['description'][:100],
+        weather_temp=weather['temperature'],
+        weather_precipitation=weather['precipitation_chance'],
+        parking_status=PARKING_STATUS_MAP.get(data['parking']['status'], 'unknown'),
+        overall_score=data['overall_score']['overall_score'],
+        details={
+            'weather': weather,
+            # Сам прогноз - в CellForecast, в проверке только его выпуск
+            'forecast_run_at': data['weather_forecast'].get('run_at'),
+            'parking': data['parking'],
+            'weather_score': data['weather_score'],
+            'parking_score': data['overall_score']['parking_score'],
+        },
+    )
+
+
+def conditions_from_check(route, check):
+    """Восстанавливает данные для шаблона из сохранённой проверки"""
+    details = check.details or {}
+    weather_score = details.get('weather_score', 0)
+    parking = details.get('parking', {})
+    overall_score = RouteAnalyzer.calculate_overall_score(
+        route=route,
+        weather_score=weather_score,
+        parking_score=details.get('parking_score', parking.get('score', 0))
+    )
+    # Балл берём из проверки, чтобы страница совпадала с сохранёнными данными
+    overall_score['overall_score'] = check.overall_score
+    return {
+        'weather': details.get('weather', {}),
+        'forecast_run_at': details.get('forecast_run_at'),
+        'parking': parking,
+        'weather_score': weather_score,
+        'overall_score': overall_score,
+        'checked_at': check.check_date,
+        'is_stale': False,
+    }
+
+
+def get_latest_check(route):
+    """Последняя проверка маршрута (по указателю HikeRoute.latest_check) или None"""
+    if route.latest_check_id is None:
+        return None
+    if HikeRoute.latest_check.is_cached(route):
+        # Загружена вместе с маршрутом через select_related('latest_check')
+        return route.latest_check
+    return RouteCheck.objects.filter(pk=route.latest_check_id).first()
+
+
+def get_latest_checks(route_ids):
+    """
+    Последние проверки для набора маршрутов одним запросом.
+    Возвращает словарь {route_id: RouteCheck}; маршрутов без проверок в нём нет.
+    """
+    routes = HikeRoute.objects.filter(
+        pk__in=route_ids,
+        latest_check__isnull=False
+    ).select_related('latest_check').only('id', 'title', 'latest_check')
+    checks = {}
+    for route in routes:
+        check = route.latest_check
+        # Маршрут уже загружен - не запрашиваем его повторно из check.route
+        check.route = route
+        checks[route.pk] = check
+    return checks
+
+
+def mark_latest_checks(checks):
+    """
+    Запоминает новые проверки как последние для их маршрутов
+    (HikeRoute.latest_check и HikeRoute.current_score).
+    Проверка не перезаписывает более новую, сохранённую параллельно.
+    """
+    for check in checks:
+        HikeRoute.objects.filter(pk=check.route_id).filter(
+            Q(latest_check__isnull=True) | Q(latest_check_id__lt=check.pk)
+        ).update(latest_check=check, current_score=check.overall_score)
+
+
+def check_to_dict(check):
+    """Краткое представление проверки для JSON API"""
+    details = check.details or {}
+    weather = details.get('weather', {})
+    parking = details.get('parking', {})
+    return {
+        'overall_score': check.overall_score,
+        'checked_at': check.check_date.isoformat(),
+        'is_stale': timezone.now() - check.check_date > get_cache_ttl(),
+        'weather': {
+            'summary': check.weather_summary,
+            'temperature': check.weather_temp,
+            'precipitation_chance': check.weather_precipitation,
+            'wind_speed': weather.get('wind_speed'),
+            'humidity': weather.get('humidity'),
+            'score': details.get('weather_score'),
+        },
+        'parking': {
+            'status': check.parking_status,
+            'status_text': check.get_parking_status_display(),
+            'score': details.get('parking_score', parking.get('score')),
+        },
+    }
+
+
+def refresh_route_conditions(route):
+    """Пересчитывает условия и сохраняет новую проверку"""
+    return save_route_check(route, compute_conditions(route))
+
+
+def save_route_check(route, data):
+    """Сохраняет результат compute_conditions как последнюю проверку маршрута"""
+    cell = geo.grid_cell(route.start_point_lat, route.start_point_lon)
+    forecasts.store_forecasts({cell.key: data['weather_forecast']})
+    check = build_route_check(route, data)
+    check.save()
+    mark_latest_checks([check])
+    if check.overall_score != route.current_score:
+        # Балл виден в карточке маршрута и задаёт порядок сортировки score
+        transaction.on_commit(lambda: caching.invalidate_scores([route.pk]))
+    # Только указатель: следующий get_latest_check перечитает проверку из базы
+    route.latest_check_id = check.pk
+    route.current_score = check.overall_score
+    return check
+
+
+def refresh_routes(routes, workers=4, limiters=None, weather_by_cell=None, failed_cells=None):
+    """
+    Пересчитывает условия для набора маршрутов пулом потоков и сохраняет
+    проверки одним bulk_create. Погода запрашивается один раз на ячейку
+    сетки, её прогноз сохраняется в CellForecast; weather_by_cell - общий
+    для всего прогона словарь уже полученной погоды по ключу ячейки.
+    Ячейки, погоду которых получить не удалось, в него не попадают (их
+    маршруты следующей порции запросят погоду снова) и добавляются в список
+    failed_cells, если он передан.
+    Потоки только ходят к провайдерам, в базу пишет вызывающий поток.
+    """
+    routes = list(routes)
+    if not routes:
+        return []
+    if weather_by_cell is None:
+        weather_by_cell = {}
+    limiters = limiters or {}
+    groups = geo.group_by_cell(routes)
+    missing = [cell for cell in groups if cell.key not in weather_by_cell]
+
+    def fetch(cell):
+        try:
+            return get_cell_weather(cell.lat, cell.lon, limiters, refresh=True)
+        except Exception:
+            logger.exception('Не удалось получить погоду для ячейки %s', cell.key)
+            return None
+
+    def fetch_parking(item):
+        cell, route = item
+        if weather_by_cell.get(cell.key) is None:
+            return None
+        try:
+            if 'parking' in limiters:
+                limiters['parking'].acquire()
+            return ParkingService.get_parking_status(route.start_point_lat, route.start_point_lon)
+        except Exception:
+            # Ошибка провайдера по одному маршруту не должна срывать всю порцию
+            logger.exception('Не удалось получить условия маршрута %s', route.pk)
+            return None
+
+    items = [(cell, route) for cell, cell_routes in groups.items() for route in cell_routes]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for cell, data in zip(missing, pool.map(fetch, missing)):
+            if data is not None:
+                weather_by_cell[cell.key] = data
+            elif failed_cells is not None:
+                failed_cells.append(cell.key)
+        parking = list(pool.map(fetch_parking, items))
+    forecasts.store_forecasts({
+        cell.key: weather_by_cell[cell.key]['forecast']
+        for cell in missing if cell.key in weather_by_cell
+    })
+    # Потоки только получают данные, баллы всей порции считаются одним векторным вызовом
+    fetched = [
+        (route, weather_by_cell[cell.key], parking_data)
+        for (cell, route), parking_data in zip(items, parking)
+        if parking_data is not None
+    ]
+    checks = [
+        build_route_check(route, data)
+        for (route, weather_data, parking_data), data in zip(fetched, combine_many_conditions(fetched))
+    ]
+    checks = RouteCheck.objects.bulk_create(checks)
+    with transaction.atomic():
+        mark_latest_checks(checks)
+    return checks
+
+
+def refresh_all_routes(chunk_size=200, workers=4, limiters=None, on_chunk=None):
+    """
+    Обходит все маршруты порциями по chunk_size (по возрастанию id)
+    и сохраняет для них новые проверки, затем удаляет устаревшие прогнозы.
+    Возвращает словарь со статистикой: routes, weather_calls (ячейки
+    с полученной погодой), weather_failures (неудачные запросы погоды),
+    seconds, routes_per_second.
+    """
+    started = time.monotonic()
+    total = 0
+    last_id = 0
+    weather_by_cell = {}
+    failed_cells = []
+    changed = []
+    queryset = HikeRoute.objects.order_by('pk').only(
+        'id', 'difficulty', 'start_point_lat', 'start_point_lon', 'current_score'
+    )
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        scores = {route.pk: route.current_score for route in chunk}
+        checks = refresh_routes(chunk, workers=workers, limiters=limiters,
+                                weather_by_cell=weather_by_cell, failed_cells=failed_cells)
+        changed += [check.route_id for check in checks if check.overall_score != scores[check.route_id]]
+        total += len(chunk)
+        last_id = chunk[-1].pk
+        if on_chunk is not None:
+            on_chunk(total, time.monotonic() - started)
+    # Сбрасываем кэш только там, где виден изменившийся балл
+    caching.invalidate_scores(changed)
+    forecasts.prune_forecasts()
+    seconds = time.monotonic() - started
+    return {
+        'routes': total,
+        'weather_calls': len(weather_by_cell),
+        'weather_failures': len(failed_cells),
+        'seconds': seconds,
+        'routes_per_second': total / seconds if seconds else 0.0,
+    }
+
+
+def _cell_lock(key):
+    """Блокировка на ячейку сетки, чтобы не запрашивать её погоду дважды"""
+    return _cell_locks[hash(key) % len(_cell_locks)]
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONDITIONS_REVALIDATE_WORKERS', 2),
+                thread_name_prefix='conditions-revalidate'
+            )
+        return _executor
+
+
+def _get_fetch_executor():
+    """
+    Пул для запросов к провайдерам из acompute_conditions. Свой, а не пул
+    цикла событий по умолчанию: при запуске через async_to_sync (WSGI)
+    закрытие цикла ждало бы зависший запрос и срывало общий срок.
+    """
+    global _fetch_executor
+    with _executor_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONDITIONS_FETCH_WORKERS', 16),
+                thread_name_prefix='conditions-fetch'
+            )
+        return _fetch_executor
+
+
+def _revalidate(route_id):
+    close_old_connections()
+    try:
+        route = HikeRoute.objects.filter(pk=route_id).first()
+        if route is not None:
+            refresh_route_conditions(route)
+    except Exception:
+        logger.exception('Не удалось обновить условия маршрута %s', route_id)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(route_id)
+        close_old_connections()
+
+
+def schedule_revalidation(route):
+    """
+    Ставит пересчёт условий маршрута в фоновую очередь.
+    Одновременно для маршрута выполняется не больше одного пересчёта.
+    """
+    with _in_flight_lock:
+        if route.pk in _in_flight:
+            return False
+        _in_flight.add(route.pk)
+    _get_executor().submit(_revalidate, route.pk)
+    return True
+
+
+def cached_conditions(route, check):
+    """
+    Условия из последней проверки, если их можно отдать без синхронного
+    обращения к провайдерам: свежая проверка - как есть, устаревшая - с
+    фоновым пересчётом. None - проверки нет или она слишком старая.
+    """
+    if check is None:
+        return None
+    age = timezone.now() - check.check_date
+    if age <= get_cache_ttl():
+        return conditions_from_check(route, check)
+    background = getattr(settings, 'CONDITIONS_REVALIDATE_IN_BACKGROUND', True)
+    if background and age <= get_cache_ttl() + get_stale_ttl():
+        schedule_revalidation(route)
+        return stale_conditions(route, check)
+    return None
+
+
+def stale_conditions(route, check):
+    """Последняя известная проверка с пометкой is_stale (None, если проверок нет)"""
+    if check is None:
+        return None
+    data = conditions_from_check(route, check)
+    data['is_stale'] = True
+    return data
+
+
+def read_only_conditions(route, check):
+    """Условия в режиме только для чтения: последняя проверка любого возраста"""
+    if check is None:
+        return None
+    data = conditions_from_check(route, check)
+    data['is_stale'] = timezone.now() - check.check_date > get_cache_ttl()
+    return data
+
+
+def get_route_conditions(route):
+    """
+    Возвращает условия на маршруте, по возможности из кэша RouteCheck.
+
+    Свежая проверка отдаётся как есть, устаревшая — тоже, но с фоновым
+    пересчётом, и только при её отсутствии провайдеры вызываются синхронно.
+    В режиме только для чтения возвращает последнюю проверку любого
+    возраста или None, если проверок ещё нет.
+    """
+    check = get_latest_check(route)
+    if is_read_only():
+        return read_only_conditions(route, check)
+    data = cached_conditions(route, check)
+    if data is not None:
+        return data
+
+    try:
+        fresh_check = refresh_route_conditions(route)
+    except WeatherProviderError:
+        # Провайдер недоступен: показываем последние известные данные, если они есть
+        logger.warning('Провайдер погоды недоступен для маршрута %s', route.pk, exc_info=True)
+        return stale_conditions(route, check)
+    return conditions_from_check(route, fresh_check)
+
+
+async def aget_route_conditions(route):
+    """
+    Асинхронный get_route_conditions: при пересчёте погода и парковка
+    запрашиваются одновременно (acompute_conditions). Если провайдер
+    не уложился в CONDITIONS_FETCH_TIMEOUT или недоступен, отдаётся
+    последняя сохранённая проверка с пометкой is_stale.
+    """
+    check = await sync_to_async(get_latest_check)(route)
+    if is_read_only():
+        return read_only_conditions(route, check)
+    data = cached_conditions(route, check)
+    if data is not None:
+        return data
+
+    try:
+        fresh = await acompute_conditions(route)
+    except asyncio.TimeoutError:
+        logger.warning('Провайдеры не ответили вовремя для маршрута %s', route.pk)
+        return stale_conditions(route, check)
+    except WeatherProviderError:
+        logger.warning('Провайдер погоды недоступен для маршрута %s', route.pk, exc_info=True)
+        return stale_conditions(route, check)
+    fresh_check = await sync_to_async(save_route_check)(route, fresh)
+    return conditions_from_check(route, fresh_check)
@@ -0,0 +1,59 @@
+"""
+Чтение с реплики базы для страниц каталога.
+
+Views, отмеченные декоратором read_from_replica (каталог, рекомендации,
+"О проекте", API условий), читают модели приложения hikes с алиаса
+config.databases.REPLICA_ALIAS, если реплика настроена
+(DATABASE_REPLICA_URL). Всё остальное - запись, сессии и пользователи,
+любые другие views - идёт в default: реплика отстаёт от основной базы,
+и читать с неё только что записанные данные нельзя.
+"""
+import contextvars
+from functools import wraps
+
+from django.conf import settings
+
+from config.databases import REPLICA_ALIAS
+
+# Включается на время выполнения view с read_from_replica
+_use_replica = contextvars.ContextVar('hikeweather_use_replica', default=False)
+
+# Модели, которые можно читать с реплики
+REPLICA_APPS = {'hikes'}
+
+
+def replica_alias():
+    """Алиас реплики или None, если она не настроена"""
+    return REPLICA_ALIAS if REPLICA_ALIAS in settings.DATABASES else None
+
+
+def read_from_replica(view):
+    """Декоратор view: чтения моделей hikes внутри него идут на реплику"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Роутер: чтения в views с read_from_replica - на реплику, остальное - в default"""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label in REPLICA_APPS:
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия default: объекты с обеих баз можно связывать
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплики меняет репликация, а не migrate
+        return db != REPLICA_ALIAS
@@ -0,0 +1,61 @@
+"""
+Добавление и удаление маршрута из избранного за постоянное число запросов.
+
+Работаем напрямую с промежуточной таблицей HikeRoute.favorited_by.through:
+проверка и удаление - по уникальному индексу (hikeroute_id, user_id),
+добавление - одна вставка. Счётчик favorites_count меняется здесь же
+F-выражением (m2m_changed при работе с промежуточной моделью не
+отправляется), ответ берёт число из счётчика, а не из COUNT(*).
+
+Повторная вставка при параллельных запросах (двойной клик) упирается
+в уникальный индекс и считается успешной: маршрут уже в избранном,
+счётчик второй раз не увеличивается.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from . import caching
+from .models import HikeRoute
+from .signals import counter_change
+
+Favorite = HikeRoute.favorited_by.through
+
+
+def set_favorite(route_id, user, favorite=None):
+    """
+    Добавляет (favorite=True), удаляет (False) или переключает (None)
+    маршрут в избранном пользователя.
+    Возвращает (в избранном ли маршрут, число добавивших его в избранное).
+    Если маршрута нет - HikeRoute.DoesNotExist.
+    """
+    link = Favorite.objects.filter(hikeroute_id=route_id, user_id=user.pk)
+    with transaction.atomic():
+        # Счётчик и наличие в избранном - одним запросом по первичному ключу и индексу
+        favorites_count, exists = HikeRoute.objects.filter(pk=route_id).annotate(
+            is_favorite=Exists(link.filter(hikeroute_id=OuterRef('pk')))
+        ).values_list('favorites_count', 'is_favorite').get()
+
+        if favorite is None:
+            favorite = not exists
+        if favorite == exists:
+            return exists, favorites_count
+
+        if favorite:
+            try:
+                # Точка сохранения: ошибка вставки не должна ломать внешнюю транзакцию
+                with transaction.atomic():
+                    Favorite.objects.create(hikeroute_id=route_id, user_id=user.pk)
+            except IntegrityError:
+                # Уже добавлен параллельным запросом (двойной клик)
+                return True, favorites_count
+            delta = 1
+        else:
+            deleted, _ = link.delete()
+            if not deleted:
+                # Уже удалён параллельным запросом
+                return False, favorites_count
+            delta = -1
+
+        HikeRoute.objects.filter(pk=route_id).update(favorites_count=counter_change('favorites_count', delta))
+        transaction.on_commit(lambda: caching.invalidate(caching.favorites_scope(user.pk)))
+        return favorite, max(favorites_count + delta, 0)
@@ -0,0 +1,122 @@
+"""
+Хранилище почасовых прогнозов по ячейкам погодной сетки (CellForecast).
+
+Прогноз приходит вместе с погодой ячейки и сохраняется один раз на ячейку
+и выпуск: маршруты ячейки, страница маршрута и /api/hikes/<id>/forecast/
+читают одну и ту же строку, а проверка маршрута (RouteCheck) хранит только
+время выпуска, по которому она посчитана.
+
+Хранение ограничено: при каждой записи у ячейки остаются последние
+FORECAST_RUNS_KEPT выпусков, а выпуски старше FORECAST_RETENTION_HOURS
+удаляет prune_forecasts() после полного обновления (refresh_conditions).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from . import geo
+from .models import CellForecast
+
+
+def get_runs_kept():
+    """Сколько последних выпусков прогноза хранить для ячейки"""
+    return getattr(settings, 'FORECAST_RUNS_KEPT', 3)
+
+
+def get_retention():
+    """Срок хранения выпуска прогноза"""
+    return timedelta(hours=getattr(settings, 'FORECAST_RETENTION_HOURS', 48))
+
+
+def from_timestamp(value):
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def build_forecast(cell_key, forecast):
+    """
+    Создаёт (не сохраняя) CellForecast из прогноза провайдера.
+    None - в прогнозе нет времени выпуска или первого часа.
+    """
+    if not forecast or forecast.get('run_at') is None or forecast.get('start') is None:
+        return None
+    return CellForecast(
+        cell_key=cell_key,
+        run_at=from_timestamp(forecast['run_at']),
+        start=from_timestamp(forecast['start']),
+        utc_offset=forecast.get('utc_offset', 0),
+        series={
+            'temperatures': forecast.get('temperatures', []),
+            'precipitation': forecast.get('precipitation', []),
+        },
+    )
+
+
+def store_forecasts(forecasts_by_cell):
+    """
+    Сохраняет прогнозы {ключ ячейки: прогноз провайдера} одним bulk_create
+    и удаляет лишние выпуски этих ячеек. Уже сохранённый выпуск
+    не перезаписывается. Возвращает число переданных в базу прогнозов.
+    """
+    objects = [
+        forecast for forecast in (
+            build_forecast(cell_key, data) for cell_key, data in forecasts_by_cell.items()
+        )
+        if forecast is not None
+    ]
+    if not objects:
+        return 0
+    CellForecast.objects.bulk_create(objects, ignore_conflicts=True)
+    prune_forecasts(cell_keys=[forecast.cell_key for forecast in objects], by_age=False)
+    return len(objects)
+
+
+def prune_forecasts(cell_keys=None, by_age=True):
+    """
+    Удаляет выпуски сверх FORECAST_RUNS_KEPT последних для каждой ячейки
+    (только для cell_keys, если они заданы) и, при by_age, все выпуски
+    старше FORECAST_RETENTION_HOURS. Возвращает число удалённых строк.
+    """
+    ranked = CellForecast.objects.annotate(
+        position=Window(RowNumber(), partition_by=[F('cell_key')], order_by=F('run_at').desc())
+    )
+    if cell_keys is not None:
+        ranked = ranked.filter(cell_key__in=cell_keys)
+    extra_ids = list(ranked.filter(position__gt=get_runs_kept()).values_list('pk', flat=True))
+    deleted = 0
+    if extra_ids:
+        deleted += CellForecast.objects.filter(pk__in=extra_ids).delete()[0]
+    if by_age:
+        deleted += CellForecast.objects.filter(run_at__lt=timezone.now() - get_retention()).delete()[0]
+    return deleted
+
+
+def get_route_forecast(route, run_at=None):
+    """
+    Прогноз для ячейки маршрута: выпуск run_at (Unix time из проверки),
+    если он ещё хранится, иначе последний выпуск ячейки. None - прогнозов нет.
+    """
+    cell = geo.grid_cell(route.start_point_lat, route.start_point_lon)
+    forecasts = CellForecast.objects.filter(cell_key=cell.key)
+    if run_at is not None:
+        forecast = forecasts.filter(run_at=from_timestamp(run_at)).first()
+        if forecast is not None:
+            return forecast
+    return forecasts.order_by('-run_at').first()
+
+
+def forecast_to_dict(forecast):
+    """Прогноз для графика и JSON API: подписи часов по местному времени и ряды"""
+    temperatures = forecast.series.get('temperatures', [])
+    first_hour = (forecast.start + timedelta(seconds=forecast.utc_offset)).hour
+    return {
+        'cell': forecast.cell_key,
+        'run_at': forecast.run_at.isoformat(),
+        'start': forecast.start.isoformat(),
+        'utc_offset': forecast.utc_offset,
+        'labels': [f'{(first_hour + i) % 24:02d}:00' for i in range(len(temperatures))],
+        'temperatures': temperatures,
+        'precipitation': forecast.series.get('precipitation', []),
+    }
@@ -0,0 +1,88 @@
+"""
+Географические утилиты: разбиение карты на ячейки сетки.
+
+Прогноз погоды для соседних стартовых точек практически одинаковый,
+поэтому погода запрашивается один раз на ячейку сетки
+WEATHER_GRID_RESOLUTION x WEATHER_GRID_RESOLUTION градусов
+(0.05° ~ 5.5 км по широте) для центра ячейки.
+"""
+import math
+from collections import namedtuple
+
+from django.conf import settings
+
+GridCell = namedtuple('GridCell', ['key', 'lat', 'lon'])
+
+
+def get_grid_resolution():
+    """Размер ячейки сетки в градусах"""
+    return getattr(settings, 'WEATHER_GRID_RESOLUTION', 0.05)
+
+
+def grid_cell(lat, lon, resolution=None):
+    """Возвращает ячейку сетки, в которую попадает точка"""
+    resolution = resolution or get_grid_resolution()
+    lat_index = math.floor(lat / resolution)
+    lon_index = math.floor(lon / resolution)
+    return GridCell(
+        key=f'{resolution}:{lat_index}:{lon_index}',
+        lat=round((lat_index + 0.5) * resolution, 6),
+        lon=round((lon_index + 0.5) * resolution, 6),
+    )
+
+
+def group_by_cell(routes, resolution=None):
+    """Группирует маршруты по ячейкам сетки их стартовых точек"""
+    groups = {}
+    for route in routes:
+        cell = grid_cell(route.start_point_lat, route.start_point_lon, resolution)
+        groups.setdefault(cell, []).append(route)
+    return groups
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние между двумя точками по поверхности Земли в километрах"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# Длина одного градуса меридиана
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+BoundingBox = namedtuple('BoundingBox', ['min_lat', 'max_lat', 'lon_ranges'])
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Прямоугольник в градусах, в который гарантированно попадают все точки
+    не дальше radius_km от (lat, lon). Долгота задаётся списком диапазонов:
+    рядом с линией перемены дат их два, у полюса - вся окружность.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat = max(lat - delta_lat, -90.0)
+    max_lat = min(lat + delta_lat, 90.0)
+    if min_lat <= -90 or max_lat >= 90:
+        return BoundingBox(min_lat, max_lat, [(-180.0, 180.0)])
+
+    # Градус долготы короче всего на ближней к полюсу границе -
+    # по её широте прямоугольник с запасом накрывает весь круг
+    max_abs_lat = max(abs(min_lat), abs(max_lat))
+    delta_lon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+    if delta_lon >= 180:
+        return BoundingBox(min_lat, max_lat, [(-180.0, 180.0)])
+
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        lon_ranges = [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    elif max_lon > 180:
+        lon_ranges = [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    else:
+        lon_ranges = [(min_lon, max_lon)]
+    return BoundingBox(min_lat, max_lat, lon_ranges)
@@ -0,0 +1,220 @@
+"""
+История проверок маршрутов: сводки по часам и дням и ограниченное хранение.
+
+Проверки (RouteCheck) пишутся каждые CONDITIONS_CACHE_TTL минут на каждый
+маршрут, поэтому таблица растёт без конца. Команда compact_route_checks:
+1. сворачивает проверки каждого завершённого часа в сводки по часам
+   (RouteCheckAggregate: число проверок, минимум, максимум и среднее балла,
+   температуры и осадков), затем завершённые дни - в сводки по дням;
+2. удаляет проверки старше ROUTE_CHECK_RAW_DAYS и сводки по часам старше
+   ROUTE_CHECK_HOURLY_DAYS - только уже свёрнутые и небольшими порциями,
+   каждая в своей короткой транзакции. Последняя проверка маршрута
+   (HikeRoute.latest_check) не удаляется никогда.
+
+Час или день сворачивается целиком в одной транзакции, поэтому прерванный
+запуск ничего не посчитает дважды: следующий продолжит с первого
+несвёрнутого периода (после последней сводки этого вида).
+Сводки по дням хранятся бессрочно. История маршрута - get_history().
+"""
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import HikeRoute, RouteCheck, RouteCheckAggregate
+
+HOUR = RouteCheckAggregate.HOUR
+DAY = RouteCheckAggregate.DAY
+
+# Метрики сводки -> поля RouteCheck
+METRICS = {
+    'score': 'overall_score',
+    'temperature': 'weather_temp',
+    'precipitation': 'weather_precipitation',
+}
+# Поля сводки по часам, из которых собирается сводка по дням
+AGGREGATE_FIELDS = ['route_id', 'checks_count'] + [
+    f'{metric}_{stat}' for metric in METRICS for stat in ('min', 'max', 'avg')
+]
+
+
+def get_raw_retention():
+    """Сколько хранить сами проверки"""
+    return timedelta(days=getattr(settings, 'ROUTE_CHECK_RAW_DAYS', 7))
+
+
+def get_hourly_retention():
+    """Сколько хранить сводки по часам"""
+    return timedelta(days=getattr(settings, 'ROUTE_CHECK_HOURLY_DAYS', 90))
+
+
+def period_start(moment, period):
+    """Начало часа (UTC) или дня (местное время) для момента moment"""
+    if period == HOUR:
+        return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return timezone.localtime(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(start, period):
+    """Начало следующего периода после start"""
+    if period == HOUR:
+        return start + timedelta(hours=1)
+    # Полдень следующего дня - без ошибки на днях перехода на летнее время
+    return period_start(start + timedelta(days=1, hours=12), DAY)
+
+
+def aggregated_until(period):
+    """Граница, до которой все данные уже свёрнуты в сводки периода (None - сводок нет)"""
+    last = RouteCheckAggregate.objects.filter(period=period).aggregate(last=Max('period_start'))['last']
+    return next_period(last, period) if last is not None else None
+
+
+def add_to_aggregate(aggregate, count, values):
+    """
+    Добавляет к сводке count замеров; values - {метрика: (минимум, максимум, среднее)}.
+    Среднее пересчитывается с весами по числу проверок.
+    """
+    total = aggregate.checks_count + count
+    for metric, (low, high, mean) in values.items():
+        if aggregate.checks_count:
+            low = min(low, getattr(aggregate, f'{metric}_min'))
+            high = max(high, getattr(aggregate, f'{metric}_max'))
+            mean = (getattr(aggregate, f'{metric}_avg') * aggregate.checks_count + mean * count) / total
+        setattr(aggregate, f'{metric}_min', low)
+        setattr(aggregate, f'{metric}_max', high)
+        setattr(aggregate, f'{metric}_avg', mean)
+    aggregate.checks_count = total
+
+
+def _source(period):
+    """Данные, из которых собираются сводки периода: проверки или сводки по часам"""
+    if period == HOUR:
+        return RouteCheck.objects.all(), 'check_date'
+    return RouteCheckAggregate.objects.filter(period=HOUR), 'period_start'
+
+
+def _samples(queryset, period, batch_size):
+    """(route_id, число замеров, {метрика: (мин, макс, среднее)}) из источника периода"""
+    if period == HOUR:
+        fields = ['route_id', *METRICS.values()]
+        for route_id, *values in queryset.values_list(*fields).iterator(chunk_size=batch_size):
+            yield route_id, 1, {metric: (value, value, value) for metric, value in zip(METRICS, values)}
+        return
+    for route_id, count, *values in queryset.values_list(*AGGREGATE_FIELDS).iterator(chunk_size=batch_size):
+        yield route_id, count, {
+            metric: tuple(values[i * 3:i * 3 + 3]) for i, metric in enumerate(METRICS)
+        }
+
+
+def aggregate_period(period, until, batch_size=2000):
+    """
+    Сворачивает все завершённые до until периоды, начиная с первого
+    несвёрнутого. Каждый период - одна транзакция. Возвращает число
+    обработанных периодов.
+    """
+    source, date_field = _source(period)
+    done = 0
+    start = aggregated_until(period)
+    while True:
+        pending = source.filter(**{f'{date_field}__gte': start}) if start is not None else source
+        first = pending.order_by(date_field).values_list(date_field, flat=True).first()
+        if first is None:
+            break
+        start = period_start(first, period)
+        end = next_period(start, period)
+        if end > until:
+            break
+        with transaction.atomic():
+            aggregates = {}
+            rows = source.filter(**{f'{date_field}__gte': start, f'{date_field}__lt': end})
+            for route_id, count, values in _samples(rows, period, batch_size):
+                aggregate = aggregates.get(route_id)
+                if aggregate is None:
+                    aggregate = aggregates[route_id] = RouteCheckAggregate(
+                        route_id=route_id, period=period, period_start=start
+                    )
+                add_to_aggregate(aggregate, count, values)
+            RouteCheckAggregate.objects.bulk_create(aggregates.values(), batch_size=batch_size)
+        done += 1
+        start = end
+    return done
+
+
+def delete_in_batches(queryset, batch_size, pause=0):
+    """
+    Удаляет строки queryset порциями по batch_size: каждая порция - отдельный
+    короткий DELETE по первичному ключу, между порциями - пауза pause секунд.
+    """
+    deleted = 0
+    last_id = 0
+    queryset = queryset.order_by('pk')
+    while True:
+        # Порции по возрастанию pk: оставленные строки не перечитываются заново
+        ids = list(queryset.filter(pk__gt=last_id).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        last_id = ids[-1]
+        if pause:
+            time.sleep(pause)
+
+
+def delete_old_checks(before, batch_size=2000, pause=0):
+    """Удаляет свёрнутые в сводки проверки старше before, кроме последних проверок маршрутов"""
+    until = aggregated_until(HOUR)
+    if until is None:
+        return 0
+    is_latest = HikeRoute.objects.filter(latest_check=OuterRef('pk'))
+    queryset = RouteCheck.objects.filter(check_date__lt=min(before, until)).exclude(Exists(is_latest))
+    return delete_in_batches(queryset, batch_size, pause)
+
+
+def delete_old_hourly(before, batch_size=2000, pause=0):
+    """Удаляет свёрнутые в сводки по дням сводки по часам старше before"""
+    until = aggregated_until(DAY)
+    if until is None:
+        return 0
+    queryset = RouteCheckAggregate.objects.filter(period=HOUR, period_start__lt=min(before, until))
+    return delete_in_batches(queryset, batch_size, pause)
+
+
+def compact_checks(batch_size=2000, pause=0, now=None):
+    """
+    Полный проход: сводки по часам и дням, затем удаление старых проверок
+    и сводок по часам. Возвращает словарь со статистикой.
+    """
+    now = now or timezone.now()
+    stats = {
+        'hours': aggregate_period(HOUR, period_start(now, HOUR), batch_size),
+        'days': aggregate_period(DAY, period_start(now, DAY), batch_size),
+    }
+    stats['checks_deleted'] = delete_old_checks(now - get_raw_retention(), batch_size, pause)
+    stats['hourly_deleted'] = delete_old_hourly(now - get_hourly_retention(), batch_size, pause)
+    return stats
+
+
+def aggregate_to_dict(aggregate):
+    """Точка истории для JSON API"""
+    return {
+        'start': aggregate.period_start.isoformat(),
+        'checks': aggregate.checks_count,
+        **{
+            metric: {
+                'min': getattr(aggregate, f'{metric}_min'),
+                'max': getattr(aggregate, f'{metric}_max'),
+                'avg': round(getattr(aggregate, f'{metric}_avg'), 2),
+            }
+            for metric in METRICS
+        },
+    }
+
+
+def get_history(route_id, period, since):
+    """Сводки маршрута за период period, начиная с since, от старых к новым"""
+    return RouteCheckAggregate.objects.filter(
+        route_id=route_id, period=period, period_start__gte=since
+    ).order_by('period_start')
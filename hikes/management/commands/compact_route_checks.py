@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from hikes import history
+
+
+class Command(BaseCommand):
+    help = 'Сворачивает проверки маршрутов в сводки по часам и дням и удаляет старые данные'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк удалять за один запрос'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между порциями удаления (секунды), чтобы не мешать записи'
+        )
+
+    def handle(self, *args, **options):
+        stats = history.compact_checks(batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Свёрнуто часов: {stats['hours']}, дней: {stats['days']}; "
+            f"удалено проверок: {stats['checks_deleted']}, сводок по часам: {stats['hourly_deleted']}"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from hikes.stats import rebuild_route_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сумму и количество оценок и число добавлений в избранное для маршрутов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько маршрутов обновлять в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_route_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Пересчитаны счётчики для {total} маршрутов'))
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hikes import conditions
+from hikes.ratelimit import RateLimiter
+from hikes.services import get_weather_client
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает погоду, парковку и общий балл для всех маршрутов (RouteCheck)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Сколько маршрутов обрабатывать за один bulk_create'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Размер пула потоков для запросов к провайдерам'
+        )
+        parser.add_argument(
+            '--weather-rate', type=float,
+            default=getattr(settings, 'WEATHER_RATE_LIMIT', 0),
+            help='Максимум запросов погоды в секунду (0 - без ограничений)'
+        )
+        parser.add_argument(
+            '--parking-rate', type=float,
+            default=getattr(settings, 'PARKING_RATE_LIMIT', 0),
+            help='Максимум запросов парковки в секунду (0 - без ограничений)'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, повторяя обновление каждые --interval секунд'
+        )
+        parser.add_argument(
+            '--interval', type=int,
+            default=getattr(settings, 'CONDITIONS_CACHE_TTL', 15 * 60),
+            help='Пауза между запусками в режиме --loop (секунды)'
+        )
+
+    def handle(self, *args, **options):
+        limiters = {
+            'weather': RateLimiter(options['weather_rate']),
+            'parking': RateLimiter(options['parking_rate']),
+        }
+        while True:
+            started = time.monotonic()
+            self.refresh(options, limiters)
+            if not options['loop']:
+                break
+            pause = options['interval'] - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+
+    def refresh(self, options, limiters):
+        verbosity = options['verbosity']
+
+        def on_chunk(done, seconds):
+            if verbosity > 1:
+                self.stdout.write(f'  обработано {done} маршрутов за {seconds:.1f} с')
+
+        stats = conditions.refresh_all_routes(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            limiters=limiters,
+            on_chunk=on_chunk,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Обновлено маршрутов: {stats['routes']} за {stats['seconds']:.2f} с "
+            f"({stats['routes_per_second']:.1f} маршрутов/с), "
+            f"запросов погоды: {stats['weather_calls']}, ошибок: {stats['weather_failures']}"
+        ))
+        if getattr(settings, 'WEATHER_PROVIDER', 'demo') == 'openweathermap':
+            client = get_weather_client().stats.snapshot()
+            self.stdout.write(
+                f"OpenWeatherMap: запросов {client['calls']}, ошибок {client['errors']}, "
+                f"задержка p50 {client['latency_p50'] * 1000:.0f} мс, "
+                f"p95 {client['latency_p95'] * 1000:.0f} мс, "
+                f"макс. занято соединений {client['max_in_flight']}/{client['pool_size']}"
+            )
+        return stats
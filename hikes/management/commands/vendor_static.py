@@ -0,0 +1,111 @@
+import hashlib
+import json
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hikes.static_assets import (
+    ASSETS, FONTAWESOME_SOURCE_CSS, FONTAWESOME_WEBFONTS_URL, VENDOR_DIR,
+    find_used_icons, strip_source_map, subset_fontawesome_css,
+)
+
+LOCK_FILE = 'vendor.lock.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Скачивает Bootstrap, Font Awesome и Chart.js в static/vendor/ '
+        'и оставляет в Font Awesome только используемые иконки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Принять изменившиеся на CDN файлы (по умолчанию - ошибка)'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Таймаут одного запроса к CDN (секунды)'
+        )
+
+    def handle(self, *args, **options):
+        self.static_dir = Path(settings.STATICFILES_DIRS[0])
+        self.lock_path = self.static_dir / VENDOR_DIR / LOCK_FILE
+        self.lock = json.loads(self.lock_path.read_text()) if self.lock_path.exists() else {}
+        self.update = options['update']
+        self.session = requests.Session()
+        self.timeout = options['timeout']
+
+        for name, asset in ASSETS.items():
+            if name != 'fontawesome.css':
+                self.write(asset.path, strip_source_map(self.download(asset.url)))
+        self.vendor_fontawesome()
+
+        self.lock_path.write_text(json.dumps(self.lock, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скачано файлов: {len(self.lock)}, всего {sum(item["size"] for item in self.lock.values()) // 1024} КБ'
+        ))
+
+    def download(self, url):
+        """Содержимое файла; хэш сверяется с записанным в vendor.lock.json при прошлом запуске"""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as error:
+            raise CommandError(f'Не удалось скачать {url}: {error}')
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        known = self.lock.get(url)
+        if known and known['sha256'] != digest and not self.update:
+            raise CommandError(f'{url} изменился с прошлого скачивания (запустите с --update, если так и должно быть)')
+        self.lock[url] = {'sha256': digest, 'size': len(content)}
+        return content
+
+    def write(self, path, content):
+        target = self.static_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        self.stdout.write(f'  {path}: {len(content) // 1024} КБ')
+        return target
+
+    def source_texts(self):
+        """Шаблоны и свои скрипты, в которых ищутся классы иконок"""
+        directories = [Path(directory) for config in settings.TEMPLATES for directory in config['DIRS']]
+        directories.append(self.static_dir / 'js')
+        for directory in directories:
+            for path in sorted(directory.rglob('*')):
+                if path.suffix in ('.html', '.js') and VENDOR_DIR not in path.relative_to(directory).parts:
+                    yield path.read_text(encoding='utf-8')
+
+    def vendor_fontawesome(self):
+        icons = find_used_icons(self.source_texts())
+        css = self.download(FONTAWESOME_SOURCE_CSS).decode('utf-8')
+        css, fonts, codepoints = subset_fontawesome_css(css, icons)
+        css_path = self.write(ASSETS['fontawesome.css'].path, css.encode('utf-8'))
+        self.stdout.write(f'  иконок: {len(codepoints)}')
+
+        fonts_dir = css_path.parent.parent / 'webfonts'
+        for font in fonts:
+            path = self.write(
+                (fonts_dir / font).relative_to(self.static_dir),
+                self.download(FONTAWESOME_WEBFONTS_URL + font),
+            )
+            self.subset_font(path, codepoints)
+
+    def subset_font(self, path, codepoints):
+        """Оставляет в шрифте только нужные символы, если установлен fontTools (pip install fonttools brotli)"""
+        try:
+            import brotli  # noqa: F401 - нужен fontTools для записи woff2
+            from fontTools import subset
+        except ImportError:
+            return
+        options = subset.Options()
+        options.flavor = 'woff2'
+        font = subset.load_font(str(path), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        subset.save_font(font, str(path), options)
+        self.stdout.write(f'  {path.name} после урезания: {path.stat().st_size // 1024} КБ')
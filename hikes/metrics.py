@@ -0,0 +1,250 @@
+"""
+Метрики производительности в текстовом формате Prometheus.
+
+Реестр живёт в памяти процесса: при нескольких процессах (gunicorn -w N)
+каждый отдаёт на /metrics свои значения, а Prometheus собирает их
+с каждого процесса отдельно и суммирует запросом.
+
+Что измеряется:
+- время ответа и число запросов по view (PerformanceMiddleware);
+- число запросов к БД и время в БД на один HTTP-запрос;
+- время отрисовки шаблонов (бэкенд hikes.template_backend);
+- число и длительность обращений к провайдерам погоды и парковки;
+- попадания и промахи кэшей (страницы, погода ячеек, счётчики сайта).
+
+Данные текущего запроса собираются в RequestStats (contextvar), чтобы
+middleware могло отдать их в заголовке Server-Timing.
+"""
+import contextvars
+import math
+import threading
+import time
+from functools import wraps
+
+# Границы корзин гистограмм времени (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Границы корзин числа запросов к БД на один HTTP-запрос
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    """Базовая метрика: значения по наборам меток"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name}: ожидаются метки {self.labelnames}, получены {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(
+                line for key, value in items
+                for line in self._render_sample(list(zip(self.labelnames, key)), value)
+            )
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, labels, value):
+        yield f'{self.name}_total{_format_labels(labels)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    """Гистограмма: число наблюдений по корзинам, сумма и количество"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data['buckets'][i] += 1
+                    break
+            data['sum'] += value
+            data['count'] += 1
+
+    def get_count(self, **labels):
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            return data['count'] if data else 0
+
+    def _render_sample(self, labels, data):
+        cumulative = 0
+        for bound, count in zip(self.buckets, data['buckets']):
+            cumulative += count
+            bucket_labels = labels + [('le', _format_value(bound))]
+            yield f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(labels)} {_format_value(data["sum"])}'
+        yield f'{self.name}_count{_format_labels(labels)} {data["count"]}'
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    'hikeweather_http_requests', 'Обработанные HTTP-запросы', ('view', 'method', 'status'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'hikeweather_http_request_duration_seconds', 'Время ответа', ('view', 'method'))
+DB_QUERIES = REGISTRY.histogram(
+    'hikeweather_db_queries_per_request', 'Запросов к БД на HTTP-запрос', ('view',),
+    buckets=QUERY_COUNT_BUCKETS)
+DB_SECONDS = REGISTRY.histogram(
+    'hikeweather_db_duration_seconds', 'Время в БД на HTTP-запрос', ('view',))
+TEMPLATE_SECONDS = REGISTRY.histogram(
+    'hikeweather_template_render_seconds', 'Время отрисовки шаблона', ('template',))
+PROVIDER_CALLS = REGISTRY.counter(
+    'hikeweather_provider_calls', 'Обращения к провайдерам погоды и парковки', ('provider', 'outcome'))
+PROVIDER_SECONDS = REGISTRY.histogram(
+    'hikeweather_provider_call_duration_seconds', 'Длительность обращения к провайдеру', ('provider',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'hikeweather_cache_requests', 'Чтения кэшей приложения', ('cache', 'result'))
+DB_CONNECTIONS = REGISTRY.counter(
+    'hikeweather_db_connections_opened', 'Открытые соединения с БД', ('alias',))
+
+
+class RequestStats:
+    """Показатели одного HTTP-запроса (для Server-Timing)"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.provider_calls = 0
+        self.provider_seconds = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper: считает запросы и время в БД"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.db_queries += 1
+
+
+current_request = contextvars.ContextVar('hikeweather_request_stats', default=None)
+
+
+def observe_template(name, seconds):
+    """Учитывает отрисовку шаблона name"""
+    TEMPLATE_SECONDS.observe(seconds, template=name or 'unknown')
+    stats = current_request.get()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def record_cache(name, hit):
+    """Учитывает чтение кэша name: попадание (hit=True) или промах"""
+    CACHE_REQUESTS.inc(cache=name, result='hit' if hit else 'miss')
+
+
+def connection_opened(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created: при постоянных соединениях счётчик почти не растёт"""
+    DB_CONNECTIONS.inc(alias=connection.alias)
+
+
+def observe_provider(name):
+    """Декоратор: число, исход и длительность обращений к провайдеру name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                PROVIDER_CALLS.inc(provider=name, outcome=outcome)
+                PROVIDER_SECONDS.observe(elapsed, provider=name)
+                # Вызов в пуле потоков без контекста запроса в Server-Timing не попадает
+                stats = current_request.get()
+                if stats is not None:
+                    stats.provider_calls += 1
+                    stats.provider_seconds += elapsed
+        return wrapper
+    return decorator
@@ -0,0 +1,186 @@
+"""
+Middleware замера производительности запросов.
+
+Для каждого запроса учитывает время ответа, число запросов к БД и время
+в БД (hikes.metrics). По настройке PERF_SERVER_TIMING добавляет заголовок
+Server-Timing (видно во вкладке Network инструментов разработчика).
+
+StaticFilesMiddleware - WhiteNoise, который не переводит асинхронную
+цепочку middleware в синхронную (WhiteNoiseMiddleware 6.6 - только sync).
+
+Выборочное профилирование: доля PERF_PROFILE_SAMPLE_RATE запросов
+выполняется под cProfile, и если запрос занял больше PERF_PROFILE_SLOW_MS,
+профиль сохраняется в PERF_PROFILE_DIR. Смотреть: python -m pstats файл.prof
+или snakeviz.
+"""
+import cProfile
+import logging
+import random
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def get_view_name(request):
+    """Имя view для меток метрик: имя URL-шаблона, а не путь (число меток ограничено)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+def server_timing(stats, total):
+    """Значение заголовка Server-Timing"""
+    parts = [
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_queries} queries"',
+        f'tpl;dur={stats.template_seconds * 1000:.1f}',
+    ]
+    if stats.provider_calls:
+        parts.append(f'provider;dur={stats.provider_seconds * 1000:.1f};desc="{stats.provider_calls} calls"')
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class PerformanceMiddleware:
+    """
+    Метрики запроса, Server-Timing и выборочный cProfile медленных запросов.
+    Работает и в синхронной, и в асинхронной цепочке middleware: под ASGI
+    асинхронные view (hike_detail) не оборачиваются в async_to_sync.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        stats, token, profiler, start = self.start_request()
+        try:
+            with self.db_timing(stats):
+                response = self.get_response(request)
+        finally:
+            total = self.stop_request(token, profiler, start)
+        return self.finish_request(request, response, stats, profiler, total)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        stats, token, profiler, start = self.start_request()
+        try:
+            # Соединения с БД у каждого потока свои: обёртки ставятся в том потоке,
+            # где sync_to_async (thread_sensitive) выполняет запросы ORM этого запроса
+            db_timing = await sync_to_async(self.db_timing)(stats)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(db_timing.close)()
+        finally:
+            total = self.stop_request(token, profiler, start)
+        return self.finish_request(request, response, stats, profiler, total)
+
+    def start_request(self):
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        profiler = self.start_profiler()
+        return stats, token, profiler, time.perf_counter()
+
+    @staticmethod
+    def stop_request(token, profiler, start):
+        total = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+        metrics.current_request.reset(token)
+        return total
+
+    @staticmethod
+    def db_timing(stats):
+        """Замер запросов к БД на всех соединениях на время запроса"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats.db_wrapper))
+        return stack
+
+    def finish_request(self, request, response, stats, profiler, total):
+        view = get_view_name(request)
+        metrics.REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        metrics.REQUEST_SECONDS.observe(total, view=view, method=request.method)
+        metrics.DB_QUERIES.observe(stats.db_queries, view=view)
+        metrics.DB_SECONDS.observe(stats.db_seconds, view=view)
+
+        if getattr(settings, 'PERF_SERVER_TIMING', False):
+            response['Server-Timing'] = server_timing(stats, total)
+        if profiler is not None and total * 1000 >= getattr(settings, 'PERF_PROFILE_SLOW_MS', 500):
+            self.dump_profile(profiler, view, total)
+        return response
+
+    @staticmethod
+    def start_profiler():
+        rate = getattr(settings, 'PERF_PROFILE_SAMPLE_RATE', 0)
+        if not rate or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # В этом потоке уже работает другой профилировщик
+            return None
+        return profiler
+
+    @staticmethod
+    def dump_profile(profiler, view, total):
+        directory = Path(getattr(settings, 'PERF_PROFILE_DIR', 'profiles'))
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f'{datetime.now():%Y%m%d-%H%M%S-%f}-{view.replace(":", "_")}-{total * 1000:.0f}ms.prof'
+        path = directory / name
+        profiler.dump_stats(path)
+        logger.info('Профиль медленного запроса (%s, %.0f мс): %s', view, total * 1000, path)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise для синхронной и асинхронной цепочки middleware: под ASGI
+    запросы к страницам проходят дальше без async_to_sync, а файл статики
+    открывается в потоке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Поиск по файловой системе (режим DEBUG)
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
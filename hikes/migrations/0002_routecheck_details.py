@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routecheck',
+            name='details',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Детали проверки'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_latest_checks(apps, schema_editor):
+    """Заполняет current_score и latest_check по уже сохранённым проверкам"""
+    HikeRoute = apps.get_model('hikes', 'HikeRoute')
+    RouteCheck = apps.get_model('hikes', 'RouteCheck')
+    for route in HikeRoute.objects.all().only('id'):
+        check = RouteCheck.objects.filter(route_id=route.id).order_by('-check_date', '-id').first()
+        if check is not None:
+            HikeRoute.objects.filter(pk=route.id).update(
+                latest_check_id=check.id,
+                current_score=check.overall_score
+            )
+
+
+def create_postgres_score_index(apps, schema_editor):
+    """
+    В PostgreSQL NULL при DESC идут первыми, поэтому для ORDER BY
+    current_score DESC NULLS LAST нужен отдельный индекс
+    (SQLite и так ставит NULL в конец и использует hikes_route_score_idx).
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS hikes_route_score_nl_idx ON hikes_hikeroute '
+            '(current_score DESC NULLS LAST, created_at DESC)'
+        )
+
+
+def drop_postgres_score_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS hikes_route_score_nl_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0002_routecheck_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hikeroute',
+            name='current_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Текущий балл'),
+        ),
+        migrations.AddField(
+            model_name='hikeroute',
+            name='latest_check',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hikes.routecheck', verbose_name='Последняя проверка'),
+        ),
+        migrations.AddIndex(
+            model_name='hikeroute',
+            index=models.Index(fields=['-current_score', '-created_at'], name='hikes_route_score_idx'),
+        ),
+        migrations.RunPython(create_postgres_score_index, drop_postgres_score_index),
+        migrations.RunPython(fill_latest_checks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+from hikes.stats import rebuild_route_stats
+
+
+def fill_counters(apps, schema_editor):
+    rebuild_route_stats(apps.get_model('hikes', 'HikeRoute'), apps.get_model('hikes', 'Review'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0003_hikeroute_current_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hikeroute',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном (кол-во)'),
+        ),
+        migrations.AddField(
+            model_name='hikeroute',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='hikeroute',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
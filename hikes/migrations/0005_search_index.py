@@ -0,0 +1,78 @@
+from django.db import migrations
+
+FTS_TABLE = 'hikes_hikeroute_fts'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='hikes_hikeroute', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hikes_hikeroute_fts_ai AFTER INSERT ON hikes_hikeroute BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hikes_hikeroute_fts_ad AFTER DELETE ON hikes_hikeroute BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS hikes_hikeroute_fts_au
+    AFTER UPDATE OF title, description ON hikes_hikeroute BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS hikes_hikeroute_fts_au',
+    'DROP TRIGGER IF EXISTS hikes_hikeroute_fts_ad',
+    'DROP TRIGGER IF EXISTS hikes_hikeroute_fts_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+# Выражение должно совпадать с hikes.search.POSTGRES_VECTOR
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS hikes_hikeroute_search_idx ON hikes_hikeroute USING GIN ((
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS hikes_hikeroute_search_idx',
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0004_hikeroute_rating_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
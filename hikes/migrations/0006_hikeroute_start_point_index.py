@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hikeroute',
+            index=models.Index(fields=['start_point_lat', 'start_point_lon'], name='hikes_route_start_point_idx'),
+        ),
+    ]
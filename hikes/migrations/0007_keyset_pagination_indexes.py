@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+def recreate_postgres_score_index(with_id):
+    """Индекс NULLS LAST для PostgreSQL (см. 0003) - с id для курсорной пагинации"""
+    columns = 'current_score DESC NULLS LAST, created_at DESC' + (', id DESC' if with_id else '')
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX IF EXISTS hikes_route_score_nl_idx')
+            schema_editor.execute(f'CREATE INDEX hikes_route_score_nl_idx ON hikes_hikeroute ({columns})')
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0006_hikeroute_start_point_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='hikeroute',
+            name='hikes_route_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='hikeroute',
+            index=models.Index(fields=['-created_at', '-id'], name='hikes_route_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hikeroute',
+            index=models.Index(fields=['-current_score', '-created_at', '-id'], name='hikes_route_score_idx'),
+        ),
+        migrations.RunPython(recreate_postgres_score_index(True), recreate_postgres_score_index(False)),
+    ]
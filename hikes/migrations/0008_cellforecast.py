@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CellForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_key', models.CharField(max_length=64, verbose_name='Ячейка сетки')),
+                ('run_at', models.DateTimeField(verbose_name='Выпуск прогноза')),
+                ('start', models.DateTimeField(verbose_name='Первый час прогноза')),
+                ('utc_offset', models.IntegerField(default=0, verbose_name='Смещение от UTC (с)')),
+                ('series', models.JSONField(default=dict, verbose_name='Почасовые ряды')),
+            ],
+            options={
+                'verbose_name': 'Прогноз ячейки',
+                'verbose_name_plural': 'Прогнозы ячеек',
+                'indexes': [models.Index(fields=['run_at'], name='hikes_forecast_run_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cellforecast',
+            constraint=models.UniqueConstraint(fields=('cell_key', 'run_at'), name='hikes_forecast_cell_run_uniq'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hikes', '0008_cellforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteCheckAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Час'), ('day', 'День')], max_length=4, verbose_name='Период')),
+                ('period_start', models.DateTimeField(verbose_name='Начало периода')),
+                ('checks_count', models.PositiveIntegerField(default=0, verbose_name='Проверок')),
+                ('score_min', models.FloatField(verbose_name='Балл (мин.)')),
+                ('score_max', models.FloatField(verbose_name='Балл (макс.)')),
+                ('score_avg', models.FloatField(verbose_name='Балл (сред.)')),
+                ('temperature_min', models.FloatField(verbose_name='Температура (мин.)')),
+                ('temperature_max', models.FloatField(verbose_name='Температура (макс.)')),
+                ('temperature_avg', models.FloatField(verbose_name='Температура (сред.)')),
+                ('precipitation_min', models.FloatField(verbose_name='Осадки (мин.)')),
+                ('precipitation_max', models.FloatField(verbose_name='Осадки (макс.)')),
+                ('precipitation_avg', models.FloatField(verbose_name='Осадки (сред.)')),
+            ],
+            options={
+                'verbose_name': 'Сводка проверок',
+                'verbose_name_plural': 'Сводки проверок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='routecheck',
+            index=models.Index(fields=['route', '-check_date'], name='hikes_check_route_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routecheck',
+            index=models.Index(fields=['check_date'], name='hikes_check_date_idx'),
+        ),
+        # Индекс только по route удаляется после создания составного, который его заменяет
+        migrations.AlterField(
+            model_name='routecheck',
+            name='route',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='route_checks', to='hikes.hikeroute', verbose_name='Маршрут'),
+        ),
+        migrations.AddField(
+            model_name='routecheckaggregate',
+            name='route',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='check_aggregates', to='hikes.hikeroute', verbose_name='Маршрут'),
+        ),
+        migrations.AddIndex(
+            model_name='routecheckaggregate',
+            index=models.Index(fields=['period', 'period_start'], name='hikes_check_agg_period_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='routecheckaggregate',
+            constraint=models.UniqueConstraint(fields=('route', 'period', 'period_start'), name='hikes_check_agg_uniq'),
+        ),
+    ]
@@ -73,20 +73,65 @@ class HikeRoute(models.Model):
         verbose_name='Дата обновления'
     )
     
+    # Денормализованные счётчики (поддерживаются сигналами, см. hikes/signals.py)
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном (кол-во)'
+    )
+    
+    # Денормализованные данные последней проверки (обновляются при записи RouteCheck)
+    current_score = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Текущий балл'
+    )
+    latest_check = models.ForeignKey(
+        'RouteCheck',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Последняя проверка'
+    )
+    
     class Meta:
         verbose_name = 'Маршрут'
         verbose_name_plural = 'Маршруты'
         ordering = ['-created_at']
+        indexes = [
+            # Курсорная пагинация по дате (hikes/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='hikes_route_created_idx'),
+            models.Index(fields=['-current_score', '-created_at', '-id'], name='hikes_route_score_idx'),
+            # Прямоугольный отбор кандидатов для поиска рядом (hikes/nearby.py)
+            models.Index(fields=['start_point_lat', 'start_point_lon'], name='hikes_route_start_point_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    @property
+    def avg_rating(self):
+        """Средний рейтинг по денормализованным счётчикам (None, если оценок нет)"""
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
+        return None
+    
+    @property
+    def reviews_count(self):
+        """Количество отзывов"""
+        return self.rating_count
+    
     def get_average_rating(self):
         """Возвращает средний рейтинг маршрута"""
-        reviews = self.reviews.all()
-        if reviews:
-            return sum([r.rating for r in reviews]) / len(reviews)
-        return 0
+        return self.avg_rating or 0
 
 
 class PointOfInterest(models.Model):
@@ -184,6 +229,13 @@ class Review(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.route.title} ({self.rating}★)"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка на момент загрузки - чтобы при изменении обновить сумму оценок маршрута
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
 
 
 class RouteCheck(models.Model):
@@ -196,11 +248,13 @@ class RouteCheck(models.Model):
         ('unknown', 'Нет данных'),
     ]
     
+    # Отдельный индекс по route не нужен: его заменяет составной (route, -check_date)
     route = models.ForeignKey(
         HikeRoute,
         on_delete=models.CASCADE,
         related_name='route_checks',
-        verbose_name='Маршрут'
+        verbose_name='Маршрут',
+        db_index=False
     )
     check_date = models.DateTimeField(
         auto_now_add=True,
@@ -234,11 +288,130 @@ class RouteCheck(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)],
         default=0
     )
-    
+
+    # Полный снимок ответа сервисов (погода, прогноз, парковка, баллы)
+    details = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Детали проверки'
+    )
+
     class Meta:
         verbose_name = 'Проверка маршрута'
         verbose_name_plural = 'Проверки маршрутов'
         ordering = ['-check_date']
+        indexes = [
+            # Проверки маршрута от новых к старым
+            models.Index(fields=['route', '-check_date'], name='hikes_check_route_date_idx'),
+            # Агрегация по часам и удаление старых проверок (hikes/history.py)
+            models.Index(fields=['check_date'], name='hikes_check_date_idx'),
+        ]
     
     def __str__(self):
         return f"Проверка {self.route.title} - {self.check_date.strftime('%d.%m.%Y %H:%M')}"
+
+
+class RouteCheckAggregate(models.Model):
+    """
+    Сводка проверок маршрута за час или день: число проверок и минимум,
+    максимум и среднее балла, температуры и вероятности осадков.
+    Заполняется командой compact_route_checks, по ней строится история.
+    """
+
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [
+        (HOUR, 'Час'),
+        (DAY, 'День'),
+    ]
+
+    route = models.ForeignKey(
+        HikeRoute,
+        on_delete=models.CASCADE,
+        related_name='check_aggregates',
+        verbose_name='Маршрут',
+        db_index=False
+    )
+    period = models.CharField(
+        max_length=4,
+        choices=PERIOD_CHOICES,
+        verbose_name='Период'
+    )
+    period_start = models.DateTimeField(
+        verbose_name='Начало периода'
+    )
+    checks_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Проверок'
+    )
+
+    score_min = models.FloatField(verbose_name='Балл (мин.)')
+    score_max = models.FloatField(verbose_name='Балл (макс.)')
+    score_avg = models.FloatField(verbose_name='Балл (сред.)')
+    temperature_min = models.FloatField(verbose_name='Температура (мин.)')
+    temperature_max = models.FloatField(verbose_name='Температура (макс.)')
+    temperature_avg = models.FloatField(verbose_name='Температура (сред.)')
+    precipitation_min = models.FloatField(verbose_name='Осадки (мин.)')
+    precipitation_max = models.FloatField(verbose_name='Осадки (макс.)')
+    precipitation_avg = models.FloatField(verbose_name='Осадки (сред.)')
+
+    class Meta:
+        verbose_name = 'Сводка проверок'
+        verbose_name_plural = 'Сводки проверок'
+        constraints = [
+            # Заодно индекс для истории маршрута за период
+            models.UniqueConstraint(
+                fields=['route', 'period', 'period_start'], name='hikes_check_agg_uniq'
+            ),
+        ]
+        indexes = [
+            # Последний обработанный период и удаление старых сводок
+            models.Index(fields=['period', 'period_start'], name='hikes_check_agg_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.route_id}: {self.get_period_display()} с {self.period_start:%d.%m.%Y %H:%M}"
+
+
+class CellForecast(models.Model):
+    """
+    Почасовой прогноз для ячейки погодной сетки: одна строка на ячейку
+    и выпуск прогноза. Ряды хранятся в JSON без подписей часов - время
+    часа вычисляется из начала ряда (start) и шага в час.
+    """
+
+    cell_key = models.CharField(
+        max_length=64,
+        verbose_name='Ячейка сетки'
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Выпуск прогноза'
+    )
+    start = models.DateTimeField(
+        verbose_name='Первый час прогноза'
+    )
+    # Смещение местного времени от UTC (секунды) - для подписей часов
+    utc_offset = models.IntegerField(
+        default=0,
+        verbose_name='Смещение от UTC (с)'
+    )
+    # {'temperatures': [...], 'precipitation': [...]} - по значению на час
+    series = models.JSONField(
+        default=dict,
+        verbose_name='Почасовые ряды'
+    )
+
+    class Meta:
+        verbose_name = 'Прогноз ячейки'
+        verbose_name_plural = 'Прогнозы ячеек'
+        constraints = [
+            # Уникальность и индекс для "последний выпуск ячейки" (по убыванию run_at)
+            models.UniqueConstraint(fields=['cell_key', 'run_at'], name='hikes_forecast_cell_run_uniq'),
+        ]
+        indexes = [
+            # Удаление выпусков старше срока хранения
+            models.Index(fields=['run_at'], name='hikes_forecast_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Прогноз {self.cell_key} от {self.run_at:%d.%m.%Y %H:%M}"
@@ -0,0 +1,56 @@
+"""
+Поиск маршрутов рядом с точкой.
+
+Сначала отбираем кандидатов прямоугольником по индексу
+hikes_route_start_point_idx (start_point_lat, start_point_lon),
+затем считаем точное расстояние по формуле гаверсинусов средствами СУБД,
+отсекаем точки за пределами радиуса и сортируем по расстоянию.
+Вся таблица в Python не загружается.
+"""
+import math
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from . import geo
+
+# Ограничения радиуса поиска (км)
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 200
+
+
+def distance_expression(lat, lon, lat_field='start_point_lat', lon_field='start_point_lon'):
+    """Выражение СУБД: расстояние от (lat, lon) до точки маршрута в километрах"""
+    lat_rad = Radians(F(lat_field))
+    lon_rad = Radians(F(lon_field))
+    origin_lat = math.radians(lat)
+    origin_lon = math.radians(lon)
+    a = (
+        Power(Sin((lat_rad - Value(origin_lat)) / 2), 2)
+        + Value(math.cos(origin_lat)) * Cos(lat_rad) * Power(Sin((lon_rad - Value(origin_lon)) / 2), 2)
+    )
+    # Least защищает asin от погрешности округления у диаметрально противоположных точек
+    return Value(2 * geo.EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def bounding_box_filter(lat, lon, radius_km, lat_field='start_point_lat', lon_field='start_point_lon'):
+    """Условие Q для прямоугольника вокруг точки"""
+    box = geo.bounding_box(lat, lon, radius_km)
+    lon_filter = Q()
+    for min_lon, max_lon in box.lon_ranges:
+        lon_filter |= Q(**{f'{lon_field}__range': (min_lon, max_lon)})
+    return Q(**{f'{lat_field}__range': (box.min_lat, box.max_lat)}) & lon_filter
+
+
+def nearby_routes(queryset, lat, lon, radius_km=DEFAULT_RADIUS_KM):
+    """
+    Маршруты со стартом не дальше radius_km от точки,
+    отсортированные по расстоянию (аннотация distance_km).
+    """
+    return queryset.filter(
+        bounding_box_filter(lat, lon, radius_km)
+    ).annotate(
+        distance_km=distance_expression(lat, lon)
+    ).filter(
+        distance_km__lte=radius_km
+    ).order_by('distance_km', 'id')
@@ -0,0 +1,219 @@
+"""
+Курсорная (keyset) пагинация списков маршрутов.
+
+Вместо ?page=N с OFFSET и COUNT(*) страница задаётся курсором -
+значениями ключей сортировки первой или последней строки соседней
+страницы. Следующая страница выбирается условием "строго после курсора"
+с границей по первому ключу, поэтому СУБД начинает чтение индекса сразу
+с нужного места: сотая страница стоит столько же, сколько первая.
+
+Ключи задаются как в order_by: ('-current_score', '-created_at', '-id').
+Последний ключ должен быть уникальным. NULL допускается только в первом
+ключе; такие строки всегда идут в конце списка (NULLS LAST), и по ним
+листаем отдельным сегментом.
+
+Для сортировок, которые нельзя выразить ключами (релевантность поиска),
+курсор хранит смещение - работает как обычный OFFSET.
+"""
+import base64
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+OFFSET = 'o'
+
+
+def encode_cursor(direction, values):
+    """Курсор для URL: направление и значения ключей в base64"""
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    data = json.dumps([direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(направление, значения) или None, если курсор повреждён"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(data)
+    except (ValueError, TypeError):
+        return None
+    if direction not in (FORWARD, BACKWARD, OFFSET):
+        return None
+    return direction, values
+
+
+class Key:
+    """Ключ сортировки: поле, направление и допускает ли оно NULL"""
+
+    def __init__(self, spec, model):
+        self.descending = spec.startswith('-')
+        self.name = spec.lstrip('-')
+        self.field = model._meta.get_field(self.name)
+        self.nullable = self.field.null
+
+    def order_by(self, forward=True):
+        descending = self.descending == forward
+        expression = F(self.name)
+        if not self.nullable:
+            return expression.desc() if descending else expression.asc()
+        # NULL всегда в конце списка, при обратном обходе - в начале
+        nulls = {'nulls_last': True} if forward else {'nulls_first': True}
+        return expression.desc(**nulls) if descending else expression.asc(**nulls)
+
+    def lookup(self, forward, inclusive=False):
+        """Сравнение "дальше по списку" для значений этого ключа"""
+        op = 'lt' if self.descending == forward else 'gt'
+        return op + 'e' if inclusive else op
+
+    def to_python(self, value):
+        return None if value is None else self.field.to_python(value)
+
+
+class CursorPaginator:
+    """
+    Пагинатор по курсору.
+    count - функция, возвращающая (приблизительное) общее число объектов;
+    по умолчанию queryset.count().
+    """
+
+    def __init__(self, queryset, per_page, keys=None, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [Key(spec, queryset.model) for spec in keys] if keys else None
+        if self.keys and any(key.nullable for key in self.keys[1:]):
+            raise ValueError('NULL допускается только в первом ключе сортировки')
+        self._count = count or queryset.count
+
+    @cached_property
+    def count(self):
+        return self._count()
+
+    def get_page(self, cursor=None):
+        """Страница по курсору; пустой или повреждённый курсор - первая страница"""
+        decoded = decode_cursor(cursor) if cursor else None
+        if self.keys is None:
+            offset = 0
+            if decoded and decoded[0] == OFFSET:
+                try:
+                    offset = max(int(decoded[1][0]), 0)
+                except (IndexError, TypeError, ValueError):
+                    offset = 0
+            return self._offset_page(offset)
+
+        values = None
+        if decoded and decoded[0] != OFFSET and len(decoded[1]) == len(self.keys):
+            try:
+                values = [key.to_python(value) for key, value in zip(self.keys, decoded[1])]
+            except ValidationError:
+                values = None
+        if values is None:
+            return self._keyset_page(None, forward=True)
+        return self._keyset_page(values, forward=decoded[0] == FORWARD)
+
+    def _offset_page(self, offset):
+        rows = list(self.queryset[offset:offset + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows, self,
+            next_cursor=encode_cursor(OFFSET, [offset + self.per_page]) if has_next else None,
+            previous_cursor=encode_cursor(OFFSET, [max(offset - self.per_page, 0)]) if offset else None,
+        )
+
+    def _keyset_page(self, values, forward):
+        limit = self.per_page + 1
+        rows = []
+        for segment in self._segments(values, forward):
+            queryset = self.queryset.order_by(*(key.order_by(forward) for key in self.keys))
+            if segment is not None:
+                queryset = queryset.filter(segment)
+            rows.extend(queryset[:limit - len(rows)])
+            if len(rows) >= limit:
+                break
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        # Курсор есть - значит, в эту сторону мы откуда-то пришли
+        has_next = has_more if forward else values is not None
+        has_previous = values is not None if forward else has_more
+        return CursorPage(
+            rows, self,
+            next_cursor=encode_cursor(FORWARD, self._values(rows[-1])) if rows and has_next else None,
+            previous_cursor=encode_cursor(BACKWARD, self._values(rows[0])) if rows and has_previous else None,
+        )
+
+    def _values(self, obj):
+        return [getattr(obj, key.name) for key in self.keys]
+
+    def _segments(self, values, forward):
+        """
+        Условия выборки по порядку обхода. Строки с NULL в первом ключе
+        (в конце списка) выбираются отдельным условием, чтобы каждое
+        условие было диапазоном по индексу.
+        """
+        if values is None:
+            return [None]
+        first = self.keys[0]
+        if not first.nullable:
+            return [self._after(self.keys, values, forward)]
+
+        is_null = Q(**{f'{first.name}__isnull': True})
+        not_null = Q(**{f'{first.name}__isnull': False})
+        rest_after = self._after(self.keys[1:], values[1:], forward)
+        if values[0] is None:
+            if forward:
+                return [is_null & rest_after]
+            return [is_null & rest_after, not_null]
+        if forward:
+            return [not_null & self._after(self.keys, values, forward), is_null]
+        return [not_null & self._after(self.keys, values, forward)]
+
+    @staticmethod
+    def _after(keys, values, forward):
+        """
+        Строки строго после значений ключей (values) в порядке обхода:
+        k1 > v1 OR (k1 = v1 AND k2 > v2) OR ... плюс граница k1 >= v1,
+        по которой СУБД ищет начало диапазона в индексе.
+        """
+        conditions = []
+        equal = Q()
+        for key, value in zip(keys, values):
+            conditions.append(equal & Q(**{f'{key.name}__{key.lookup(forward)}': value}))
+            equal &= Q(**{key.name: value})
+        bound = Q(**{f'{keys[0].name}__{keys[0].lookup(forward, inclusive=True)}': values[0]})
+        return bound & reduce(or_, conditions)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации (интерфейс близок к django.core.paginator.Page)"""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
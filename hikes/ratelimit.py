@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов к внешнему API (token bucket).
+    Потокобезопасен: acquire() блокирует поток, пока не появится токен.
+    """
+
+    def __init__(self, rate, burst=None):
+        # rate - запросов в секунду, 0 или None - без ограничений
+        self.rate = rate or 0
+        self.capacity = burst or max(1, int(self.rate))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def acquire(self):
+        """Ждёт, пока можно будет сделать очередной запрос"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
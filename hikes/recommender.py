@@ -0,0 +1,196 @@
+"""
+Рекомендации маршрутов с учётом текущих условий.
+
+Итоговый балл маршрута складывается из:
+- текущего балла пригодности (HikeRoute.current_score);
+- байесовски сглаженного рейтинга отзывов: (C * m + сумма оценок) / (C + число оценок),
+  где m - средняя оценка по всем маршрутам, C - RECOMMENDATIONS_RATING_PRIOR;
+- доли маршрутов такой же сложности в избранном и высоко оценённых пользователем;
+- близости старта к пользователю, если он передал координаты.
+
+Первые два слагаемых не зависят от пользователя и считаются заранее
+для всех маршрутов (RouteVectors). Маршруты каждой сложности заранее
+отсортированы по этой части балла, поэтому топ-k собирается слиянием
+трёх отсортированных списков с кучей размера k и останавливается, как
+только верхняя граница оставшихся маршрутов не может попасть в топ.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import geo
+from .models import HikeRoute, Review
+
+DEFAULT_WEIGHTS = {
+    'conditions': 0.45,
+    'rating': 0.3,
+    'preference': 0.15,
+    'distance': 0.1,
+}
+
+DIFFICULTIES = [value for value, label in HikeRoute.DIFFICULTY_CHOICES]
+
+_vectors = None
+_vectors_lock = threading.Lock()
+
+
+def get_weights():
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(getattr(settings, 'RECOMMENDATIONS_WEIGHTS', {}))
+    return weights
+
+
+class RouteVectors:
+    """Заранее рассчитанные признаки всех маршрутов"""
+
+    def __init__(self, rows, weights, prior=5, unknown_score=50, version=0):
+        total_sum = sum(row[5] or 0 for row in rows)
+        total_count = sum(row[6] for row in rows)
+        mean_rating = total_sum / total_count if total_count else 3.0
+
+        self.version = version
+        self.ids = []
+        self.static = []
+        self.lat = []
+        self.lon = []
+        self.groups = {difficulty: [] for difficulty in DIFFICULTIES}
+        for index, (route_id, score, difficulty, lat, lon, rating_sum, rating_count) in enumerate(rows):
+            conditions = (unknown_score if score is None else score) / 100
+            rating = (prior * mean_rating + (rating_sum or 0)) / (prior + rating_count)
+            self.ids.append(route_id)
+            self.static.append(
+                weights['conditions'] * conditions
+                + weights['rating'] * (rating - 1) / 4
+            )
+            self.lat.append(lat)
+            self.lon.append(lon)
+            self.groups.setdefault(difficulty, []).append(index)
+        for indexes in self.groups.values():
+            indexes.sort(key=self.static.__getitem__, reverse=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, version=0):
+        """Собирает признаки всех маршрутов одним запросом"""
+        rows = list(HikeRoute.objects.order_by().values_list(
+            'id', 'current_score', 'difficulty',
+            'start_point_lat', 'start_point_lon',
+            'rating_sum', 'rating_count'
+        ))
+        return cls(
+            rows,
+            get_weights(),
+            prior=getattr(settings, 'RECOMMENDATIONS_RATING_PRIOR', 5),
+            unknown_score=getattr(settings, 'RECOMMENDATIONS_UNKNOWN_SCORE', 50),
+            version=version,
+        )
+
+
+def get_route_vectors():
+    """
+    Признаки маршрутов, пересобираемые раз в RECOMMENDATIONS_VECTORS_TTL секунд.
+    Версия - номер интервала времени, поэтому она совпадает у всех процессов
+    и кэш рекомендаций по сегментам получается общим.
+    """
+    global _vectors
+    ttl = getattr(settings, 'RECOMMENDATIONS_VECTORS_TTL', 300)
+    version = int(time.time() // ttl)
+    with _vectors_lock:
+        if _vectors is None or _vectors.version != version:
+            _vectors = RouteVectors.build(version)
+        return _vectors
+
+
+def reset_route_vectors():
+    """Сбрасывает признаки, чтобы следующий запрос пересобрал их"""
+    global _vectors
+    with _vectors_lock:
+        _vectors = None
+
+
+def get_user_preferences(user):
+    """
+    Доли сложностей среди избранных и высоко оценённых (4-5) маршрутов
+    пользователя, сглаженные по Лапласу и округлённые до 0.1,
+    чтобы пользователи с похожими вкусами попадали в один сегмент кэша.
+    """
+    if not user.is_authenticated:
+        return None
+    counts = Counter(user.favorite_hikes.values_list('difficulty', flat=True))
+    counts.update(
+        Review.objects.filter(user=user, rating__gte=4).values_list('route__difficulty', flat=True)
+    )
+    total = sum(counts.values())
+    if not total:
+        return None
+    return {
+        difficulty: round((counts[difficulty] + 1) / (total + len(DIFFICULTIES)), 1)
+        for difficulty in DIFFICULTIES
+    }
+
+
+def top_k(vectors, k, preferences=None, location=None, weights=None):
+    """
+    Индексы k лучших маршрутов по убыванию итогового балла.
+    location - (lat, lon) пользователя или None.
+    """
+    weights = weights or get_weights()
+    preferences = preferences or {d: 1 / len(DIFFICULTIES) for d in DIFFICULTIES}
+    distance_weight = weights['distance'] if location else 0
+    scale = getattr(settings, 'RECOMMENDATIONS_DISTANCE_SCALE_KM', 50)
+
+    def ordered(difficulty, indexes):
+        bonus = weights['preference'] * preferences.get(difficulty, 0)
+        for index in indexes:
+            yield -(vectors.static[index] + bonus), index
+
+    candidates = heapq.merge(*(
+        ordered(difficulty, indexes) for difficulty, indexes in vectors.groups.items()
+    ))
+    best = []
+    for negative_bound, index in candidates:
+        bound = -negative_bound
+        # Даже с максимальным бонусом за близость маршрут не попадёт в топ - дальше только хуже
+        if len(best) >= k and bound + distance_weight <= best[0][0]:
+            break
+        score = bound
+        if distance_weight:
+            distance = geo.haversine_km(location[0], location[1], vectors.lat[index], vectors.lon[index])
+            score += distance_weight * math.exp(-distance / scale)
+        if len(best) < k:
+            heapq.heappush(best, (score, index))
+        elif score > best[0][0]:
+            heapq.heapreplace(best, (score, index))
+    return [index for score, index in sorted(best, reverse=True)]
+
+
+def get_recommended_route_ids(user, k, location=None):
+    """
+    id рекомендованных маршрутов. Результат кэшируется на сегмент
+    пользователей: предпочтения по сложности и грубая ячейка местоположения.
+    """
+    vectors = get_route_vectors()
+    preferences = get_user_preferences(user)
+    segment = [
+        str(vectors.version),
+        str(k),
+        ','.join(f'{preferences[d]:.1f}' for d in DIFFICULTIES) if preferences else 'any',
+    ]
+    if location:
+        cell = geo.grid_cell(location[0], location[1], resolution=0.25)
+        # Внутри сегмента считаем от центра ячейки, чтобы результат был общим
+        location = (cell.lat, cell.lon)
+        segment.append(cell.key)
+    key = 'recommendations:' + ':'.join(segment)
+    route_ids = cache.get(key)
+    if route_ids is None:
+        route_ids = [vectors.ids[i] for i in top_k(vectors, k, preferences, location)]
+        cache.set(key, route_ids, getattr(settings, 'RECOMMENDATIONS_CACHE_TTL', 300))
+    return route_ids
@@ -0,0 +1,99 @@
+"""
+Полнотекстовый поиск по каталогу маршрутов.
+
+SQLite: виртуальная таблица FTS5 hikes_hikeroute_fts (external content
+поверх hikes_hikeroute), которую триггеры обновляют при каждой записи
+маршрута. Русской морфологии в FTS5 нет, поэтому слова запроса
+обрезаются до основы простым стеммером и ищутся по префиксу.
+
+PostgreSQL: GIN-индекс по выражению to_tsvector('russian', ...) с весами
+(название - A, описание - B), ранжирование ts_rank, префиксный поиск :*.
+
+Остальные СУБД: поиск подстроки (icontains) без ранжирования.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'hikes_hikeroute_fts'
+
+# Взвешенный tsvector; выражение должно совпадать с индексом из миграции
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(hikes_hikeroute.title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(hikes_hikeroute.description, '')), 'B')"
+)
+
+# Окончания русских слов, от длинных к коротким
+RUSSIAN_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ией', 'иях', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ую', 'юю',
+    'ом', 'ем', 'ах', 'ях', 'ов', 'ев', 'ам', 'ям', 'ия', 'ье', 'ья',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+], key=len, reverse=True)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Слова запроса в нижнем регистре, ё заменена на е"""
+    return [word.lower().replace('ё', 'е') for word in WORD_RE.findall(query)][:10]
+
+
+def stem(word):
+    """Грубая основа русского слова: отрезает окончание, оставляя минимум 3 буквы"""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def build_fts5_query(query):
+    """Запрос FTS5: все основы слов должны встретиться, поиск по префиксу"""
+    return ' '.join(f'"{stem(word)}"*' for word in tokenize(query))
+
+
+def build_tsquery(query):
+    """Запрос to_tsquery: все слова с префиксным поиском"""
+    return ' & '.join(f'{word}:*' for word in tokenize(query))
+
+
+def search_routes(queryset, query):
+    """
+    Фильтрует маршруты по поисковому запросу и добавляет аннотацию
+    search_rank (чем больше, тем релевантнее).
+    """
+    if not tokenize(query):
+        return queryset.none()
+
+    if connection.vendor == 'sqlite':
+        # Соединение с FTS-таблицей: bm25 считается один раз на найденную строку.
+        # Коррелированный подзапрос на каждую строку на 100k маршрутов в сотни раз медленнее.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = hikes_hikeroute.id', f'{FTS_TABLE} MATCH %s'],
+            params=[build_fts5_query(query)],
+            # bm25 тем меньше, чем лучше совпадение; совпадение в названии весит в 10 раз больше
+            select={'search_rank': f'-bm25({FTS_TABLE}, 10.0, 1.0)'},
+        )
+
+    if connection.vendor == 'postgresql':
+        tsquery = build_tsquery(query)
+        return queryset.filter(
+            RawSQL(
+                f"({POSTGRES_VECTOR}) @@ to_tsquery('russian', %s)",
+                [tsquery],
+                output_field=BooleanField()
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({POSTGRES_VECTOR}, to_tsquery('russian', %s))",
+                [tsquery],
+                output_field=FloatField()
+            )
+        )
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
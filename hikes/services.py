@@ -0,0 +1,267 @@
+import random
+import threading
+from datetime import datetime
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .metrics import observe_provider
+from .weather_client import OpenWeatherMapClient
+
+_weather_client = None
+_weather_client_lock = threading.Lock()
+
+# Веса общего балла маршрута по умолчанию (настройка ROUTE_SCORE_WEIGHTS)
+DEFAULT_SCORE_WEIGHTS = {
+    'weather': 0.5,
+    'parking': 0.3,
+    'difficulty': 0.2,
+}
+# Балл за сложность (легкие маршруты получают больше баллов)
+DIFFICULTY_SCORES = {
+    'easy': 90,
+    'medium': 70,
+    'hard': 50,
+}
+UNKNOWN_DIFFICULTY_SCORE = 50
+
+
+def get_score_weights(weights=None):
+    """Веса (погода, парковка, сложность): переданные или из настроек"""
+    if weights is None:
+        weights = getattr(settings, 'ROUTE_SCORE_WEIGHTS', DEFAULT_SCORE_WEIGHTS)
+    return weights['weather'], weights['parking'], weights['difficulty']
+
+
+def get_weather_client():
+    """Общий для процесса клиент OpenWeatherMap (один пул соединений)"""
+    global _weather_client
+    with _weather_client_lock:
+        if _weather_client is None:
+            _weather_client = OpenWeatherMapClient(
+                api_key=settings.OPENWEATHERMAP_API_KEY,
+                base_url=settings.OPENWEATHERMAP_URL,
+                connect_timeout=settings.OPENWEATHERMAP_CONNECT_TIMEOUT,
+                read_timeout=settings.OPENWEATHERMAP_READ_TIMEOUT,
+                pool_size=settings.OPENWEATHERMAP_POOL_SIZE,
+                retries=settings.OPENWEATHERMAP_RETRIES,
+            )
+        return _weather_client
+
+
+def reset_weather_client():
+    """Закрывает клиент, чтобы следующий запрос создал его с текущими настройками"""
+    global _weather_client
+    with _weather_client_lock:
+        if _weather_client is not None:
+            _weather_client.close()
+        _weather_client = None
+
+
+class WeatherService:
+    """Сервис для работы с погодными данными"""
+    
+    @staticmethod
+    @observe_provider('weather')
+    def get_weather_data(lat, lon):
+        """
+        Погода для координат от провайдера из настройки WEATHER_PROVIDER:
+        'demo' - случайные демо-данные, 'openweathermap' - One Call API 3.0
+        """
+        if getattr(settings, 'WEATHER_PROVIDER', 'demo') == 'openweathermap':
+            return get_weather_client().get_weather_data(lat, lon)
+        return WeatherService.get_demo_weather_data(lat, lon)
+    
+    @staticmethod
+    def get_demo_weather_data(lat, lon):
+        """
+        Генерирует демо-данные о погоде для заданных координат
+        В реальном проекте здесь будет запрос к OpenWeatherMap API
+        """
+        # Генерируем реалистичные данные
+        base_temp = random.randint(10, 25)  # Базовая температура
+        
+        # Прогноз на ближайшие 12 часов, начиная с текущего часа (местное время)
+        now = timezone.localtime()
+        start = now.replace(minute=0, second=0, microsecond=0)
+        times = []
+        temps = []
+        
+        for i in range(12):
+            hour_of_day = (start.hour + i) % 24
+            times.append(f'{hour_of_day:02d}:00')
+            
+            # Температура меняется по синусоиде в течение дня
+            temp_variation = 5 * (1 - abs(hour_of_day - 12) / 12)  # Пик в 12 часов
+            temp = base_temp + temp_variation + random.uniform(-2, 2)
+            temps.append(round(temp, 1))
+        
+        # Описание погоды в зависимости от температуры
+        if base_temp < 15:
+            description = "Прохладно, возьмите куртку"
+            icon = "cloud"
+        elif base_temp < 20:
+            description = "Комфортно, идеально для похода"
+            icon = "sun-cloud"
+        else:
+            description = "Тепло, возьмите воду"
+            icon = "sun"
+        
+        # Вероятность осадков
+        precipitation = random.randint(0, 50)
+        
+        return {
+            'current': {
+                'temperature': base_temp,
+                'feels_like': base_temp - random.randint(0, 3),
+                'description': description,
+                'icon': icon,
+                'humidity': random.randint(40, 80),
+                'wind_speed': random.randint(1, 10),
+                'precipitation_chance': precipitation,
+            },
+            'forecast': {
+                # Выпуск и первый час прогноза (Unix time) - для хранилища прогнозов
+                'run_at': int(now.timestamp()),
+                'start': int(start.timestamp()),
+                'utc_offset': int(now.utcoffset().total_seconds()),
+                'labels': times,
+                'temperatures': temps,
+                'precipitation': [random.randint(0, precipitation) for _ in range(12)],
+            }
+        }
+    
+    @staticmethod
+    def get_weather_quality_score(weather_data):
+        """Рассчитывает балл качества погоды от 0 до 100"""
+        current = weather_data['current']
+        scores = WeatherService.get_weather_quality_scores(
+            [current['precipitation_chance']],
+            [current['wind_speed']],
+            [current['temperature']],
+        )
+        return scores[0].item()
+    
+    @staticmethod
+    def get_weather_quality_scores(precipitation_chance, wind_speed, temperature):
+        """
+        Баллы качества погоды (0-100) сразу для многих точек: массивы
+        вероятности осадков, скорости ветра и температуры одной длины.
+        Возвращает массив NumPy; тип значений - как у precipitation_chance.
+        """
+        precipitation_chance = np.asarray(precipitation_chance)
+        wind_speed = np.asarray(wind_speed)
+        temperature = np.asarray(temperature)
+        
+        # Штраф за осадки
+        score = 100 - precipitation_chance
+        
+        # Штраф за сильный ветер
+        score = score - np.where(wind_speed > 8, 20, np.where(wind_speed > 5, 10, 0))
+        
+        # Бонус за комфортную температуру (15-25°C)
+        comfortable = (temperature >= 15) & (temperature <= 25)
+        extreme = (temperature < 5) | (temperature > 30)
+        score = score + np.where(comfortable, 10, np.where(extreme, -20, 0))
+        
+        return np.clip(score, 0, 100)
+
+
+class ParkingService:
+    """Сервис для работы с данными о парковках"""
+    
+    @staticmethod
+    @observe_provider('parking')
+    def get_parking_status(lat, lon):
+        """
+        Генерирует демо-статус парковки
+        В реальном проекте здесь будет запрос к Google Maps API
+        """
+        current_hour = datetime.now().hour
+        
+        # Логика: утром парковки заняты, днем свободны
+        if 7 <= current_hour <= 9:
+            status = 'busy'
+            description = 'Утренний час пик, мало мест'
+            score = 40
+        elif 9 < current_hour <= 17:
+            status = 'available'
+            description = 'Достаточно свободных мест'
+            score = 80
+        elif 17 < current_hour <= 20:
+            status = 'limited'
+            description = 'Вечерний наплыв, места есть'
+            score = 60
+        else:
+            status = 'available'
+            description = 'Ночью много свободных мест'
+            score = 90
+        
+        # Добавляем случайность для реалистичности
+        if random.random() < 0.2:
+            status = random.choice(['available', 'limited', 'busy'])
+            score = random.randint(30, 95)
+        
+        status_texts = {
+            'available': 'Свободно',
+            'limited': 'Ограничено',
+            'busy': 'Занято',
+        }
+        
+        return {
+            'status': status,
+            'status_text': status_texts.get(status, 'Неизвестно'),
+            'description': description,
+            'score': score,
+            'last_checked': timezone.now().strftime('%H:%M'),
+        }
+
+
+class RouteAnalyzer:
+    """Анализатор маршрутов"""
+    
+    @staticmethod
+    def calculate_overall_score(route, weather_score, parking_score, weights=None):
+        """Рассчитывает общий балл маршрута (0-100)"""
+        weather_weight, parking_weight, difficulty_weight = get_score_weights(weights)
+        difficulty_score = DIFFICULTY_SCORES.get(route.difficulty, UNKNOWN_DIFFICULTY_SCORE)
+        total_score = RouteAnalyzer.calculate_overall_scores(
+            [weather_score], [parking_score], [route.difficulty], weights
+        )[0].item()
+        
+        return {
+            'overall_score': total_score,
+            'weather_score': weather_score,
+            'parking_score': parking_score,
+            'difficulty_score': difficulty_score,
+            'breakdown': {
+                'weather': f"{weather_score}/100 ({weather_weight*100}%)",
+                'parking': f"{parking_score}/100 ({parking_weight*100}%)",
+                'difficulty': f"{difficulty_score}/100 ({difficulty_weight*100}%)",
+            }
+        }
+    
+    @staticmethod
+    def get_difficulty_scores(difficulties):
+        """Баллы за сложность для массива значений HikeRoute.difficulty"""
+        difficulties = np.asarray(difficulties)
+        scores = np.full(difficulties.shape, UNKNOWN_DIFFICULTY_SCORE, dtype=np.int64)
+        for difficulty, score in DIFFICULTY_SCORES.items():
+            scores[difficulties == difficulty] = score
+        return scores
+    
+    @staticmethod
+    def calculate_overall_scores(weather_scores, parking_scores, difficulties, weights=None):
+        """
+        Общие баллы (0-100) сразу для многих маршрутов: массивы баллов погоды,
+        парковки и сложностей маршрутов одной длины. Возвращает массив NumPy
+        целых чисел; результат совпадает с calculate_overall_score
+        (те же операции в том же порядке, округление половин к чётному, как round).
+        """
+        weather_weight, parking_weight, difficulty_weight = get_score_weights(weights)
+        total_score = (
+            np.asarray(weather_scores) * weather_weight +
+            np.asarray(parking_scores) * parking_weight +
+            RouteAnalyzer.get_difficulty_scores(difficulties) * difficulty_weight
+        )
+        return np.rint(total_score).astype(np.int64)
@@ -0,0 +1,138 @@
+"""
+Поддержка денормализованных счётчиков HikeRoute: rating_sum, rating_count
+и favorites_count. Обновления атомарные (F-выражения), поэтому параллельные
+запросы не теряют изменения. Уменьшение ограничено нулём (Greatest):
+у PositiveIntegerField в базе CHECK (>= 0), и разошедшийся с данными
+счётчик иначе не дал бы удалить отзыв или пользователя. Пересчитать
+счётчики с нуля можно командой rebuild_route_stats.
+
+Здесь же сбрасывается кэш страниц каталога и обновляются счётчики
+страницы "О проекте" (см. hikes/caching.py) - после фиксации транзакции,
+чтобы кэш не заполнился данными, которые ещё не видны другим запросам.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching
+from .models import HikeRoute, PointOfInterest, Review
+
+# Модель -> имя счётчика страницы "О проекте"
+STAT_NAMES = {model: name for name, model in caching.SITE_STATS.items()}
+
+
+def counter_change(name, delta):
+    """F-выражение: счётчик name плюс delta, но не меньше нуля"""
+    if delta >= 0:
+        return F(name) + delta
+    return Greatest(F(name) + delta, 0)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        HikeRoute.objects.filter(pk=instance.route_id).update(
+            rating_sum=counter_change('rating_sum', instance.rating),
+            rating_count=counter_change('rating_count', 1)
+        )
+    else:
+        old_rating = getattr(instance, '_loaded_rating', None)
+        if old_rating is not None and old_rating != instance.rating:
+            HikeRoute.objects.filter(pk=instance.route_id).update(
+                rating_sum=counter_change('rating_sum', instance.rating - old_rating)
+            )
+    instance._loaded_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    HikeRoute.objects.filter(pk=instance.route_id).update(
+        rating_sum=counter_change('rating_sum', -instance.rating),
+        rating_count=counter_change('rating_count', -1)
+    )
+
+
+@receiver(m2m_changed, sender=HikeRoute.favorited_by.through)
+def favorites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        sign = 1 if action == 'post_add' else -1
+        if reverse:
+            # user.favorite_hikes.add(...): instance - пользователь, pk_set - маршруты
+            HikeRoute.objects.filter(pk__in=pk_set).update(
+                favorites_count=counter_change('favorites_count', sign)
+            )
+        else:
+            HikeRoute.objects.filter(pk=instance.pk).update(
+                favorites_count=counter_change('favorites_count', sign * len(pk_set))
+            )
+    elif action == 'pre_clear' and reverse:
+        instance._cleared_favorite_ids = list(
+            instance.favorite_hikes.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        if reverse:
+            HikeRoute.objects.filter(pk__in=getattr(instance, '_cleared_favorite_ids', [])).update(
+                favorites_count=counter_change('favorites_count', -1)
+            )
+        else:
+            HikeRoute.objects.filter(pk=instance.pk).update(favorites_count=0)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Строки избранного удаляются каскадом без m2m-сигналов
+    HikeRoute.objects.filter(favorited_by=instance).update(
+        favorites_count=counter_change('favorites_count', -1)
+    )
+
+
+def changed_scopes(sender, instance, created):
+    """Области кэша каталога (hikes/caching.py), которые затрагивает изменение объекта"""
+    scopes = [caching.STATS] if created else []
+    if sender is HikeRoute:
+        scopes += [caching.ROUTES, caching.route_scope(instance.pk)]
+    elif sender is Review:
+        scopes += [caching.RATINGS, caching.route_scope(instance.route_id)]
+    return scopes
+
+
+@receiver(post_save, sender=HikeRoute)
+@receiver(post_save, sender=PointOfInterest)
+@receiver(post_save, sender=Review)
+def catalog_object_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: caching.adjust_stat(STAT_NAMES[sender], 1))
+    scopes = changed_scopes(sender, instance, created)
+    if scopes:
+        transaction.on_commit(lambda: caching.invalidate(*scopes))
+
+
+@receiver(post_delete, sender=HikeRoute)
+@receiver(post_delete, sender=PointOfInterest)
+@receiver(post_delete, sender=Review)
+def catalog_object_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: caching.adjust_stat(STAT_NAMES[sender], -1))
+    scopes = changed_scopes(sender, instance, created=True)
+    transaction.on_commit(lambda: caching.invalidate(*scopes))
+
+
+@receiver(m2m_changed, sender=HikeRoute.favorited_by.through)
+def favorites_changed_invalidate(sender, instance, action, reverse, pk_set, **kwargs):
+    # Карточки маршрутов не показывают число добавлений в избранное -
+    # сбрасывается только избранное затронутых пользователей
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_user_ids = list(instance.favorited_by.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', [])
+    else:
+        user_ids = pk_set or []
+    scopes = [caching.favorites_scope(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: caching.invalidate(*scopes))
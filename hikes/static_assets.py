@@ -0,0 +1,100 @@
+"""
+Сторонние статические файлы: Bootstrap, Font Awesome и Chart.js.
+
+Версии закреплены, у каждого файла есть адрес на CDN и путь в static/.
+Команда vendor_static скачивает их в static/vendor/ (дальше их, как и
+свои файлы, раздаёт WhiteNoise со сжатием и хэшами в именах), а Font
+Awesome урезает до иконок, которые встречаются в шаблонах и скриптах.
+Тег {% vendor %} (hikes/templatetags/assets.py) ссылается на локальную
+копию, а пока её нет - на тот же закреплённый файл на CDN.
+"""
+import re
+from collections import namedtuple
+
+Asset = namedtuple('Asset', ['url', 'path'])
+
+# Каталог внутри static/ для скачанных файлов
+VENDOR_DIR = 'vendor'
+
+FONTAWESOME_VERSION = '6.4.0'
+FONTAWESOME_URL = f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FONTAWESOME_VERSION}'
+
+ASSETS = {
+    'bootstrap.css': Asset(
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        'vendor/bootstrap/bootstrap.min.css',
+    ),
+    'bootstrap.js': Asset(
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+    ),
+    # Локальная копия - только используемые иконки (subset_fontawesome_css)
+    'fontawesome.css': Asset(
+        f'{FONTAWESOME_URL}/css/all.min.css',
+        'vendor/fontawesome/css/icons.css',
+    ),
+    'chart.js': Asset(
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js',
+        'vendor/chartjs/chart.umd.js',
+    ),
+}
+# Полный CSS Font Awesome (без минификации), из которого собирается icons.css
+FONTAWESOME_SOURCE_CSS = f'{FONTAWESOME_URL}/css/all.css'
+FONTAWESOME_WEBFONTS_URL = f'{FONTAWESOME_URL}/webfonts/'
+
+# Правило иконки: ".fa-name::before { content: "\f015"; }" (возможно, с псевдонимами)
+ICON_RULE = re.compile(
+    r'((?:\.fa-[a-z0-9-]+::?before\s*,\s*)*\.fa-[a-z0-9-]+::?before)\s*\{\s*content:\s*"([^"]*)";?\s*\}'
+)
+ICON_SELECTOR = re.compile(r'\.fa-([a-z0-9-]+)::?before')
+ICON_CLASS = re.compile(r'\bfa-([a-z0-9-]+)')
+# Запасной вариант в формате TrueType не нужен: woff2 поддерживают все браузеры
+TRUETYPE_SOURCE = re.compile(r',\s*url\([^)]*\.ttf["\']?\)\s*format\("truetype"\)')
+WEBFONT_URL = re.compile(r'url\(["\']?\.\./webfonts/([^)"\']+\.woff2)["\']?\)')
+# Ссылки на карты исходников: без самих .map-файлов ManifestStaticFilesStorage
+# не соберёт статику (collectstatic проверяет, что файл существует)
+SOURCE_MAP = re.compile(rb'\n?(?://# sourceMappingURL=[^\n]*|/\*# sourceMappingURL=[^*]*\*/)\s*$')
+
+
+def strip_source_map(content):
+    """Убирает комментарий sourceMappingURL в конце JS или CSS (bytes)"""
+    return SOURCE_MAP.sub(b'\n', content)
+
+
+def find_used_icons(texts):
+    """Имена иконок (без префикса fa-), которые встречаются в текстах шаблонов и скриптов"""
+    icons = set()
+    for text in texts:
+        icons.update(ICON_CLASS.findall(text))
+    return icons
+
+
+def _codepoint(content):
+    """Код символа из значения content: "\\f015" или сам символ"""
+    if content.startswith('\\'):
+        return int(content[1:], 16)
+    return ord(content)
+
+
+def subset_fontawesome_css(css, used_icons):
+    """
+    Оставляет в CSS Font Awesome только правила используемых иконок
+    (остальные правила - шрифты, размеры, анимации - не трогает).
+    Возвращает (css, имена файлов шрифтов woff2, коды оставленных символов).
+    """
+    codepoints = set()
+
+    def keep_used(match):
+        names = [name for name in ICON_SELECTOR.findall(match.group(1)) if name in used_icons]
+        if not names:
+            return ''
+        codepoints.add(_codepoint(match.group(2)))
+        selectors = ', '.join(f'.fa-{name}::before' for name in names)
+        return f'{selectors} {{ content: "{match.group(2)}"; }}'
+
+    css = ICON_RULE.sub(keep_used, css)
+    css = TRUETYPE_SOURCE.sub('', css)
+    # Пустые строки после удалённых правил
+    css = re.sub(r'\n\s*\n+', '\n', css)
+    fonts = sorted(set(WEBFONT_URL.findall(css)))
+    return css, fonts, codepoints
@@ -0,0 +1,43 @@
+"""Пересчёт денормализованных счётчиков маршрутов"""
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def route_stats_expressions(route_model, review_model):
+    """Выражения для UPDATE, считающие счётчики маршрута подзапросами"""
+    reviews = review_model.objects.filter(route=OuterRef('pk')).order_by().values('route')
+    favorites = route_model.favorited_by.through.objects.filter(
+        hikeroute=OuterRef('pk')
+    ).order_by().values('hikeroute')
+    zero = Value(0, output_field=IntegerField())
+    return {
+        'rating_sum': Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), zero),
+        'rating_count': Coalesce(Subquery(reviews.annotate(total=Count('pk')).values('total')), zero),
+        'favorites_count': Coalesce(Subquery(favorites.annotate(total=Count('pk')).values('total')), zero),
+    }
+
+
+def rebuild_route_stats(route_model=None, review_model=None, batch_size=1000):
+    """
+    Пересчитывает rating_sum, rating_count и favorites_count для всех
+    маршрутов порциями по batch_size, каждая порция - отдельная короткая транзакция.
+    Возвращает число обработанных маршрутов.
+    """
+    if route_model is None:
+        from .models import HikeRoute as route_model, Review as review_model
+    expressions = route_stats_expressions(route_model, review_model)
+    total = 0
+    last_id = 0
+    while True:
+        ids = list(
+            route_model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            route_model.objects.filter(pk__in=ids).update(**expressions)
+        total += len(ids)
+        last_id = ids[-1]
+    return total
@@ -0,0 +1,142 @@
+"""
+Локальный сервер-заглушка OpenWeatherMap One Call API 3.0.
+
+Используется в тестах и для локальной разработки без ключа API:
+
+    python -m hikes.stub_server --port 8081
+
+и в настройках WEATHER_PROVIDER=openweathermap,
+OPENWEATHERMAP_URL=http://127.0.0.1:8081.
+Ответ детерминирован и зависит только от координат.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def build_one_call_payload(lat, lon, now=None):
+    """Ответ в формате One Call API для точки"""
+    now = int(now or time.time())
+    hour_start = now - now % 3600
+    base_temp = 10 + (abs(lat) + abs(lon)) % 15
+    pop = round(((lat * 7 + lon * 3) % 50) / 100, 2)
+    return {
+        'lat': lat,
+        'lon': lon,
+        'timezone': 'Europe/Moscow',
+        'timezone_offset': 3 * 3600,
+        'current': {
+            'dt': now,
+            'temp': round(base_temp, 2),
+            'feels_like': round(base_temp - 1.5, 2),
+            'humidity': 60,
+            'wind_speed': 4.2,
+            'weather': [{'id': 802, 'main': 'Clouds', 'description': 'переменная облачность', 'icon': '03d'}],
+        },
+        'hourly': [
+            {
+                'dt': hour_start + i * 3600,
+                'temp': round(base_temp + 3 * (1 - abs(i - 6) / 6), 2),
+                'pop': pop,
+            }
+            for i in range(48)
+        ],
+    }
+
+
+class OneCallStubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests += 1
+        url = urlparse(self.path)
+        if url.path != '/data/3.0/onecall':
+            self._send(404, {'cod': 404, 'message': 'Not found'})
+            return
+        if stub.delay:
+            time.sleep(stub.delay)
+        with stub.lock:
+            fail = stub.fail_next > 0
+            if fail:
+                stub.fail_next -= 1
+        if fail:
+            self._send(503, {'cod': 503, 'message': 'Service unavailable'})
+            return
+        params = parse_qs(url.query)
+        if not params.get('appid'):
+            self._send(401, {'cod': 401, 'message': 'Invalid API key'})
+            return
+        try:
+            lat = float(params['lat'][0])
+            lon = float(params['lon'][0])
+        except (KeyError, ValueError):
+            self._send(400, {'cod': 400, 'message': 'wrong latitude or longitude'})
+            return
+        self._send(200, build_one_call_payload(lat, lon))
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OneCallStubServer:
+    """
+    Сервер-заглушка в фоновом потоке.
+    delay - задержка ответа в секундах, fail_next - сколько следующих
+    запросов завершить ошибкой 503.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0):
+        self.delay = delay
+        self.fail_next = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), OneCallStubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заглушка OpenWeatherMap One Call API 3.0')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--delay', type=float, default=0)
+    args = parser.parse_args()
+    server = OneCallStubServer(args.host, args.port, args.delay)
+    print(f'Заглушка OpenWeatherMap запущена на {server.url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
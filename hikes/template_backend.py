@@ -0,0 +1,55 @@
+"""
+Шаблонизатор Django с учётом времени отрисовки (метрика
+hikeweather_template_render_seconds и Server-Timing).
+
+Замеряется отрисовка шаблона целиком, вместе с include и наследованием;
+вложенные шаблоны отдельно не учитываются.
+"""
+import time
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import get_template
+
+from . import metrics
+
+
+class TimedTemplate:
+    """Обёртка шаблона бэкенда, замеряющая render()"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.observe_template(self.template.origin.template_name, time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates, шаблоны которого замеряют время отрисовки"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def preload_templates():
+    """
+    Компилирует шаблоны TEMPLATE_PRELOAD заранее, чтобы первый запрос
+    к странице не ждал разбора шаблонов. Без кэширующего загрузчика
+    (TEMPLATE_CACHE=0) не имеет смысла и ничего не делает.
+    """
+    if not getattr(settings, 'TEMPLATE_CACHE', True):
+        return 0
+    names = getattr(settings, 'TEMPLATE_PRELOAD', [])
+    for name in names:
+        get_template(name)
+    return len(names)
@@ -0,0 +1,29 @@
+"""Ссылки на сторонние статические файлы: локальная копия или CDN"""
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+from hikes.static_assets import ASSETS
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def is_vendored(path):
+    """Есть ли файл в static/ (скачан командой vendor_static); проверяется один раз на процесс"""
+    return finders.find(path) is not None
+
+
+@register.simple_tag
+def vendor(name):
+    """
+    {% vendor 'bootstrap.css' %} - адрес файла из hikes.static_assets.ASSETS:
+    локальная копия через staticfiles (с хэшем в имени при ManifestStaticFilesStorage),
+    а если её ещё не скачали - закреплённая версия на CDN.
+    """
+    asset = ASSETS[name]
+    if is_vendored(asset.path):
+        return static(asset.path)
+    return asset.url
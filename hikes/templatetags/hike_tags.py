@@ -0,0 +1,89 @@
+"""
+Карточка маршрута и звёзды рейтинга.
+
+Разметка зависит только от показанных значений, поэтому каждое сочетание
+значений рендерится по шаблону один раз на процесс, дальше - готовая
+строка из памяти. При изменении шаблонов под runserver запомненное
+сбрасывается вместе с кэшем загрузчика шаблонов, а с TEMPLATE_CACHE=0
+разметка не запоминается вовсе.
+"""
+import math
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils.autoreload import file_changed
+
+register = template.Library()
+
+STAR_RATING_TEMPLATE = 'hikes/includes/star_rating.html'
+ROUTE_CARD_TEMPLATE = 'hikes/includes/route_card.html'
+# Поля маршрута, которые показывает карточка (ключ запомненной разметки)
+ROUTE_CARD_FIELDS = [
+    'id', 'title', 'description', 'difficulty', 'current_score',
+    'length_km', 'estimated_time_h', 'avg_rating', 'reviews_count',
+]
+ROUTE_CARD_CACHE_SIZE = 2048
+
+
+def _memoize():
+    return getattr(settings, 'TEMPLATE_CACHE', True)
+
+
+def star_counts(rating, rounded=False):
+    """
+    (полных, пустых) звёзд из 5: целая часть рейтинга, а с rounded -
+    округление половины вверх, как у фильтра floatformat:0.
+    """
+    rating = min(max(float(rating or 0), 0), 5)
+    if rounded:
+        full = int(Decimal(repr(rating)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    else:
+        full = math.floor(rating)
+    return full, 5 - full
+
+
+@lru_cache(maxsize=None)
+def _render_stars(full, empty, size):
+    return render_to_string(STAR_RATING_TEMPLATE, {
+        'full': range(full), 'empty': range(empty), 'size': f' {size}' if size else '',
+    })
+
+
+@register.simple_tag
+def star_rating(rating, rounded=False, size=''):
+    """
+    {% star_rating hike.avg_rating %} - пять звёзд рейтинга; rounded=True - рейтинг
+    округляется до целой звезды, size - дополнительный класс иконок (например, fa-lg).
+    """
+    render = _render_stars if _memoize() else _render_stars.__wrapped__
+    return render(*star_counts(rating, rounded), size)
+
+
+@lru_cache(maxsize=ROUTE_CARD_CACHE_SIZE)
+def _render_route_card(values):
+    hike = dict(zip(ROUTE_CARD_FIELDS + ['difficulty_display'], values))
+    return render_to_string(ROUTE_CARD_TEMPLATE, {'hike': hike})
+
+
+@register.simple_tag
+def route_card(hike):
+    """{% route_card hike %} - карточка маршрута в каталоге"""
+    values = tuple(getattr(hike, field) for field in ROUTE_CARD_FIELDS)
+    render = _render_route_card if _memoize() else _render_route_card.__wrapped__
+    return render(values + (hike.get_difficulty_display(),))
+
+
+def clear_rendered():
+    """Сбрасывает запомненную разметку"""
+    _render_stars.cache_clear()
+    _render_route_card.cache_clear()
+
+
+@receiver(file_changed, dispatch_uid='hikes_rendered_fragments_reset')
+def template_changed(sender, file_path, **kwargs):
+    if file_path.suffix == '.html':
+        clear_rendered()
@@ -5,6 +5,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about, name='about'),
     path('recommendations/', views.recommendations, name='recommendations'),
+    path('nearby/', views.nearby_hikes, name='nearby'),
     path('register/', views.register, name='register'),
     
     path('hike/create/', views.hike_create, name='hike_create'),
@@ -12,4 +13,12 @@ urlpatterns = [
     path('my-hikes/', views.my_hikes, name='my_hikes'),
     path('favorites/', views.favorites, name='favorites'),
     path('hike/<int:hike_id>/toggle-favorite/', views.toggle_favorite, name='toggle_favorite'),
+
+    path('api/hikes/', views.api_hikes, name='api_hikes'),
+    path('api/hikes/<int:hike_id>/forecast/', views.api_forecast, name='api_forecast'),
+    path('api/hikes/<int:hike_id>/history/', views.api_history, name='api_history'),
+    path('api/conditions/', views.api_conditions, name='api_conditions'),
+    path('api/nearby/', views.api_nearby, name='api_nearby'),
+
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,263 +1,192 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib import messages
-from django.db.models import Q, Count, Avg
 from django.core.paginator import Paginator
-from django.http import JsonResponse  # <-- ДОБАВЛЕНО
-
-import random
-from datetime import datetime, timedelta
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.urls import reverse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse  # <-- ДОБАВЛЕНО
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from django.views.decorators.http import require_GET
+
+import hashlib
+from datetime import timedelta
 
-from .models import HikeRoute, PointOfInterest, Review
+from .models import HikeRoute, Review
 from .forms import HikeRouteForm, ReviewForm, UserRegistrationForm
+from . import caching, conditions, forecasts, history, metrics, nearby, recommender, search
+from .db_routers import read_from_replica
+from .favorites import set_favorite
+from .pagination import CursorPaginator
 
 
-class WeatherService:
-    """Сервис для работы с погодными данными"""
-    
-    @staticmethod
-    def get_demo_weather_data(lat, lon):
-        """
-        Генерирует демо-данные о погоде для заданных координат
-        В реальном проекте здесь будет запрос к OpenWeatherMap API
-        """
-        # Генерируем реалистичные данные
-        base_temp = random.randint(10, 25)  # Базовая температура
-        
-        # Время для графика (ближайшие 12 часов)
-        times = []
-        temps = []
-        current_time = datetime.now()
-        
-        for i in range(12):
-            hour = (current_time + timedelta(hours=i)).strftime('%H:00')
-            times.append(hour)
-            
-            # Температура меняется по синусоиде в течение дня
-            hour_of_day = (current_time.hour + i) % 24
-            temp_variation = 5 * (1 - abs(hour_of_day - 12) / 12)  # Пик в 12 часов
-            temp = base_temp + temp_variation + random.uniform(-2, 2)
-            temps.append(round(temp, 1))
-        
-        # Описание погоды в зависимости от температуры
-        if base_temp < 15:
-            description = "Прохладно, возьмите куртку"
-            icon = "cloud"
-        elif base_temp < 20:
-            description = "Комфортно, идеально для похода"
-            icon = "sun-cloud"
-        else:
-            description = "Тепло, возьмите воду"
-            icon = "sun"
-        
-        # Вероятность осадков
-        precipitation = random.randint(0, 50)
-        
-        return {
-            'current': {
-                'temperature': base_temp,
-                'feels_like': base_temp - random.randint(0, 3),
-                'description': description,
-                'icon': icon,
-                'humidity': random.randint(40, 80),
-                'wind_speed': random.randint(1, 10),
-                'precipitation_chance': precipitation,
-            },
-            'forecast': {
-                'labels': times,
-                'temperatures': temps,
-                'precipitation': [random.randint(0, precipitation) for _ in range(12)],
-            }
-        }
-    
-    @staticmethod
-    def get_weather_quality_score(weather_data):
-        """Рассчитывает балл качества погоды от 0 до 100"""
-        current = weather_data['current']
-        
-        score = 100
-        
-        # Штраф за осадки
-        score -= current['precipitation_chance']
-        
-        # Штраф за сильный ветер
-        if current['wind_speed'] > 8:
-            score -= 20
-        elif current['wind_speed'] > 5:
-            score -= 10
-        
-        # Бонус за комфортную температуру (15-25°C)
-        if 15 <= current['temperature'] <= 25:
-            score += 10
-        elif current['temperature'] < 5 or current['temperature'] > 30:
-            score -= 20
-        
-        return max(0, min(100, score))
+# Сортировки списков маршрутов (?sort=...) - ключи курсорной пагинации
+SORT_KEYS = {
+    # Индекс hikes_route_created_idx
+    'new': ('-created_at', '-id'),
+    # Индекс hikes_route_score_idx; маршруты без проверок - в конце
+    'score': ('-current_score', '-created_at', '-id'),
+}
 
+# Маршрутов на странице каталога
+PAGE_SIZE = 9
 
-class ParkingService:
-    """Сервис для работы с данными о парковках"""
-    
-    @staticmethod
-    def get_parking_status(lat, lon):
-        """
-        Генерирует демо-статус парковки
-        В реальном проекте здесь будет запрос к Google Maps API
-        """
-        current_hour = datetime.now().hour
-        
-        # Логика: утром парковки заняты, днем свободны
-        if 7 <= current_hour <= 9:
-            status = 'busy'
-            description = 'Утренний час пик, мало мест'
-            score = 40
-        elif 9 < current_hour <= 17:
-            status = 'available'
-            description = 'Достаточно свободных мест'
-            score = 80
-        elif 17 < current_hour <= 20:
-            status = 'limited'
-            description = 'Вечерний наплыв, места есть'
-            score = 60
-        else:
-            status = 'available'
-            description = 'Ночью много свободных мест'
-            score = 90
-        
-        # Добавляем случайность для реалистичности
-        if random.random() < 0.2:
-            status = random.choice(['available', 'limited', 'busy'])
-            score = random.randint(30, 95)
-        
-        status_texts = {
-            'available': 'Свободно',
-            'limited': 'Ограничено',
-            'busy': 'Занято',
-        }
-        
-        return {
-            'status': status,
-            'status_text': status_texts.get(status, 'Неизвестно'),
-            'description': description,
-            'score': score,
-            'last_checked': timezone.now().strftime('%H:%M'),
-        }
 
+# Сколько маршрутов показывать на странице рекомендаций
+RECOMMENDATIONS_COUNT = 6
 
-class RouteAnalyzer:
-    """Анализатор маршрутов"""
-    
-    @staticmethod
-    def calculate_overall_score(route, weather_score, parking_score):
-        """Рассчитывает общий балл маршрута (0-100)"""
-        # Веса: погода 50%, парковка 30%, сложность 20%
-        weather_weight = 0.5
-        parking_weight = 0.3
-        difficulty_weight = 0.2
-        
-        # Балл за сложность (легкие маршруты получают больше баллов)
-        difficulty_scores = {
-            'easy': 90,
-            'medium': 70,
-            'hard': 50,
-        }
-        difficulty_score = difficulty_scores.get(route.difficulty, 50)
-        
-        # Расчет общего балла
-        total_score = (
-            weather_score * weather_weight +
-            parking_score * parking_weight +
-            difficulty_score * difficulty_weight
-        )
-        
-        return {
-            'overall_score': round(total_score),
-            'weather_score': weather_score,
-            'parking_score': parking_score,
-            'difficulty_score': difficulty_score,
-            'breakdown': {
-                'weather': f"{weather_score}/100 ({weather_weight*100}%)",
-                'parking': f"{parking_score}/100 ({parking_weight*100}%)",
-                'difficulty': f"{difficulty_score}/100 ({difficulty_weight*100}%)",
-            }
-        }
 
+def get_sort(request):
+    """Выбранная сортировка списка маршрутов"""
+    sort = request.GET.get('sort')
+    return sort if sort in SORT_KEYS else 'new'
 
-def home(request):
-    """Главная страница со списком маршрутов"""
-    # Получаем все маршруты с аннотациями
-    hikes_list = HikeRoute.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        reviews_count=Count('reviews')
-    ).order_by('-created_at')
+
+def paginate_routes(request, hikes_list, sort, per_page=PAGE_SIZE, count=None):
+    """
+    Страница списка маршрутов по курсору (?cursor=...), см. hikes/pagination.py.
+    Релевантность поиска не выражается ключами - для неё курсор хранит смещение.
+    """
+    keys = SORT_KEYS.get(sort)
+    if keys is None:
+        hikes_list = hikes_list.order_by('-search_rank', '-created_at', '-id')
+    paginator = CursorPaginator(hikes_list, per_page, keys=keys, count=count)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def filter_catalog(request):
+    """
+    Маршруты каталога с фильтрами из GET-параметров (сложность, поиск, сортировка).
+    Возвращает (queryset, sort, difficulty, search_query).
+    """
+    # Рейтинг и число отзывов хранятся в самом маршруте - без JOIN и GROUP BY
+    hikes_list = HikeRoute.objects.all()
     
     # Фильтрация по сложности
     difficulty = request.GET.get('difficulty')
     if difficulty and difficulty in ['easy', 'medium', 'hard']:
         hikes_list = hikes_list.filter(difficulty=difficulty)
+    else:
+        difficulty = None
     
-    # Поиск
+    # Полнотекстовый поиск (FTS5 / PostgreSQL), см. hikes/search.py
     search_query = request.GET.get('search')
     if search_query:
-        hikes_list = hikes_list.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        hikes_list = search.search_routes(hikes_list, search_query)
+    
+    # Сортировка: по дате или по текущему баллу пригодности,
+    # при поиске без явной сортировки - по релевантности
+    if search_query and not request.GET.get('sort'):
+        sort = 'relevance'
+    else:
+        sort = get_sort(request)
+    return hikes_list, sort, difficulty, search_query
+
+
+def catalog_scopes(sort, routes):
+    """Области кэша (hikes/caching.py), от которых зависит страница со списком routes"""
+    scopes = [caching.ROUTES]
+    if sort == 'score':
+        scopes.append(caching.SCORES)
+    return scopes + [caching.route_scope(route.pk) for route in routes]
+
+
+def catalog_count(hikes_list, filtered):
+    """Приблизительное число маршрутов в каталоге без COUNT(*) на каждый запрос"""
+    if not filtered:
+        return caching.get_site_stats()['total_hikes']
+    return caching.cached_count(hikes_list)
+
+
+def get_location(request):
+    """Координаты пользователя из ?lat=&lon= или None, если их нет или они некорректны"""
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+    except (KeyError, ValueError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return (lat, lon)
+    return None
+
+
+def get_radius(request):
+    """Радиус поиска рядом (?radius_km=), ограниченный MAX_RADIUS_KM"""
+    try:
+        radius_km = float(request.GET.get('radius_km', nearby.DEFAULT_RADIUS_KM))
+    except ValueError:
+        radius_km = nearby.DEFAULT_RADIUS_KM
+    if not radius_km > 0:
+        radius_km = nearby.DEFAULT_RADIUS_KM
+    return min(radius_km, nearby.MAX_RADIUS_KM)
+
+
+@caching.cache_anonymous_page
+@read_from_replica
+def home(request):
+    """Главная страница со списком маршрутов"""
+    hikes_list, sort, difficulty, search_query = filter_catalog(request)
     
-    # Пагинация
-    paginator = Paginator(hikes_list, 9)  # 9 маршрутов на странице
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация по курсору: глубокие страницы не дороже первой
+    page_obj = paginate_routes(
+        request, hikes_list, sort,
+        count=lambda: catalog_count(hikes_list, difficulty or search_query)
+    )
+    scopes = catalog_scopes(sort, page_obj)
     
     context = {
         'page_obj': page_obj,
         'difficulty_filter': difficulty,
         'search_query': search_query,
+        'sort': sort,
+        # Ключ и время жизни фрагмента со списком маршрутов
+        'cursor': request.GET.get('cursor', ''),
+        'catalog_version': caching.get_version_digest(scopes),
+        'fragment_cache_ttl': caching.get_page_cache_ttl(),
     }
-    return render(request, 'hikes/home.html', context)
-
-
-def hike_detail(request, hike_id):
-    """Детальная страница маршрута"""
-    hike = get_object_or_404(
-        HikeRoute.objects.annotate(
-            avg_rating=Avg('reviews__rating'),
-            reviews_count=Count('reviews'),
-            favorites_count=Count('favorited_by')
-        ),
-        id=hike_id
-    )
+    return caching.depends_on(render(request, 'hikes/home.html', context), scopes)
 
-    weather_service = WeatherService()
-    weather_data = weather_service.get_demo_weather_data(
-        hike.start_point_lat, 
-        hike.start_point_lon
-    )
-    weather_score = weather_service.get_weather_quality_score(weather_data)
-    
-    parking_service = ParkingService()
-    parking_data = parking_service.get_parking_status(
-        hike.start_point_lat, 
-        hike.start_point_lon
-    )
-    
-    route_analyzer = RouteAnalyzer()
-    overall_score = route_analyzer.calculate_overall_score(
-        route=hike,
-        weather_score=weather_score,
-        parking_score=parking_data['score']
-    )
+
+def load_hike_detail(hike_id, user):
+    """
+    Маршрут со всем, что нужно детальной странице, за фиксированное число запросов:
+    1) маршрут + автор + последняя проверка (JOIN) и is_favorited (EXISTS);
+    2) отзыв текущего пользователя (user_reviews).
+    Рейтинг и число отзывов - денормализованные счётчики маршрута.
+    Для анонимного пользователя запроса 2 нет.
+    """
+    queryset = HikeRoute.objects.select_related('author', 'latest_check')
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_favorited=Exists(HikeRoute.favorited_by.through.objects.filter(
+                hikeroute_id=OuterRef('pk'), user_id=user.pk
+            ))
+        ).prefetch_related(
+            Prefetch('reviews', queryset=Review.objects.filter(user=user), to_attr='user_reviews'),
+        )
+    else:
+        queryset = queryset.annotate(is_favorited=Value(False, output_field=BooleanField()))
+    hike = get_object_or_404(queryset, id=hike_id)
+    if not user.is_authenticated:
+        hike.user_reviews = []
+    return hike
+
+
+def prepare_hike_detail(request, hike_id):
+    """
+    Синхронная часть детальной страницы: маршрут, отзывы и форма отзыва.
+    Возвращает (маршрут, контекст без условий) или редирект после сохранения отзыва.
+    """
+    hike = load_hike_detail(hike_id, request.user)
     
-    is_favorited = False
-    if request.user.is_authenticated:
-        is_favorited = hike.favorited_by.filter(id=request.user.id).exists()
+    is_favorited = hike.is_favorited
 
     # Проверяем, оставлял ли пользователь отзыв
-    user_review = None
-    if request.user.is_authenticated:
-        user_review = Review.objects.filter(route=hike, user=request.user).first()
+    user_review = hike.user_reviews[0] if hike.user_reviews else None
     
     # Форма для отзыва с оценкой
     review_form = None
@@ -286,7 +215,7 @@ def hike_detail(request, hike_id):
             else:
                 review_form = ReviewForm()
     
-    # Получаем отзывы других пользователей - ИСПРАВЛЕННАЯ СТРОКА
+    # Отзывы других пользователей (запрос выполняется, только если их выводят)
     if request.user.is_authenticated:
         reviews = hike.reviews.exclude(user=request.user).select_related('user').order_by('-created_at')[:10]
     else:
@@ -298,14 +227,35 @@ def hike_detail(request, hike_id):
         'user_review': user_review,
         'review_form': review_form,
         'is_favorited': is_favorited,
-        'weather': weather_data['current'],
-        'weather_forecast': weather_data['forecast'],
-        'parking': parking_data,
-        'overall_score': overall_score,
-        'weather_score': weather_score,
     }
+    return hike, context
+
+
+async def hike_detail(request, hike_id):
+    """
+    Детальная страница маршрута (асинхронная).
+    Работа с базой и шаблоном идёт в sync_to_async, а условия на маршруте -
+    из кэша проверок (RouteCheck) или одновременным запросом погоды и парковки.
+    """
+    page = await sync_to_async(prepare_hike_detail)(request, hike_id)
+    if isinstance(page, HttpResponse):
+        return page
+    hike, context = page
+
+    route_conditions = await conditions.aget_route_conditions(hike) or conditions.EMPTY_CONDITIONS
+    # График - по тому же выпуску прогноза, что и проверка
+    forecast = await sync_to_async(forecasts.get_route_forecast)(hike, route_conditions['forecast_run_at'])
+    context.update({
+        'weather': route_conditions['weather'],
+        'forecast': forecasts.forecast_to_dict(forecast) if forecast is not None else None,
+        'parking': route_conditions['parking'],
+        'overall_score': route_conditions['overall_score'],
+        'weather_score': route_conditions['weather_score'],
+        'conditions_checked_at': route_conditions['checked_at'],
+        'conditions_is_stale': route_conditions['is_stale'],
+    })
     
-    return render(request, 'hikes/hike_detail.html', context)
+    return await sync_to_async(render)(request, 'hikes/hike_detail.html', context)
 
 
 @login_required
@@ -329,19 +279,19 @@ def hike_create(request):
 def favorites(request):
     """Страница избранных маршрутов"""
     # Маршруты, добавленные в избранное
-    favorite_hikes = request.user.favorite_hikes.all().annotate(
-        avg_rating=Avg('reviews__rating'),
-        reviews_count=Count('reviews')
-    ).order_by('-created_at')
+    sort = get_sort(request)
+    # Автор выводится в карточке - загружаем его тем же запросом
+    favorite_hikes = request.user.favorite_hikes.select_related('author')
     
-    # Пагинация
-    paginator = Paginator(favorite_hikes, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация по курсору; общее число считается один раз и кэшируется
+    page_obj = paginate_routes(request, favorite_hikes, sort, count=lambda: caching.cached_count(
+        favorite_hikes, scopes=(caching.ROUTES, caching.favorites_scope(request.user.pk))
+    ))
     
     context = {
         'page_obj': page_obj,
-        'total_favorites': favorite_hikes.count(),
+        'total_favorites': page_obj.paginator.count,
+        'sort': sort,
     }
     return render(request, 'hikes/favorites.html', context)
 
@@ -366,74 +316,116 @@ def register(request):
     
     return render(request, 'hikes/register.html', {'form': form})
 
+@caching.cache_anonymous_page
+@read_from_replica
 def recommendations(request):
     """Страница рекомендаций маршрутов"""
-    # Пока возвращаем просто топ маршрутов по рейтингу
-    # Позже добавим логику с погодой и парковками
+    # Координаты пользователя (необязательно) - для учёта близости маршрутов
+    location = get_location(request)
     
-    recommended_hikes = HikeRoute.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        reviews_count=Count('reviews')
-    ).filter(reviews_count__gte=1).order_by('-avg_rating')[:5]
+    route_ids = recommender.get_recommended_route_ids(
+        request.user,
+        k=RECOMMENDATIONS_COUNT,
+        location=location
+    )
+    hikes_by_id = HikeRoute.objects.in_bulk(route_ids)
+    recommended_hikes = [hikes_by_id[i] for i in route_ids if i in hikes_by_id]
     
     context = {
         'recommended_hikes': recommended_hikes,
+        'location': location,
+    }
+    response = render(request, 'hikes/recommendations.html', context)
+    # Порядок - по баллу и рейтингу всех маршрутов
+    scopes = [caching.SCORES, caching.RATINGS] + catalog_scopes('new', recommended_hikes)
+    return caching.depends_on(response, scopes)
+
+
+# Варианты радиуса на странице "Рядом со мной" (км)
+NEARBY_RADIUS_CHOICES = [5, 10, 25, 50, 100, 200]
+
+
+def nearby_hikes(request):
+    """Маршруты рядом с пользователем: /nearby/?lat=&lon=&radius_km="""
+    location = get_location(request)
+    radius_km = get_radius(request)
+    
+    page_obj = None
+    location_query = ''
+    if location:
+        hikes_list = nearby.nearby_routes(HikeRoute.objects.all(), *location, radius_km=radius_km)
+        paginator = Paginator(hikes_list, 9)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        # Параметры для ссылок пагинации (числа без локализации)
+        location_query = urlencode({'lat': location[0], 'lon': location[1], 'radius_km': radius_km})
+    
+    context = {
+        'page_obj': page_obj,
+        'location': location,
+        'location_query': location_query,
+        'radius_km': radius_km,
+        'radius_choices': NEARBY_RADIUS_CHOICES,
     }
-    return render(request, 'hikes/recommendations.html', context)
+    return render(request, 'hikes/nearby.html', context)
 
 
+@caching.cache_anonymous_page
+@read_from_replica
 def about(request):
     """Страница "О проекте" """
-    stats = {
-        'total_hikes': HikeRoute.objects.count(),
-        'total_points': PointOfInterest.objects.count(),
-        'total_reviews': Review.objects.count(),
-    }
+    # Счётчики хранятся в кэше и обновляются сигналами
+    stats = caching.get_site_stats()
     
-    return render(request, 'hikes/about.html', {'stats': stats})
+    response = render(request, 'hikes/about.html', {'stats': stats})
+    return caching.depends_on(response, [caching.STATS])
 
 
 @login_required
 def my_hikes(request):
     """Страница маршрутов текущего пользователя"""
     # Маршруты, созданные пользователем
-    authored_hikes = HikeRoute.objects.filter(author=request.user).annotate(
-        avg_rating=Avg('reviews__rating'),
-        reviews_count=Count('reviews')
-    ).order_by('-created_at')
+    sort = get_sort(request)
+    authored_hikes = HikeRoute.objects.filter(author=request.user)
     
-    # Пагинация
-    paginator = Paginator(authored_hikes, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация по курсору; общее число считается один раз и кэшируется
+    page_obj = paginate_routes(request, authored_hikes, sort,
+                               count=lambda: caching.cached_count(authored_hikes))
     
     context = {
         'page_obj': page_obj,
-        'total_hikes': authored_hikes.count(),
+        'total_hikes': page_obj.paginator.count,
+        'sort': sort,
     }
     return render(request, 'hikes/my_hikes.html', context)
 
 
 @login_required
 def toggle_favorite(request, hike_id):
-    """Добавить/удалить маршрут из избранного (AJAX/обычный)"""
-    hike = get_object_or_404(HikeRoute, id=hike_id)
+    """
+    Добавить/удалить маршрут из избранного (AJAX/обычный).
+    Параметр action=add|remove задаёт нужное состояние, поэтому повторная
+    отправка (двойной клик) ничего не меняет; без него - переключение.
+    """
+    action = request.POST.get('action')
+    try:
+        is_favorite, favorites_count = set_favorite(
+            hike_id, request.user,
+            favorite={'add': True, 'remove': False}.get(action)
+        )
+    except HikeRoute.DoesNotExist:
+        raise Http404('Маршрут не найден')
     
-    if request.user in hike.favorited_by.all():
-        hike.favorited_by.remove(request.user)
-        is_favorite = False
-        message = 'Маршрут удалён из избранного'
-    else:
-        hike.favorited_by.add(request.user)
-        is_favorite = True
+    if is_favorite:
         message = 'Маршрут добавлен в избранное!'
+    else:
+        message = 'Маршрут удалён из избранного'
     
     # Для AJAX запросов
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         response = JsonResponse({
             'is_favorite': is_favorite,
             'message': message,
-            'favorites_count': hike.favorited_by.count()
+            'favorites_count': favorites_count
         })
         # Отключаем кэширование
         response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -443,4 +435,207 @@ def toggle_favorite(request, hike_id):
     
     # Для обычных запросов
     messages.info(request, message)
-    return redirect(request.META.get('HTTP_REFERER', 'home'))
\ No newline at end of file
+    return redirect(request.META.get('HTTP_REFERER', 'home'))
+
+
+# Максимум маршрутов в одном запросе к API условий
+API_CONDITIONS_MAX_IDS = 100
+
+
+@require_GET
+@read_from_replica
+def api_conditions(request):
+    """
+    JSON с условиями (погода, парковка, общий балл) сразу для многих маршрутов:
+    /api/conditions/?ids=1,2,3
+    Данные берутся из последних проверок RouteCheck одним запросом,
+    поддерживаются ETag и Last-Modified.
+    """
+    try:
+        route_ids = sorted({int(i) for i in request.GET.get('ids', '').split(',') if i.strip()})
+    except ValueError:
+        return JsonResponse({'error': 'Параметр ids должен быть списком чисел через запятую'}, status=400)
+    if not route_ids:
+        return JsonResponse({'error': 'Не указан параметр ids'}, status=400)
+    if len(route_ids) > API_CONDITIONS_MAX_IDS:
+        return JsonResponse(
+            {'error': f'Не больше {API_CONDITIONS_MAX_IDS} маршрутов за запрос'},
+            status=400
+        )
+
+    checks = conditions.get_latest_checks(route_ids)
+
+    # ETag зависит от набора последних проверок, Last-Modified - самая свежая из них
+    etag_source = ','.join(f'{route_id}:{checks[route_id].pk}' for route_id in sorted(checks))
+    etag = '"%s"' % hashlib.md5(etag_source.encode()).hexdigest()
+    last_modified = None
+    if checks:
+        last_modified = int(max(check.check_date for check in checks.values()).timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse({
+            'routes': {
+                str(route_id): {
+                    'title': check.route.title,
+                    **conditions.check_to_dict(check),
+                }
+                for route_id, check in checks.items()
+            },
+            'missing': [route_id for route_id in route_ids if route_id not in checks],
+        })
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'max-age=60'
+    return response
+
+
+@require_GET
+def api_forecast(request, hike_id):
+    """
+    JSON с почасовым прогнозом (температура, осадки) для графика маршрута:
+    /api/hikes/<id>/forecast/
+    Отдаётся последний сохранённый выпуск прогноза для ячейки сетки маршрута.
+    """
+    hike = HikeRoute.objects.filter(pk=hike_id).only('id', 'start_point_lat', 'start_point_lon').first()
+    if hike is None:
+        return JsonResponse({'error': 'Маршрут не найден'}, status=404)
+    forecast = forecasts.get_route_forecast(hike)
+    if forecast is None:
+        return JsonResponse({'error': 'Прогноза для маршрута ещё нет'}, status=404)
+
+    last_modified = int(forecast.run_at.timestamp())
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse({'route': hike.id, **forecasts.forecast_to_dict(forecast)})
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'max-age=300'
+    return response
+
+
+# Глубина истории по умолчанию и максимум (дни) для каждого вида сводок
+API_HISTORY_DAYS = {
+    'hour': (2, 31),
+    'day': (30, 366),
+}
+
+
+@require_GET
+def api_history(request, hike_id):
+    """
+    JSON с историей условий на маршруте по сводкам проверок:
+    /api/hikes/<id>/history/?period=day|hour&days=30
+    Для каждого часа или дня - число проверок и минимум, максимум
+    и среднее балла, температуры и вероятности осадков.
+    """
+    period = request.GET.get('period', 'day')
+    if period not in API_HISTORY_DAYS:
+        return JsonResponse({'error': 'Параметр period должен быть day или hour'}, status=400)
+    default_days, max_days = API_HISTORY_DAYS[period]
+    try:
+        days = int(request.GET.get('days', default_days))
+    except ValueError:
+        return JsonResponse({'error': 'Параметр days должен быть числом'}, status=400)
+    days = min(max(days, 1), max_days)
+    if not HikeRoute.objects.filter(pk=hike_id).exists():
+        return JsonResponse({'error': 'Маршрут не найден'}, status=404)
+
+    since = timezone.now() - timedelta(days=days)
+    response = JsonResponse({
+        'route': hike_id,
+        'period': period,
+        'days': days,
+        'points': [
+            history.aggregate_to_dict(aggregate)
+            for aggregate in history.get_history(hike_id, period, since)
+        ],
+    })
+    response['Cache-Control'] = 'max-age=300'
+    return response
+
+
+def route_to_dict(hike):
+    """Краткое описание маршрута для JSON API"""
+    return {
+        'id': hike.id,
+        'title': hike.title,
+        'difficulty': hike.difficulty,
+        'length_km': float(hike.length_km),
+        'start_point': [hike.start_point_lat, hike.start_point_lon],
+        'current_score': hike.current_score,
+        'avg_rating': round(hike.avg_rating, 2) if hike.avg_rating is not None else None,
+        'reviews_count': hike.reviews_count,
+        'url': reverse('hike_detail', args=[hike.id]),
+    }
+
+
+# Маршрутов на странице в API поиска рядом
+API_NEARBY_PAGE_SIZE = 20
+
+
+@require_GET
+def api_nearby(request):
+    """
+    JSON со списком маршрутов рядом с точкой, по возрастанию расстояния:
+    /api/nearby/?lat=55.75&lon=37.61&radius_km=25&page=1
+    """
+    location = get_location(request)
+    if location is None:
+        return JsonResponse({'error': 'Укажите корректные координаты lat и lon'}, status=400)
+    radius_km = get_radius(request)
+
+    hikes_list = nearby.nearby_routes(HikeRoute.objects.all(), *location, radius_km=radius_km)
+    paginator = Paginator(hikes_list, API_NEARBY_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    return JsonResponse({
+        'count': paginator.count,
+        'page': page_obj.number,
+        'num_pages': paginator.num_pages,
+        'radius_km': radius_km,
+        'results': [
+            {**route_to_dict(hike), 'distance_km': round(hike.distance_km, 2)}
+            for hike in page_obj
+        ],
+    })
+
+
+# Маршрутов на странице в API каталога
+API_HIKES_PAGE_SIZE = 20
+
+
+@require_GET
+def api_hikes(request):
+    """
+    JSON со списком маршрутов каталога с курсорной пагинацией:
+    /api/hikes/?difficulty=&search=&sort=new|score&cursor=...&count=1
+    Следующая страница - по курсору next из ответа. Приблизительное
+    общее число маршрутов возвращается только по запросу (count=1).
+    """
+    hikes_list, sort, difficulty, search_query = filter_catalog(request)
+    page_obj = paginate_routes(
+        request, hikes_list, sort, per_page=API_HIKES_PAGE_SIZE,
+        count=lambda: catalog_count(hikes_list, difficulty or search_query)
+    )
+
+    data = {
+        'sort': sort,
+        'results': [route_to_dict(hike) for hike in page_obj],
+        'next': page_obj.next_cursor,
+        'previous': page_obj.previous_cursor,
+    }
+    if request.GET.get('count') == '1':
+        data['approximate_count'] = page_obj.paginator.count
+    return JsonResponse(data)
+
+
+@require_GET
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus (доступ по METRICS_ALLOWED_IPS)"""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if allowed and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    response = HttpResponse(metrics.REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
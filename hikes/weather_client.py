@@ -0,0 +1,244 @@
+"""
+Клиент OpenWeatherMap One Call API 3.0.
+
+Один requests.Session на процесс: keep-alive соединения из ограниченного
+пула (pool_block=True - при исчерпании пула поток ждёт свободное
+соединение), таймауты на подключение и чтение, повторы с экспоненциальной
+задержкой и автоматический выключатель (circuit breaker), который после
+серии ошибок перестаёт ходить к провайдеру на reset_timeout секунд.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherProviderError(Exception):
+    """Провайдер погоды недоступен или вернул ошибку"""
+
+
+class CircuitOpenError(WeatherProviderError):
+    """Выключатель разомкнут: запросы к провайдеру временно не выполняются"""
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель.
+    После failure_threshold ошибок подряд размыкается на reset_timeout секунд,
+    затем пропускает один пробный запрос (полуоткрытое состояние).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Проверяет, можно ли выполнить запрос"""
+        with self._lock:
+            state = self._state()
+            if state == 'open' or (state == 'half-open' and self._trial_in_progress):
+                raise CircuitOpenError('Провайдер погоды временно отключён')
+            if state == 'half-open':
+                self._trial_in_progress = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_progress = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ClientStats:
+    """Статистика клиента: задержки запросов и загрузка пула соединений"""
+
+    def __init__(self, pool_size, window=1000):
+        self.pool_size = pool_size
+        self.calls = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, latency, ok):
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.latency_total += latency
+            self._latencies.append(latency)
+
+    def snapshot(self):
+        """Текущие показатели в виде словаря"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls = self.calls
+
+            def percentile(p):
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+            return {
+                'calls': calls,
+                'errors': self.errors,
+                'latency_avg': self.latency_total / calls if calls else 0.0,
+                'latency_p50': percentile(0.5),
+                'latency_p95': percentile(0.95),
+                'latency_max': latencies[-1] if latencies else 0.0,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'pool_size': self.pool_size,
+                'pool_saturation': self.in_flight / self.pool_size,
+            }
+
+
+class OpenWeatherMapClient:
+    """Клиент One Call API 3.0 с пулом соединений"""
+
+    def __init__(self, api_key, base_url='https://api.openweathermap.org',
+                 connect_timeout=3.05, read_timeout=10, pool_size=10,
+                 retries=2, backoff_factor=0.5, failure_threshold=5, reset_timeout=30):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = ClientStats(pool_size)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def one_call(self, lat, lon):
+        """Сырой ответ One Call API для точки"""
+        self.breaker.before_call()
+        self.stats.start()
+        started = time.monotonic()
+        ok = False
+        try:
+            response = self.session.get(
+                f'{self.base_url}/data/3.0/onecall',
+                params={
+                    'lat': lat,
+                    'lon': lon,
+                    'appid': self.api_key,
+                    'units': 'metric',
+                    'lang': 'ru',
+                    'exclude': 'minutely,daily,alerts',
+                },
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            ok = True
+            return payload
+        except (requests.RequestException, ValueError) as exc:
+            raise WeatherProviderError(f'Ошибка запроса к OpenWeatherMap: {exc}') from exc
+        finally:
+            latency = time.monotonic() - started
+            self.stats.finish(latency, ok)
+            if ok:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            logger.debug('OpenWeatherMap %s,%s: %.3f с, ok=%s', lat, lon, latency, ok)
+
+    def get_weather_data(self, lat, lon):
+        """Погода в формате WeatherService.get_demo_weather_data"""
+        return to_weather_data(self.one_call(lat, lon))
+
+    def close(self):
+        self.session.close()
+
+
+def _icon_name(code):
+    # Коды иконок OpenWeatherMap: 01 - ясно, 02 - малооблачно, остальное - облачно/осадки
+    if code.startswith('01'):
+        return 'sun'
+    if code.startswith('02'):
+        return 'sun-cloud'
+    return 'cloud'
+
+
+def to_weather_data(payload, hours=12):
+    """Преобразует ответ One Call API в формат WeatherService"""
+    current = payload['current']
+    hourly = payload.get('hourly', [])[:hours]
+    offset = payload.get('timezone_offset', 0)
+    weather = (current.get('weather') or [{}])[0]
+    precipitation = round(hourly[0].get('pop', 0) * 100) if hourly else 0
+
+    def local_hour(timestamp):
+        return datetime.fromtimestamp(timestamp + offset, tz=dt_timezone.utc).strftime('%H:00')
+
+    return {
+        'current': {
+            'temperature': round(current['temp']),
+            'feels_like': round(current.get('feels_like', current['temp'])),
+            'description': weather.get('description', '').capitalize(),
+            'icon': _icon_name(weather.get('icon', '')),
+            'humidity': current.get('humidity', 0),
+            'wind_speed': round(current.get('wind_speed', 0)),
+            'precipitation_chance': precipitation,
+        },
+        'forecast': {
+            # Выпуск и первый час прогноза (Unix time) - для хранилища прогнозов
+            'run_at': current.get('dt', int(time.time())),
+            'start': hourly[0]['dt'] if hourly else current.get('dt', int(time.time())),
+            'utc_offset': offset,
+            'labels': [local_hour(hour['dt']) for hour in hourly],
+            'temperatures': [round(hour['temp'], 1) for hour in hourly],
+            'precipitation': [round(hour.get('pop', 0) * 100) for hour in hourly],
+        }
+    }
@@ -73,7 +73,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
 document.addEventListener('DOMContentLoaded', function() {
     // Обработка формы избранного
-    const favoriteForms = document.querySelectorAll('form[action*="toggle_favorite"]');
+    const favoriteForms = document.querySelectorAll('form.favorite-form');
     
     favoriteForms.forEach(form => {
         form.addEventListener('submit', function(e) {
@@ -82,6 +82,12 @@ document.addEventListener('DOMContentLoaded', function() {
             const formData = new FormData(this);
             const url = this.action;
             const button = this.querySelector('button');
+            const actionInput = this.querySelector('input[name="action"]');
+            // Повторные клики до ответа сервера игнорируем
+            if (button.disabled) {
+                return;
+            }
+            button.disabled = true;
             
             fetch(url, {
                 method: 'POST',
@@ -108,6 +114,9 @@ document.addEventListener('DOMContentLoaded', function() {
                         button.classList.remove('btn-danger');
                         button.classList.add('btn-outline-danger');
                     }
+                    if (actionInput) {
+                        actionInput.value = data.is_favorite ? 'remove' : 'add';
+                    }
                     
                     // Показываем уведомление
                     showNotification(data.message, 'success');
@@ -117,6 +126,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 console.error('Error:', error);
                 // Fallback: отправить форму обычным способом
                 this.submit();
+            })
+            .finally(() => {
+                button.disabled = false;
             });
         });
     });
@@ -188,4 +200,59 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Также настраиваем при изменении размера окна
     window.addEventListener('resize', setupProgressBar);
-});
\ No newline at end of file
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Координаты пользователя для страниц "Рядом" и "Рекомендации": форма с data-geolocate
+    // отправляется GET-запросом с lat и lon из Geolocation API
+    if (!navigator.geolocation) return;
+    document.querySelectorAll('form[data-geolocate]').forEach(form => {
+        form.querySelector('button').addEventListener('click', function() {
+            navigator.geolocation.getCurrentPosition(function(position) {
+                form.elements.lat.value = position.coords.latitude.toFixed(4);
+                form.elements.lon.value = position.coords.longitude.toFixed(4);
+                form.submit();
+            });
+        });
+    });
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    // График почасового прогноза на странице маршрута (Chart.js подключает hike_detail.html)
+    const dataElement = document.getElementById('forecast-data');
+    const canvas = document.getElementById('forecastChart');
+    if (!dataElement || !canvas || typeof Chart === 'undefined') return;
+
+    const forecast = JSON.parse(dataElement.textContent);
+    new Chart(canvas, {
+        data: {
+            labels: forecast.labels,
+            datasets: [
+                {
+                    type: 'line',
+                    label: 'Температура, °C',
+                    data: forecast.temperatures,
+                    borderColor: '#fd7e14',
+                    backgroundColor: '#fd7e14',
+                    tension: 0.3,
+                    yAxisID: 'temperature',
+                },
+                {
+                    type: 'bar',
+                    label: 'Осадки, %',
+                    data: forecast.precipitation,
+                    backgroundColor: 'rgba(13, 110, 253, 0.3)',
+                    yAxisID: 'precipitation',
+                },
+            ],
+        },
+        options: {
+            responsive: true,
+            interaction: { mode: 'index', intersect: false },
+            scales: {
+                temperature: { type: 'linear', position: 'left' },
+                precipitation: { type: 'linear', position: 'right', min: 0, max: 100, grid: { drawOnChartArea: false } },
+            },
+        },
+    });
+});